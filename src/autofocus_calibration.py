@@ -20,39 +20,18 @@ from typing import List, Tuple, Optional
 import numpy as np
 import cv2
 
-from hardware.cfocus.cfocus_controller import CFocusController
+from hardware.cfocus import CFocusController, CFocusModel, SimulatedCFocusController
 from core.autofocus.smart_focus_scorer import SmartFocusScorer
 
 
 logger = logging.getLogger("MotorControl_L206")
 
 
-class _SimulatedCFocus:
-    """Simple simulation of C-Focus when the DLL is not available.
-
-    This allows you to test the calibration loop speed and scoring logic
-    even on machines without the Madlib.dll driver or without hardware
-    connected.
-    """
-
-    def __init__(self, z_range: float = 100.0):
-        self._z_range = float(z_range)
-        self._position = 0.0
-
-    def move_z(self, position_um: float) -> bool:
-        if position_um < 0 or position_um > self._z_range:
-            return False
-        self._position = float(position_um)
-        return True
-
-    def read_z(self) -> float:
-        return self._position
-
-    def get_z_range(self) -> float:
-        return self._z_range
-
-    def disconnect(self) -> None:  # pragma: no cover - no-op
-        return None
+def _simulated_cfocus(z_range: float) -> SimulatedCFocusController:
+    """C-Focus simulado (sin Madlib.dll ni hardware) ya conectado."""
+    cfocus = SimulatedCFocusController(CFocusModel(z_range_um=z_range))
+    cfocus.connect()
+    return cfocus
 
 
 def snap_image(image_path: Optional[str] = None) -> np.ndarray:
@@ -106,7 +85,7 @@ def calibration_routine(
                 "[Calibration] No se pudo conectar C-Focus (%s). Usando simulación.",
                 msg,
             )
-            cfocus = _SimulatedCFocus(z_range=z_max)
+            cfocus = _simulated_cfocus(z_max)
         else:
             cfocus = real_cfocus
             # Si el rango real es menor que z_max, adaptarlo
@@ -117,7 +96,7 @@ def calibration_routine(
             "Posible conflicto 32/64 bits. Usando simulación.",
             e,
         )
-        cfocus = _SimulatedCFocus(z_range=z_max)
+        cfocus = _simulated_cfocus(z_max)
 
     # --- 2. Initialize SmartFocusScorer (MorphologyFocus) ---
     scorer = SmartFocusScorer()
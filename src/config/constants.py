@@ -5,11 +5,15 @@ MEJORAS 2025-12-17:
 - Calibración cargada desde calibration.json (NO hardcodeada)
 - Funciones de conversión dinámicas
 - Recarga en caliente con reload_calibration()
+- CalibrationSnapshot inmutable con conversiones vectorizadas (numpy)
 """
 
 import json
 import os
 import logging
+from dataclasses import dataclass
+
+import numpy as np
 
 logger = logging.getLogger('MotorControl_L206')
 
@@ -17,6 +21,43 @@ logger = logging.getLogger('MotorControl_L206')
 SERIAL_PORT = 'COM5' 
 BAUD_RATE = 1000000
 PLOT_LENGTH = 100
+# SignalWindow: historial (muestras), redibujado por frame y puntos dibujados
+SIGNAL_HISTORY_LENGTH = 10000
+SIGNAL_RENDER_FPS = 30
+SIGNAL_MAX_DISPLAY_POINTS = 4000
+# Negociar telemetría binaria (cae a ASCII si el firmware no la soporta)
+SERIAL_BINARY_TELEMETRY = False
+# Ventana de emisión por lotes del thread serial en ms (0 = una señal por muestra)
+SERIAL_BATCH_INTERVAL_MS = 0
+# Antigüedad máxima de la última muestra aceptada por los lazos de control (s)
+SENSOR_STALE_TIMEOUT_S = 0.1
+# Lazo de control de TestService: thread dedicado (False = QTimer en la GUI) y periodo
+CONTROL_LOOP_THREADED = True
+CONTROL_PERIOD_S = 0.01
+# Exportación del controlador H∞ al Arduino: discretización ('tustin'/'zoh') y
+# rango de error esperado (µm) para escalar las señales en punto fijo
+CONTROLLER_DISCRETIZATION = 'tustin'
+FIXED_POINT_ERROR_RANGE_UM = 2000.0
+# Aprendizaje de convergencia por región en trayectorias (False = tolerancia/intentos fijos)
+ADAPTIVE_CONVERGENCE_ENABLED = False
+CONVERGENCE_REGION_UM = 500.0
+# Escritura de grabaciones en un thread dedicado (sin I/O en el thread de la GUI)
+RECORDER_THREADED_WRITER = True
+# Cámara simulada (SimulatedThorlabsCamera) en lugar de la Thorlabs física:
+# permite usar vista en vivo, captura y microscopía sin pylablib
+CAMERA_SIMULATED = False
+# C-Focus simulado (SimulatedCFocusController) en lugar del piezo con Madlib.dll;
+# junto con la cámara simulada permite medir el autofoco sin hardware
+CFOCUS_SIMULATED = False
+# Ranuras preasignadas de frames en vivo (CameraWorker/FramePool)
+CAMERA_FRAME_POOL_SLOTS = 6
+# Conversión uint16 → uint8 de la vista en vivo (DisplayConverter):
+# 'fixed' (rango fijo), 'percentile' (auto-contraste cada N frames) o 'max' (por frame)
+CAMERA_DISPLAY_MODE = 'percentile'
+CAMERA_DISPLAY_FIXED_RANGE = (0, 4095)
+CAMERA_DISPLAY_PERCENTILES = (0.5, 99.9)
+CAMERA_DISPLAY_UPDATE_FRAMES = 15
+CAMERA_DISPLAY_GAMMA = 1.0
 
 # =============================================================================
 # CARGA DINÁMICA DE CALIBRACIÓN DESDE JSON
@@ -24,6 +65,8 @@ PLOT_LENGTH = 100
 
 _CONFIG_DIR = os.path.dirname(os.path.abspath(__file__))
 _CALIBRATION_FILE = os.path.join(_CONFIG_DIR, 'calibration.json')
+# Caché persistente del barrido de ponderaciones H∞ (core.controllers.hinf_sweep)
+HINF_SWEEP_CACHE_FILE = os.path.join(_CONFIG_DIR, 'hinf_sweep_cache.json')
 
 # Valores por defecto (solo si no existe el archivo JSON)
 _DEFAULT_CALIBRATION = {
@@ -44,6 +87,75 @@ _DEFAULT_SYSTEM = {
 }
 
 
+@dataclass(frozen=True)
+class CalibrationSnapshot:
+    """
+    Copia inmutable de la calibración µm ↔ ADC de ambos ejes.
+    
+    Tomar un snapshot al inicio de una trayectoria garantiza que un
+    reload_calibration() concurrente no cambie la pendiente a mitad de
+    ejecución. Las conversiones aceptan escalares o arrays numpy.
+    
+    Relación (inversa para estos sensores): um = intercept - adc * slope
+    """
+    x_intercept: float
+    x_slope: float
+    y_intercept: float
+    y_slope: float
+    
+    def axis(self, axis: str = 'x'):
+        """Retorna (intercept, slope) del eje 'x' o 'y'."""
+        if axis.lower() == 'x':
+            return self.x_intercept, self.x_slope
+        return self.y_intercept, self.y_slope
+    
+    def slope(self, axis: str = 'x') -> float:
+        """Pendiente en µm/ADC del eje."""
+        return self.axis(axis)[1]
+    
+    def um_to_adc(self, um, axis: str = 'x'):
+        """
+        Convierte µm → ADC (sin saturar, igual que um_to_adc()).
+        
+        Args:
+            um: Escalar o array de posiciones en µm
+            axis: 'x' o 'y'
+            
+        Returns:
+            float para entrada escalar, ndarray float64 para arrays
+        """
+        intercept, slope = self.axis(axis)
+        if np.ndim(um):
+            um = np.asarray(um, dtype=np.float64)
+        return (intercept - um) / slope
+    
+    def adc_to_um(self, adc, axis: str = 'x'):
+        """Convierte ADC → µm (escalar o array)."""
+        intercept, slope = self.axis(axis)
+        if np.ndim(adc):
+            adc = np.asarray(adc, dtype=np.float64)
+        return intercept - adc * slope
+    
+    def um_to_adc_xy(self, points_um) -> np.ndarray:
+        """
+        Convierte un array (N, 2) de puntos (x, y) en µm a ADC en una sola operación.
+        
+        Returns:
+            ndarray (N, 2) float64 con (adc_x, adc_y)
+        """
+        points = np.asarray(points_um, dtype=np.float64).reshape(-1, 2)
+        intercepts = np.array([self.x_intercept, self.y_intercept])
+        slopes = np.array([self.x_slope, self.y_slope])
+        return (intercepts - points) / slopes
+    
+    def adc_to_um_xy(self, points_adc) -> np.ndarray:
+        """Convierte un array (N, 2) de lecturas (adc_x, adc_y) a µm."""
+        points = np.asarray(points_adc, dtype=np.float64).reshape(-1, 2)
+        intercepts = np.array([self.x_intercept, self.y_intercept])
+        slopes = np.array([self.x_slope, self.y_slope])
+        return intercepts - points * slopes
+
+
 def _load_calibration() -> dict:
     """Carga la calibración desde el archivo JSON."""
     if os.path.exists(_CALIBRATION_FILE):
@@ -120,7 +232,7 @@ def reload_calibration():
     """Recarga la calibración desde el archivo JSON."""
     global CALIBRATION_X, CALIBRATION_Y, DEADZONE_ADC, POSITION_TOLERANCE_UM
     global SETTLING_CYCLES, DEFAULT_TRAJECTORY_PAUSE, ADC_MAX, RECORRIDO_UM, FACTOR_ESCALA
-    global MAX_ATTEMPTS_PER_POINT, FALLBACK_TOLERANCE_MULTIPLIER
+    global MAX_ATTEMPTS_PER_POINT, FALLBACK_TOLERANCE_MULTIPLIER, _CALIBRATION_SNAPSHOT
     
     data = _load_calibration()
     
@@ -137,6 +249,11 @@ def reload_calibration():
         'intercept': y_cal.get('intercept_um', 21601.0),
         'slope': y_cal.get('slope_um_per_adc', 12.22)
     }
+    # Reemplazo atómico de la referencia: los lectores ven el snapshot viejo o el nuevo
+    _CALIBRATION_SNAPSHOT = CalibrationSnapshot(
+        CALIBRATION_X['intercept'], CALIBRATION_X['slope'],
+        CALIBRATION_Y['intercept'], CALIBRATION_Y['slope']
+    )
     
     # Parámetros de control
     ctrl = data.get('control', _DEFAULT_CONTROL)
@@ -161,6 +278,7 @@ def reload_calibration():
 # --- Cargar calibración al importar el módulo ---
 CALIBRATION_X = {}
 CALIBRATION_Y = {}
+_CALIBRATION_SNAPSHOT = None
 DEADZONE_ADC = 2
 POSITION_TOLERANCE_UM = 25.0
 SETTLING_CYCLES = 4
@@ -213,6 +331,43 @@ def adc_to_um(adc: float, axis: str = 'x') -> float:
     return cal['intercept'] - (adc * cal['slope'])
 
 
+def get_calibration_snapshot() -> CalibrationSnapshot:
+    """Retorna la calibración vigente como snapshot inmutable."""
+    return _CALIBRATION_SNAPSHOT
+
+
+def um_to_adc_array(um, axis: str = 'x', calibration: CalibrationSnapshot = None) -> np.ndarray:
+    """
+    Versión vectorizada de um_to_adc().
+    
+    Args:
+        um: Array (o escalar) de posiciones en µm
+        axis: 'x' o 'y'
+        calibration: Snapshot a usar (por defecto el vigente)
+        
+    Returns:
+        ndarray float64 con los valores ADC (sin saturar)
+    """
+    cal = calibration or _CALIBRATION_SNAPSHOT
+    return cal.um_to_adc(np.atleast_1d(um), axis)
+
+
+def adc_to_um_array(adc, axis: str = 'x', calibration: CalibrationSnapshot = None) -> np.ndarray:
+    """
+    Versión vectorizada de adc_to_um().
+    
+    Args:
+        adc: Array (o escalar) de lecturas ADC
+        axis: 'x' o 'y'
+        calibration: Snapshot a usar (por defecto el vigente)
+        
+    Returns:
+        ndarray float64 con las posiciones en µm
+    """
+    cal = calibration or _CALIBRATION_SNAPSHOT
+    return cal.adc_to_um(np.atleast_1d(adc), axis)
+
+
 def get_calibration_info() -> dict:
     """Retorna información de calibración actual para mostrar en UI."""
     return {
@@ -2,9 +2,14 @@
 Módulo de análisis de función de transferencia.
 
 Contiene herramientas para identificar parámetros K y τ a partir de
-datos experimentales de respuesta al escalón.
+datos experimentales de respuesta al escalón, y sesiones que cargan cada
+grabación una sola vez para analizar varios tramos, e identificación en
+lote de todos los escalones de una grabación.
 """
 
 from .transfer_function_analyzer import TransferFunctionAnalyzer
+from .recording_session import RecordingSession, RecordingSessionCache
+from .step_identification import BatchStepIdentifier, StepEvent, detect_steps
 
-__all__ = ['TransferFunctionAnalyzer']
+__all__ = ['TransferFunctionAnalyzer', 'RecordingSession', 'RecordingSessionCache',
+           'BatchStepIdentifier', 'StepEvent', 'detect_steps']
@@ -0,0 +1,143 @@
+"""
+Sesión de análisis sobre una grabación cargada una sola vez.
+
+TransferFunctionAnalyzer releía y filtraba el archivo completo en cada
+análisis; identificar varios escalones de una grabación larga costaba
+O(escalones × tamaño del archivo). La sesión carga la grabación una vez
+(los archivos columnares .l206 se mapean en memoria), arma el índice de
+tiempo y resuelve cada tramo [t_inicio, t_fin] con búsqueda binaria:
+cada análisis solo copia las muestras de su tramo.
+
+Las sesiones se reutilizan mientras el archivo no cambie (tamaño y fecha
+de modificación), de modo que una grabación en curso se recarga sola.
+"""
+
+import os
+import logging
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from data.columnar import is_columnar_file, load_columnar
+
+logger = logging.getLogger(__name__)
+
+# Sesiones abiertas simultáneamente (LRU)
+MAX_OPEN_SESSIONS = 4
+
+
+class RecordingSession:
+    """Grabación en memoria con índice de tiempo para consultas por tramo."""
+
+    def __init__(self, filename):
+        """
+        Carga la grabación (CSV o columnar).
+
+        Args:
+            filename: Ruta del archivo
+
+        Raises:
+            FileNotFoundError: Si el archivo no existe
+        """
+        self.filename = filename
+        self.signature = self._file_signature(filename)
+        if is_columnar_file(filename):
+            self.columns = load_columnar(filename, mmap=True)
+        else:
+            df = pd.read_csv(filename)
+            self.columns = {name: df[name].to_numpy() for name in df.columns}
+
+        timestamps = np.asarray(self.columns['Timestamp_ms'], dtype=np.float64)
+        self.n_samples = len(timestamps)
+        self.time_s = (timestamps - timestamps[0]) / 1000.0 if self.n_samples else timestamps
+        # Con tiempo no monotónico (reinicio del reloj del firmware) se filtra por máscara
+        self.monotonic = bool(np.all(np.diff(self.time_s) >= 0))
+        if not self.monotonic:
+            logger.warning(f"Tiempo no monotónico en {filename}: tramos por máscara completa")
+        logger.info(f"Sesión de análisis abierta: {filename} ({self.n_samples} filas)")
+
+    @staticmethod
+    def _file_signature(filename):
+        st = os.stat(filename)
+        return (st.st_size, st.st_mtime_ns)
+
+    def is_current(self):
+        """True si el archivo no cambió desde que se cargó."""
+        try:
+            return self._file_signature(self.filename) == self.signature
+        except OSError:
+            return False
+
+    @property
+    def duration_s(self):
+        return float(self.time_s[-1]) if self.n_samples else 0.0
+
+    def window_indices(self, t_inicio, t_fin):
+        """
+        Índices de las muestras con t_inicio ≤ t ≤ t_fin.
+
+        Returns:
+            slice (tiempo monotónico) o ndarray de índices
+        """
+        if self.monotonic:
+            i0 = int(np.searchsorted(self.time_s, t_inicio, side='left'))
+            i1 = int(np.searchsorted(self.time_s, t_fin, side='right'))
+            return slice(i0, i1)
+        return np.flatnonzero((self.time_s >= t_inicio) & (self.time_s <= t_fin))
+
+    def window_arrays(self, t_inicio, t_fin, columns=None):
+        """
+        Columnas del tramo como arrays (vistas si el tiempo es monotónico).
+
+        Args:
+            t_inicio, t_fin: Tramo en s
+            columns: Nombres de columnas (por defecto todas)
+
+        Returns:
+            dict {nombre: ndarray} con 'Tiempo_s' incluido
+        """
+        idx = self.window_indices(t_inicio, t_fin)
+        names = self.columns.keys() if columns is None else columns
+        arrays = {name: self.columns[name][idx] for name in names}
+        arrays['Tiempo_s'] = self.time_s[idx]
+        return arrays
+
+    def window_frame(self, t_inicio, t_fin):
+        """
+        DataFrame del tramo (copia de solo esas filas), con la columna
+        Tiempo_s igual a la que calculaba analyze_step_response.
+        """
+        idx = self.window_indices(t_inicio, t_fin)
+        frame = pd.DataFrame({name: np.array(col[idx]) for name, col in self.columns.items()})
+        frame['Tiempo_s'] = self.time_s[idx]
+        return frame
+
+
+class RecordingSessionCache:
+    """Sesiones abiertas por archivo, revalidadas contra cambios en disco."""
+
+    def __init__(self, max_sessions=MAX_OPEN_SESSIONS):
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+
+    def get(self, filename):
+        """Sesión del archivo (la carga si no está abierta o si cambió)."""
+        key = os.path.abspath(filename)
+        session = self._sessions.get(key)
+        if session is not None and session.is_current():
+            self._sessions.move_to_end(key)
+            return session
+        session = RecordingSession(filename)
+        self._sessions[key] = session
+        self._sessions.move_to_end(key)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return session
+
+    def close(self, filename=None):
+        """Libera la sesión de un archivo (o todas)."""
+        if filename is None:
+            self._sessions.clear()
+        else:
+            self._sessions.pop(os.path.abspath(filename), None)
@@ -0,0 +1,394 @@
+"""
+Detección e identificación en lote de escalones de PWM.
+
+Procesa una campaña de calibración completa en una pasada: detecta todos
+los escalones de la grabación y ajusta ganancia K, constante de tiempo τ y
+tiempo muerto θ de cada uno, sin seleccionar tramos a mano.
+
+Modelo de posición tras un escalón ΔU en t = 0 (velocidad de primer orden,
+igual que TransferFunctionAnalyzer):
+
+    p(t) = p0 + v0·t + K·ΔU·r(t; τ, θ)
+    r(t) = (t-θ) - τ·(1 - exp(-(t-θ)/τ))   para t > θ, 0 antes
+
+La grilla incluye un tramo previo al escalón (mitad final del escalón
+anterior) que fija v0; sin él, v0 y K·ΔU solo se distinguen durante el
+transitorio. Para τ y θ fijos el modelo es lineal en (p0, v0, K·ΔU).
+
+Cada escalón se ajusta sobre su propia ventana (su duración, hasta
+max_window_s). Los escalones con la misma ventana se remuestrean sobre una
+grilla común de tiempo relativo, de modo que la pseudo-inversa de cada
+candidato (τ, θ) es común y un único producto matricial ajusta todo el
+grupo contra todos los candidatos; un escalón corto no recorta la ventana
+de los demás. τ se refina con una parábola en log τ, cuya curvatura da
+también su error estándar (perfil de χ²). Un escalón cuya ventana no
+cubre ~3τ (o que sigue a un escalón más corto que eso) reduce su
+confianza en proporción.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Cambio mínimo de PWM entre muestras para considerar un escalón
+STEP_MIN_JUMP_PWM = 20
+# Cambios separados por menos de este tiempo forman un solo escalón (rampas)
+STEP_MERGE_S = 0.05
+# Duración mínima de un escalón para identificarlo
+STEP_MIN_HOLD_S = 0.2
+# Umbral de outlier en desviaciones MAD
+OUTLIER_MAD = 3.0
+# Dispersión mínima para el criterio MAD, relativa a la mediana
+OUTLIER_REL_FLOOR = 0.02
+# Ventana de ajuste (en múltiplos de τ) por debajo de la cual baja la confianza
+STEP_WINDOW_TAUS = 3.0
+# Resolución con que se agrupan las ventanas de ajuste [s]
+STEP_WINDOW_RESOLUTION_S = 0.001
+
+
+@dataclass
+class StepEvent:
+    """Escalón de PWM detectado en la grabación."""
+    index: int          # Última muestra antes del cambio
+    time_s: float       # Instante del escalón (origen del ajuste)
+    u_before: float
+    u_after: float
+    duration_s: float   # Hasta el siguiente escalón o el fin de la grabación
+
+    @property
+    def delta_u(self) -> float:
+        return self.u_after - self.u_before
+
+
+def detect_steps(time_s, pwm, min_jump=STEP_MIN_JUMP_PWM, merge_s=STEP_MERGE_S,
+                 min_hold_s=STEP_MIN_HOLD_S) -> List[StepEvent]:
+    """
+    Detecta todos los escalones de PWM.
+
+    Args:
+        time_s: Tiempo en s (N,)
+        pwm: PWM aplicado (N,)
+        min_jump: Cambio mínimo entre muestras consecutivas
+        merge_s: Cambios más próximos que esto se agrupan en un escalón
+        min_hold_s: Duración mínima del escalón
+
+    Returns:
+        Lista de StepEvent ordenada por tiempo
+    """
+    time_s = np.asarray(time_s, dtype=np.float64)
+    pwm = np.asarray(pwm, dtype=np.float64)
+    changes = np.flatnonzero(np.abs(np.diff(pwm)) >= min_jump)
+    if len(changes) == 0:
+        return []
+
+    first = np.r_[True, np.diff(time_s[changes]) > merge_s]
+    starts = changes[first]
+    last_change = changes[np.r_[np.flatnonzero(first)[1:] - 1, len(changes) - 1]]
+    u_before = pwm[starts]
+    u_after = pwm[last_change + 1]
+    t0 = time_s[starts]
+    duration = np.r_[t0[1:], time_s[-1]] - t0
+
+    keep = (duration >= min_hold_s) & (u_after != u_before)
+    return [StepEvent(int(i), float(t), float(ub), float(ua), float(d))
+            for i, t, ub, ua, d in zip(starts[keep], t0[keep], u_before[keep],
+                                       u_after[keep], duration[keep])]
+
+
+def _ramp(t, tau, theta):
+    """r(t; τ, θ) con broadcasting."""
+    tt = np.maximum(t - theta, 0.0)
+    return tt - tau * (1.0 - np.exp(-tt / tau))
+
+
+def _parabolic_refine(grid, sse_at, idx):
+    """
+    Mínimo sub-grilla por parábola sobre tres puntos de la grilla.
+
+    Args:
+        grid: Valores de la grilla (uniforme)
+        sse_at: Función índice(s) → SSE de cada escalón en ese punto
+        idx: Índice del mínimo por escalón
+
+    Returns:
+        tuple (valor refinado, curvatura d²SSE/dx², máscara de mínimo interior)
+    """
+    n = len(grid)
+    if n < 3:
+        return grid[idx], np.zeros(len(idx)), np.zeros(len(idx), dtype=bool)
+    h = grid[1] - grid[0]
+    interior = (idx > 0) & (idx < n - 1)
+    ic = np.clip(idx, 1, n - 2)
+    s_m, s_0, s_p = sse_at(ic - 1), sse_at(ic), sse_at(ic + 1)
+    denom = s_m - 2.0 * s_0 + s_p
+    curv = denom / h ** 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shift = np.where(interior & (denom > 0), 0.5 * h * (s_m - s_p) / denom, 0.0)
+    value = np.where(interior, grid[ic] + np.clip(shift, -h, h), grid[idx])
+    return value, curv, interior
+
+
+def _robust_outliers(values, std_errors):
+    """
+    Máscara de outliers por MAD (con menos de 3 valores no marca ninguno).
+
+    La dispersión de referencia combina la MAD del grupo con el error
+    estándar propio de cada escalón: un escalón pequeño (menos señal) no
+    se marca por diferir dentro de su propia incertidumbre.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < 3:
+        return np.zeros(len(values), dtype=bool)
+    med = np.median(values)
+    mad = 1.4826 * np.median(np.abs(values - med))
+    spread = np.sqrt(mad ** 2 + np.nan_to_num(np.asarray(std_errors, dtype=np.float64), nan=np.inf) ** 2)
+    return np.abs(values - med) > OUTLIER_MAD * np.maximum(spread, OUTLIER_REL_FLOOR * abs(med))
+
+
+def _dispersion(steps: List[Dict]) -> Dict:
+    """Estadísticas de K, τ y θ sobre un grupo de escalones (sin outliers)."""
+    used = [s for s in steps if not s['outlier']]
+    if not used:
+        return {'n_steps': 0}
+    w = np.array([max(s['confidence'], 1e-6) for s in used])
+    out = {'n_steps': len(used), 'n_outliers': len(steps) - len(used)}
+    for key in ('K', 'tau', 'dead_time'):
+        v = np.array([s[key] for s in used])
+        mean = float(np.average(v, weights=w))
+        std = float(np.sqrt(np.average((v - mean) ** 2, weights=w)))
+        out[key] = mean
+        out[f'{key}_std'] = std
+        out[f'{key}_median'] = float(np.median(v))
+        out[f'{key}_cv'] = std / abs(mean) if mean != 0 else float('inf')
+    out['confidence'] = float(np.mean(w))
+    return out
+
+
+class BatchStepIdentifier:
+    """Identificación simultánea de K, τ y θ para todos los escalones."""
+
+    def __init__(self, tau_range=(0.001, 1.0), n_tau=60, max_dead_time_s=0.1,
+                 n_dead_time=21, n_grid=512, max_window_s=1.0,
+                 min_jump=STEP_MIN_JUMP_PWM, merge_s=STEP_MERGE_S, min_hold_s=STEP_MIN_HOLD_S):
+        """
+        Args:
+            tau_range: Rango de búsqueda de τ en s (grilla logarítmica)
+            n_tau: Candidatos de τ
+            max_dead_time_s: Tiempo muerto máximo
+            n_dead_time: Candidatos de θ
+            n_grid: Muestras de la grilla común de tiempo relativo
+            max_window_s: Ventana máxima analizada tras cada escalón
+            min_jump, merge_s, min_hold_s: Parámetros de detect_steps
+        """
+        self.tau_range = tau_range
+        self.n_tau = n_tau
+        self.max_dead_time_s = max_dead_time_s
+        self.n_dead_time = n_dead_time
+        self.n_grid = n_grid
+        self.max_window_s = max_window_s
+        self.min_jump = min_jump
+        self.merge_s = merge_s
+        self.min_hold_s = min_hold_s
+
+    def identify(self, time_s, position, pwm) -> Dict:
+        """
+        Detecta e identifica todos los escalones de una grabación.
+
+        Args:
+            time_s: Tiempo en s (N,)
+            position: Posición (µm o ADC) (N,)
+            pwm: PWM aplicado (N,)
+
+        Returns:
+            dict con:
+                - success: bool
+                - message: str
+                - steps: lista de dicts por escalón (index, time_s, u_before,
+                  u_after, delta_u, K, tau, dead_time, v0, r_squared,
+                  K_rel_se, tau_rel_se, tau_at_bound, window_s, confidence,
+                  outlier)
+                - summary: dispersión global y por sentido
+                  ({'all', 'positive', 'negative'})
+                - window_s: ventana más larga usada
+                - min_window_s: ventana más corta usada
+        """
+        time_s = np.asarray(time_s, dtype=np.float64)
+        position = np.asarray(position, dtype=np.float64)
+        pwm = np.asarray(pwm, dtype=np.float64)
+
+        events = detect_steps(time_s, pwm, self.min_jump, self.merge_s, self.min_hold_s)
+        if not events:
+            return {'success': False, 'message': 'No se detectaron escalones de PWM',
+                    'steps': [], 'summary': {}, 'window_s': 0.0, 'min_window_s': 0.0}
+
+        # Ventana propia de cada escalón; el tramo previo no pasa del escalón anterior
+        t0 = np.array([e.time_s for e in events])
+        res = STEP_WINDOW_RESOLUTION_S
+        windows = np.floor(np.minimum(self.max_window_s, [e.duration_s for e in events]) / res) * res
+        gaps = np.diff(np.r_[time_s[0], t0])
+        pres = np.floor(np.maximum(0.0, np.minimum(0.5 * windows, 0.5 * gaps)) / res) * res
+
+        fits = [None] * len(events)
+        groups: Dict[tuple, List[int]] = {}
+        for s in range(len(events)):
+            groups.setdefault((windows[s], pres[s]), []).append(s)
+        for (window, pre), members in groups.items():
+            fit = self._fit_group(time_s, position, pwm, t0[members], window, pre)
+            for j, s in enumerate(members):
+                fits[s] = {key: value[j] for key, value in fit.items()}
+
+        steps = []
+        for s, e in enumerate(events):
+            f = fits[s]
+            delta_u = f['u_after'] - e.u_before
+            # Ventana (o escalón anterior) corta frente a τ: el régimen de
+            # velocidad constante casi no se ve y v0 no está asentada
+            covered = min(windows[s], gaps[s]) / (STEP_WINDOW_TAUS * f['tau'])
+            confidence = f['confidence'] * min(1.0, covered)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                K = f['gain'] / delta_u if delta_u != 0 else np.nan
+            steps.append({
+                'index': e.index,
+                'time_s': e.time_s,
+                'u_before': float(e.u_before),
+                'u_after': float(f['u_after']),
+                'delta_u': float(delta_u),
+                'K': float(K),
+                'tau': float(f['tau']),
+                'dead_time': float(f['theta']),
+                'v0': float(f['v0']),
+                'r_squared': float(f['r2']),
+                'K_rel_se': float(f['K_rel_se']),
+                'tau_rel_se': float(f['tau_rel_se']),
+                'tau_at_bound': bool(f['at_bound']),
+                'window_s': float(windows[s]),
+                'confidence': float(confidence),
+                'outlier': False,
+            })
+
+        valid = [s for s in steps if np.isfinite(s['K'])]
+        k_values = np.array([s['K'] for s in valid])
+        flags = (_robust_outliers(k_values, [s['K_rel_se'] * abs(s['K']) for s in valid])
+                 | _robust_outliers([np.log(s['tau']) for s in valid], [s['tau_rel_se'] for s in valid]))
+        for s, flag in zip(valid, flags):
+            s['outlier'] = bool(flag)
+        for s in steps:
+            if not np.isfinite(s['K']):
+                s['outlier'] = True
+
+        summary = {
+            'all': _dispersion(steps),
+            'positive': _dispersion([s for s in steps if s['delta_u'] > 0]),
+            'negative': _dispersion([s for s in steps if s['delta_u'] < 0]),
+        }
+        overall = summary['all']
+        w_min, w_max = float(windows.min()), float(windows.max())
+        window_txt = (f"ventana {w_max:.2f}s" if w_min == w_max
+                      else f"ventanas {w_min:.2f}-{w_max:.2f}s")
+        if overall.get('n_steps'):
+            message = (f"{len(steps)} escalones ({window_txt}): "
+                       f"K={overall['K']:.4f} (CV {overall['K_cv'] * 100:.1f}%), "
+                       f"τ={overall['tau']:.4f}s (CV {overall['tau_cv'] * 100:.1f}%), "
+                       f"θ={overall['dead_time'] * 1000:.1f}ms")
+        else:
+            message = f"{len(steps)} escalones detectados, ninguno identificable"
+        logger.info(message)
+        return {
+            'success': bool(overall.get('n_steps')),
+            'message': message,
+            'steps': steps,
+            'summary': summary,
+            'window_s': w_max,
+            'min_window_s': w_min,
+        }
+
+    def _fit_group(self, time_s, position, pwm, t0, window, pre) -> Dict[str, np.ndarray]:
+        """
+        Ajusta un grupo de escalones que comparten ventana y tramo previo.
+
+        Args:
+            time_s, position, pwm: Grabación completa
+            t0: Instantes de los escalones del grupo (S,)
+            window: Ventana analizada tras cada escalón [s]
+            pre: Tramo previo incluido en la grilla [s]
+
+        Returns:
+            dict de arrays (S,): u_after, gain (K·ΔU), tau, theta, v0, r2,
+            K_rel_se, tau_rel_se, at_bound, confidence
+        """
+        n_steps = len(t0)
+        t_grid = np.linspace(-pre, window, self.n_grid)
+        query = t0[:, None] + t_grid[None, :]
+        Y = np.interp(query, time_s, position)            # (S, M)
+        u_after = np.median(np.interp(query[:, t_grid >= 0], time_s, pwm), axis=1)
+
+        # Candidatos (τ, θ): τ más allá de la ventana no es identificable
+        tau_max = min(self.tau_range[1], window)
+        taus = np.geomspace(self.tau_range[0], tau_max, self.n_tau)
+        thetas = np.linspace(0.0, min(self.max_dead_time_s, 0.5 * window), self.n_dead_time)
+        T, TH = np.meshgrid(taus, thetas, indexing='ij')  # (n_tau, n_theta)
+        R = _ramp(t_grid[None, None, :], T[..., None], TH[..., None])
+        n_c = T.size
+        B = np.empty((n_c, self.n_grid, 3))
+        B[:, :, 0] = 1.0
+        B[:, :, 1] = t_grid
+        B[:, :, 2] = R.reshape(n_c, self.n_grid)
+
+        # Ajuste de todos los escalones del grupo contra todos los candidatos
+        BtY = (Y @ B.transpose(1, 0, 2).reshape(self.n_grid, n_c * 3)).reshape(n_steps, n_c, 3)
+        gram_inv = np.linalg.pinv(np.einsum('cmk,cml->ckl', B, B))
+        coef = np.einsum('sck,ckl->scl', BtY, gram_inv)
+        sse = np.einsum('ij,ij->i', Y, Y)[:, None] - np.einsum('sck,sck->sc', coef, BtY)
+        sse = np.maximum(sse, 0.0).reshape(n_steps, self.n_tau, self.n_dead_time)
+
+        best = sse.reshape(n_steps, -1).argmin(axis=1)
+        i_tau, i_th = np.unravel_index(best, (self.n_tau, self.n_dead_time))
+        rows = np.arange(n_steps)
+        dof = max(1, self.n_grid - 5)
+
+        # Refinamiento parabólico en log τ (θ fijo) y en θ (τ de la grilla);
+        # la curvatura en log τ da el error estándar de perfil de τ
+        log_tau, curv, interior = _parabolic_refine(
+            np.log(taus), lambda k: sse[rows, k, i_th], i_tau)
+        theta, _, _ = _parabolic_refine(thetas, lambda k: sse[rows, i_tau, k], i_th)
+        tau = np.exp(log_tau)
+
+        # Ajuste final por escalón con (τ, θ) refinados
+        Bs = np.empty((n_steps, self.n_grid, 3))
+        Bs[:, :, 0] = 1.0
+        Bs[:, :, 1] = t_grid
+        Bs[:, :, 2] = _ramp(t_grid[None, :], tau[:, None], theta[:, None])
+        P = np.linalg.pinv(Bs)                              # (S, 3, M)
+        beta = np.einsum('skm,sm->sk', P, Y)
+        resid = Y - np.einsum('smk,sk->sm', Bs, beta)
+        sse_f = np.einsum('sm,sm->s', resid, resid)
+        sigma2 = sse_f / dof
+        cov_gg = np.einsum('sm,sm->s', P[:, 2, :], P[:, 2, :])
+        sst = np.einsum('sm,sm->s', Y - Y.mean(axis=1, keepdims=True), Y - Y.mean(axis=1, keepdims=True))
+
+        gain = beta[:, 2]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            K_rel_se = np.sqrt(sigma2 * cov_gg) / np.abs(gain)
+            tau_rel_se = np.where(curv > 0, np.sqrt(2.0 * sigma2 / curv), np.inf)
+            r2 = np.where(sst > 0, 1.0 - sse_f / sst, 0.0)
+        at_bound = ~interior
+        confidence = np.clip(r2, 0.0, 1.0) * np.exp(-np.sqrt(np.nan_to_num(K_rel_se, nan=np.inf) ** 2
+                                                              + np.minimum(tau_rel_se, 1e6) ** 2))
+        confidence = np.where(at_bound, 0.5 * confidence, confidence)
+
+        return {
+            'u_after': u_after,
+            'gain': gain,
+            'tau': tau,
+            'theta': theta,
+            'v0': beta[:, 1],
+            'r2': r2,
+            'K_rel_se': K_rel_se,
+            'tau_rel_se': tau_rel_se,
+            'at_bound': at_bound,
+            'confidence': confidence,
+        }
@@ -17,6 +17,7 @@ import numpy as np
 from matplotlib.figure import Figure
 
 from config.constants import save_calibration, reload_calibration, CALIBRATION_X, CALIBRATION_Y
+from core.analysis.recording_session import RecordingSessionCache
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +31,22 @@ class TransferFunctionAnalyzer:
         self.global_calibration = None
         self.interpolacion_pendiente = None
         self.interpolacion_intercepto = None
+        # Grabaciones cargadas una vez y reutilizadas entre análisis
+        self._sessions = RecordingSessionCache()
         logger.debug("TransferFunctionAnalyzer inicializado")
+
+    def open_session(self, filename):
+        """
+        Sesión de análisis de una grabación (cargada una sola vez).
+
+        Los análisis sucesivos del mismo archivo (varios escalones, otros
+        motores/sensores) reutilizan la sesión hasta que el archivo cambie.
+        """
+        return self._sessions.get(filename)
+
+    def close_sessions(self, filename=None):
+        """Libera la memoria de las grabaciones abiertas."""
+        self._sessions.close(filename)
     
     def analyze_step_response(self, filename, motor, sensor, t_inicio, t_fin,
                               distancia_min_mm=None, distancia_max_mm=None):
@@ -70,14 +86,12 @@ class TransferFunctionAnalyzer:
             return {'success': False, 'message': error_msg}
         
         try:
-            # 1. Cargar datos
-            logger.debug(f"Cargando archivo CSV: {filename}")
-            df = pd.read_csv(filename)
-            logger.info(f"Archivo cargado: {len(df)} filas totales")
-            df['Tiempo_s'] = (df['Timestamp_ms'] - df['Timestamp_ms'].iloc[0]) / 1000.0
+            # 1. Cargar datos (una vez por archivo, ver RecordingSession)
+            session = self.open_session(filename)
+            logger.debug(f"Grabación: {filename} ({session.n_samples} filas totales)")
             
-            # 2. Filtrar por rango de tiempo
-            df_tramo = df[(df['Tiempo_s'] >= t_inicio) & (df['Tiempo_s'] <= t_fin)].copy()
+            # 2. Filtrar por rango de tiempo (búsqueda binaria sobre el índice de tiempo)
+            df_tramo = session.window_frame(t_inicio, t_fin)
             logger.info(f"Tramo filtrado: {len(df_tramo)} muestras en rango [{t_inicio}, {t_fin}]")
             
             if len(df_tramo) < 10:
@@ -1,6 +1,9 @@
 """Módulo de comunicación serial."""
 
 from .serial_handler import SerialHandler
-from .protocol import MotorProtocol
+from .protocol import MotorProtocol, SAMPLE_DTYPE
+from .telemetry_timing import TelemetryTimingTracker
+from .sample_store import LatestSampleStore, SampleSnapshot
 
-__all__ = ['SerialHandler', 'MotorProtocol']
+__all__ = ['SerialHandler', 'MotorProtocol', 'SAMPLE_DTYPE', 'TelemetryTimingTracker',
+           'LatestSampleStore', 'SampleSnapshot']
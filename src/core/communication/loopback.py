@@ -0,0 +1,342 @@
+"""
+Loopback serial sin hardware mediante pseudo-terminal (POSIX).
+
+Permite ejercitar SerialHandler y MotorProtocol sin Arduino conectado:
+
+- VirtualArduino: emula el firmware (comandos M, A, 'A,a,b', H, B, S y la
+  negociación de telemetría binaria 'F,0|1') y publica telemetría ASCII de
+  6 campos o tramas binarias a una frecuencia configurable.
+- PtyLoopback: crea el par pty, entrega el nombre del puerto esclavo
+  (utilizable directamente por pyserial/SerialHandler) y arranca el
+  dispositivo virtual sobre el extremo maestro.
+
+Uso:
+    with PtyLoopback(rate_hz=1000) as loop:
+        handler = SerialHandler(loop.port, 1000000, binary_mode=True)
+
+Autoverificación desde línea de comandos (requiere PyQt5, pyserial y numpy):
+    python -m core.communication.loopback
+"""
+
+import os
+import sys
+import math
+import time
+import select
+import logging
+import threading
+from typing import Callable, Optional, Tuple
+
+from .protocol import MotorProtocol
+
+logger = logging.getLogger(__name__)
+
+# Modelo de sensores: (pwm_a, pwm_b, dt_s) -> (sens_1, sens_2)
+SensorModel = Callable[[int, int, float], Tuple[int, int]]
+
+
+class VirtualArduino(threading.Thread):
+    """
+    Firmware L206 emulado sobre un descriptor de archivo.
+
+    Atributos públicos de diagnóstico:
+        commands (list): Comandos recibidos (en orden)
+        samples_sent (int): Muestras publicadas
+        samples_dropped (int): Muestras descartadas por buffer pty lleno
+    """
+
+    def __init__(self, fd: int, rate_hz: float = 1000.0, supports_binary: bool = True,
+                 sensor_model: Optional[SensorModel] = None, device_timing: bool = False):
+        """
+        Args:
+            fd: Descriptor del extremo maestro del pty
+            rate_hz: Frecuencia de telemetría
+            supports_binary: Si False, ignora 'F,1' (firmware antiguo)
+            sensor_model: Modelo de sensores; por defecto una senoide fija
+            device_timing: Anexar 't_us,seq' a las líneas ASCII
+        """
+        super().__init__(daemon=True)
+        self.fd = fd
+        self.period = 1.0 / rate_hz
+        self.supports_binary = supports_binary
+        self.sensor_model = sensor_model or self._default_sensor_model
+        self.device_timing = device_timing
+        self.seq = 0
+
+        self.pwm_a = 0
+        self.pwm_b = 0
+        self.state = 'MANUAL'
+        self.hold_target = None
+        self.settling_threshold = 2
+        self.binary = False
+        self.sens_1 = 512
+        self.sens_2 = 512
+
+        self.commands = []
+        self.samples_sent = 0
+        self.samples_dropped = 0
+        self._running = threading.Event()
+        self._rx = bytearray()
+        self._t0 = time.monotonic()
+
+    def _default_sensor_model(self, pwm_a: int, pwm_b: int, dt: float) -> Tuple[int, int]:
+        """Senoide independiente del PWM (suficiente para validar transporte)."""
+        t = time.monotonic() - self._t0
+        return (int(512 + 300 * math.sin(2 * math.pi * t)),
+                int(512 + 300 * math.cos(2 * math.pi * t)))
+
+    def handle_command(self, command: str):
+        """Aplica un comando del protocolo MotorProtocol."""
+        self.commands.append(command)
+        parts = command.split(',')
+        head = parts[0]
+        try:
+            if command == 'M':
+                self.state = 'MANUAL'
+                self.pwm_a = self.pwm_b = 0
+            elif head == 'A' and len(parts) == 3:
+                self.state = 'AUTO'
+                self.pwm_a = max(-255, min(255, int(parts[1])))
+                self.pwm_b = max(-255, min(255, int(parts[2])))
+            elif command == 'A':
+                self.state = 'AUTO'
+            elif head == 'H' and len(parts) == 3:
+                self.state = 'HOLD'
+                self.hold_target = (int(parts[1]), int(parts[2]))
+            elif command == 'B':
+                self.state = 'BRAKE'
+                self.pwm_a = self.pwm_b = 0
+            elif head == 'S' and len(parts) == 2:
+                self.settling_threshold = int(parts[1])
+            elif head == 'F' and len(parts) == 2:
+                if not self.supports_binary:
+                    self._write(b"ERROR: Comando desconocido\n")
+                    return
+                enable = parts[1] == '1'
+                ack = MotorProtocol.BINARY_ACK_ON if enable else MotorProtocol.BINARY_ACK_OFF
+                self._write((ack + '\n').encode('utf-8'))
+                self.binary = enable
+            else:
+                self._write(f"ERROR: Comando desconocido '{command}'\n".encode('utf-8'))
+        except ValueError:
+            self._write(f"ERROR: Argumentos inválidos '{command}'\n".encode('utf-8'))
+
+    def _settled(self) -> bool:
+        if self.state != 'HOLD' or self.hold_target is None:
+            return False
+        return (abs(self.sens_1 - self.hold_target[0]) <= self.settling_threshold and
+                abs(self.sens_2 - self.hold_target[1]) <= self.settling_threshold)
+
+    def _write(self, data: bytes) -> bool:
+        try:
+            os.write(self.fd, data)
+            return True
+        except (BlockingIOError, OSError):
+            return False
+
+    def _publish_sample(self, dt: float):
+        self.sens_1, self.sens_2 = self.sensor_model(self.pwm_a, self.pwm_b, dt)
+        settled = self._settled()
+        if self.binary:
+            data = MotorProtocol.pack_binary_frame(self.pwm_a, self.pwm_b, self.sens_1,
+                                                   self.sens_2, self.state, settled)
+        else:
+            line = (f"{self.pwm_a},{self.pwm_b},{self.sens_1},{self.sens_2},"
+                    f"{self.state},{int(settled)}")
+            if self.device_timing:
+                t_us = int((time.monotonic() - self._t0) * 1e6) & 0xFFFFFFFF
+                line += f",{t_us},{self.seq}"
+                self.seq = (self.seq + 1) & 0xFFFF
+            data = (line + '\n').encode('utf-8')
+        if self._write(data):
+            self.samples_sent += 1
+        else:
+            self.samples_dropped += 1
+
+    def _read_commands(self):
+        try:
+            chunk = os.read(self.fd, 1024)
+        except (BlockingIOError, OSError):
+            return
+        self._rx += chunk
+        while b'\n' in self._rx:
+            line, _, rest = self._rx.partition(b'\n')
+            self._rx = bytearray(rest)
+            command = line.decode('utf-8', errors='ignore').strip()
+            if command:
+                self.handle_command(command)
+
+    def run(self):
+        """Bucle: atiende comandos y publica telemetría a rate_hz."""
+        self._running.set()
+        next_t = time.monotonic()
+        last_t = next_t
+        while self._running.is_set():
+            timeout = max(0.0, next_t - time.monotonic())
+            try:
+                readable, _, _ = select.select([self.fd], [], [], timeout)
+            except (OSError, ValueError):
+                break
+            if readable:
+                self._read_commands()
+            now = time.monotonic()
+            if now >= next_t:
+                self._publish_sample(now - last_t)
+                last_t = now
+                next_t += self.period
+                if now - next_t > 10 * self.period:
+                    # Muy atrasado: no intentar recuperar la ráfaga perdida
+                    next_t = now + self.period
+
+    def stop(self):
+        """Detiene el bucle del dispositivo."""
+        self._running.clear()
+        if self.is_alive():
+            self.join(timeout=1.0)
+
+
+class PtyLoopback:
+    """
+    Par pseudo-terminal con un VirtualArduino en el extremo maestro.
+
+    Solo disponible en POSIX (Linux/macOS).
+    """
+
+    def __init__(self, rate_hz: float = 1000.0, supports_binary: bool = True,
+                 sensor_model: Optional[SensorModel] = None, device_timing: bool = False):
+        self.rate_hz = rate_hz
+        self.supports_binary = supports_binary
+        self.sensor_model = sensor_model
+        self.device_timing = device_timing
+        self.port = None
+        self.device = None
+        self._master = None
+        self._slave = None
+
+    def open(self) -> str:
+        """
+        Crea el pty y arranca el dispositivo virtual.
+
+        Returns:
+            str: Ruta del puerto esclavo (ej: '/dev/pts/3')
+        """
+        if os.name != 'posix':
+            raise RuntimeError("PtyLoopback requiere un sistema POSIX (pty)")
+        import tty
+
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        os.set_blocking(self._master, False)
+        self.port = os.ttyname(self._slave)
+        self.device = VirtualArduino(self._master, self.rate_hz,
+                                     self.supports_binary, self.sensor_model,
+                                     self.device_timing)
+        self.device.start()
+        logger.info(f"PtyLoopback activo en {self.port} @ {self.rate_hz} Hz")
+        return self.port
+
+    def close(self):
+        """Detiene el dispositivo y cierra el pty."""
+        if self.device:
+            self.device.stop()
+            self.device = None
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._master = self._slave = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def _scenario_counters():
+    """
+    Contadores de un escenario y sus slots (ligados a ese escenario, no al
+    último creado en el bucle).
+
+    Returns:
+        tuple: (counts, on_line, on_sample, on_batch)
+    """
+    counts = {'lines': 0, 'samples': 0, 'batches': 0}
+
+    def on_line(line):
+        counts['lines'] += 1
+
+    def on_sample(*sample):
+        counts['samples'] += 1
+
+    def on_batch(samples, state, settled):
+        counts['batches'] += 1
+        counts['samples'] += len(samples)
+
+    return counts, on_line, on_sample, on_batch
+
+
+def run_self_check(duration_s: float = 1.0, rate_hz: float = 1000.0) -> int:
+    """
+    Verifica SerialHandler contra el loopback: modo binario, fallback ASCII,
+    emisión por lotes y timestamps/secuencia del dispositivo.
+
+    Returns:
+        int: 0 si todos los escenarios reciben muestras por la vía esperada
+    """
+    from PyQt5.QtCore import QCoreApplication, QTimer
+    from .serial_handler import SerialHandler
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    failures = 0
+
+    # (firmware con binario, intervalo de lote en ms, timestamps del dispositivo)
+    scenarios = ((True, 0, False), (False, 0, False), (True, 15, False),
+                 (False, 15, False), (False, 0, True), (False, 15, True))
+    for supports_binary, batch_ms, device_timing in scenarios:
+        counts, on_line, on_sample, on_batch = _scenario_counters()
+        with PtyLoopback(rate_hz=rate_hz, supports_binary=supports_binary,
+                         device_timing=device_timing) as loop:
+            handler = SerialHandler(loop.port, 1000000, binary_mode=True,
+                                    batch_interval_ms=batch_ms)
+            handler.data_received.connect(on_line)
+            handler.sample_received.connect(on_sample)
+            handler.batch_received.connect(on_batch)
+            handler.start()
+            QTimer.singleShot(int(duration_s * 1000), app.quit)
+            app.exec_()
+            handler.stop()
+            # Entregar las señales encoladas antes de stop() a este escenario
+            # y desconectar para que no lleguen al siguiente
+            QCoreApplication.sendPostedEvents()
+            handler.data_received.disconnect(on_line)
+            handler.sample_received.disconnect(on_sample)
+            handler.batch_received.disconnect(on_batch)
+
+            ok = (handler.binary_active == supports_binary and
+                  handler.sample_store.snapshot() is not None)
+            if batch_ms:
+                ok = ok and counts['batches'] > 0 and counts['samples'] > counts['batches']
+            else:
+                ok = ok and counts['samples'] > 0
+            if device_timing:
+                timing = handler.timing.get_stats()
+                ok = ok and timing['samples'] > 0 and timing['seq_errors'] == 0
+                print(f"[loopback] timing dispositivo: {timing}")
+            print(f"[loopback] firmware_binario={supports_binary} batch={batch_ms}ms "
+                  f"activo={handler.binary_active} líneas={counts['lines']} "
+                  f"muestras={counts['samples']} lotes={counts['batches']} "
+                  f"resyncs={handler.stats['resyncs']} "
+                  f"enviadas={loop.device.samples_sent} -> {'OK' if ok else 'FALLO'}")
+            failures += 0 if ok else 1
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(run_self_check())
@@ -1,12 +1,42 @@
 """Protocolo de comunicación con Arduino."""
 import logging
+import struct
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Muestra de telemetría para emisión por lotes (SerialHandler en modo batch)
+# t_host: time.time() al decodificar la muestra en el thread serial
+# t_dev: timestamp del firmware desenvuelto en µs (NaN si no lo envía)
+# seq: contador de secuencia del firmware (-1 si no lo envía)
+SAMPLE_DTYPE = np.dtype([
+    ('t_host', 'f8'),
+    ('pot_a', 'i2'),
+    ('pot_b', 'i2'),
+    ('sens_1', 'u2'),
+    ('sens_2', 'u2'),
+    ('settled', '?'),
+    ('t_dev', 'f8'),
+    ('seq', 'i4'),
+])
+
 
 class MotorProtocol:
     """Protocolo de comandos para control de motores L206."""
     
+    # --- TELEMETRÍA BINARIA (negociada con 'F,1' / 'F,0') ---
+    # Trama fija de 12 bytes, little-endian:
+    #   [0xA5 0x5A][status:u8][pot_a:i16][pot_b:i16][sens_1:u16][sens_2:u16][checksum:u8]
+    # status: bits 0-2 = índice en BINARY_STATES, bit 7 = settled
+    # checksum: suma de los bytes status..sens_2 módulo 256
+    BINARY_SYNC = b'\xA5\x5A'
+    BINARY_FRAME = struct.Struct('<2sBhhHHB')
+    BINARY_FRAME_SIZE = BINARY_FRAME.size
+    BINARY_STATES = ('MANUAL', 'AUTO', 'HOLD', 'BRAKE', 'SETTLING')
+    BINARY_ACK_ON = "INFO: BINARY_ON"
+    BINARY_ACK_OFF = "INFO: BINARY_OFF"
+    
     @staticmethod
     def format_manual_mode():
         """
@@ -63,6 +93,41 @@ class MotorProtocol:
             return None
         return None
     
+    @staticmethod
+    def parse_telemetry_line(line):
+        """
+        Parsea una línea de telemetría en cualquiera de los dos formatos.
+        
+        Formato con tiempo: "pot_a,pot_b,sens_1,sens_2,estado,settled,t_us,seq"
+        Formato nuevo: "pot_a,pot_b,sens_1,sens_2,estado,settled"
+        Formato viejo: "pot_a,pot_b,sens_1,sens_2" (estado LEGACY, rangos validados)
+        
+        Args:
+            line (str): Línea recibida del serial
+            
+        Returns:
+            tuple: (pot_a, pot_b, sens_1, sens_2, state, settled, t_dev_us, seq)
+            con t_dev_us/seq en None si el firmware no los envía, o None si
+            la línea no es telemetría válida
+        """
+        parts = line.split(',')
+        try:
+            if len(parts) == 8:
+                return (int(parts[0]), int(parts[1]), int(parts[2]), int(parts[3]),
+                        parts[4].strip(), parts[5].strip() == '1',
+                        int(parts[6]), int(parts[7]))
+            if len(parts) == 6:
+                return (int(parts[0]), int(parts[1]), int(parts[2]), int(parts[3]),
+                        parts[4].strip(), parts[5].strip() == '1', None, None)
+            if len(parts) == 4:
+                pot_a, pot_b, sens_1, sens_2 = map(int, parts)
+                if (-255 <= pot_a <= 255 and -255 <= pot_b <= 255 and
+                        0 <= sens_1 <= 1023 and 0 <= sens_2 <= 1023):
+                    return (pot_a, pot_b, sens_1, sens_2, 'LEGACY', False, None, None)
+        except ValueError:
+            logger.debug(f"Error parseando telemetría: {line}")
+        return None
+    
     @staticmethod
     def is_info_message(line):
         """
@@ -120,7 +185,10 @@ class MotorProtocol:
         """
         Parsea línea de datos del Arduino con información de estado.
         
-        Formato esperado: "pot_a,pot_b,sens_1,sens_2,estado,settled"
+        Formato esperado: "pot_a,pot_b,sens_1,sens_2,estado,settled[,t_us,seq]"
+        
+        Los dos campos opcionales son el timestamp micros() del firmware y
+        su contador de secuencia (ver TelemetryTimingTracker).
         
         Args:
             line (str): Línea recibida del serial
@@ -131,20 +199,128 @@ class MotorProtocol:
                 - sens_1, sens_2: Valores de sensores
                 - state: Estado del control (MANUAL, AUTO, HOLD, etc.)
                 - settled: bool indicando si posición está asentada
+                - t_dev_us: timestamp del dispositivo en µs (None si no viene)
+                - seq: número de secuencia (None si no viene)
             None: Si hay error en parsing
         """
         try:
             parts = line.split(',')
             if len(parts) >= 6:
+                has_timing = len(parts) >= 8
                 return {
                     'pot_a': int(parts[0]),
                     'pot_b': int(parts[1]),
                     'sens_1': int(parts[2]),
                     'sens_2': int(parts[3]),
                     'state': parts[4].strip(),
-                    'settled': parts[5].strip() == '1'
+                    'settled': parts[5].strip() == '1',
+                    't_dev_us': int(parts[6]) if has_timing else None,
+                    'seq': int(parts[7]) if has_timing else None
                 }
         except (ValueError, IndexError) as e:
             logger.debug(f"Error parseando datos con estado: {line} - {e}")
             return None
         return None
+    
+    # --- TELEMETRÍA BINARIA ---
+    
+    @staticmethod
+    def format_binary_mode(enable):
+        """
+        Formatea comando de negociación de telemetría binaria.
+        
+        El firmware que lo soporta responde con BINARY_ACK_ON/BINARY_ACK_OFF
+        como línea ASCII y cambia de formato inmediatamente después.
+        
+        Args:
+            enable (bool): True para tramas binarias, False para ASCII
+            
+        Returns:
+            str: Comando formateado 'F,<0|1>'
+        """
+        return f'F,{1 if enable else 0}'
+    
+    @staticmethod
+    def binary_checksum(payload):
+        """
+        Calcula el checksum de una trama binaria.
+        
+        Args:
+            payload (bytes): Bytes desde status hasta sens_2 (inclusive)
+            
+        Returns:
+            int: Suma de bytes módulo 256
+        """
+        return sum(payload) & 0xFF
+    
+    @staticmethod
+    def pack_binary_frame(pot_a, pot_b, sens_1, sens_2, state='AUTO', settled=False):
+        """
+        Empaqueta una muestra en una trama binaria (lado dispositivo).
+        
+        Usado por el firmware de referencia y por los simuladores/loopback.
+        
+        Args:
+            pot_a, pot_b (int): Potencia de motores (-255 a 255)
+            sens_1, sens_2 (int): Valores ADC de sensores
+            state (str): Estado del control (ver BINARY_STATES)
+            settled (bool): Posición asentada
+            
+        Returns:
+            bytes: Trama de BINARY_FRAME_SIZE bytes
+        """
+        state = state.upper()
+        state_idx = (MotorProtocol.BINARY_STATES.index(state)
+                     if state in MotorProtocol.BINARY_STATES else 7)
+        status = state_idx | (0x80 if settled else 0)
+        body = struct.pack('<BhhHH', status, pot_a, pot_b, sens_1, sens_2)
+        return MotorProtocol.BINARY_SYNC + body + bytes([MotorProtocol.binary_checksum(body)])
+    
+    @staticmethod
+    def decode_binary_frames(buffer):
+        """
+        Decodifica todas las tramas binarias completas de un buffer.
+        
+        Busca el sync, valida el checksum y resincroniza avanzando un byte
+        ante cualquier trama corrupta. No modifica el buffer.
+        
+        Args:
+            buffer (bytes | bytearray): Bytes recibidos del serial
+            
+        Returns:
+            tuple: (samples, consumed, resyncs)
+                - samples: lista de tuplas (pot_a, pot_b, sens_1, sens_2, state, settled)
+                - consumed: bytes procesados (descartar del buffer)
+                - resyncs: bytes/tramas descartados por sync o checksum inválido
+        """
+        frame = MotorProtocol.BINARY_FRAME
+        size = MotorProtocol.BINARY_FRAME_SIZE
+        sync = MotorProtocol.BINARY_SYNC
+        states = MotorProtocol.BINARY_STATES
+        checksum = MotorProtocol.binary_checksum
+        
+        samples = []
+        resyncs = 0
+        pos = 0
+        end = len(buffer)
+        while end - pos >= size:
+            if buffer[pos:pos + 2] != sync:
+                nxt = buffer.find(sync, pos + 1)
+                resyncs += 1
+                if nxt < 0:
+                    # Conservar el último byte por si es la mitad de un sync
+                    pos = end - 1
+                    break
+                pos = nxt
+                continue
+            _, status, pot_a, pot_b, sens_1, sens_2, chk = frame.unpack_from(buffer, pos)
+            if checksum(buffer[pos + 2:pos + size - 1]) != chk:
+                resyncs += 1
+                pos += 1
+                continue
+            state_idx = status & 0x07
+            samples.append((pot_a, pot_b, sens_1, sens_2,
+                            states[state_idx] if state_idx < len(states) else 'UNKNOWN',
+                            bool(status & 0x80)))
+            pos += size
+        return samples, max(pos, 0), resyncs
@@ -0,0 +1,88 @@
+"""
+Última muestra de telemetría compartida entre threads.
+
+SerialHandler publica cada muestra decodificada en un LatestSampleStore y
+los lazos de control (TestService, H∞) la leen directamente, sin pasar por
+los QLabel de la GUI. La publicación reemplaza una única referencia a una
+tupla inmutable (SampleSnapshot): bajo el GIL la asignación es atómica, por
+lo que los lectores siempre ven una muestra completa y coherente sin locks.
+
+Cada snapshot lleva el instante de recepción en el host (time.monotonic) y,
+si el firmware lo envía, el timestamp del dispositivo; con ello el lector
+puede descartar datos viejos (puerto desconectado, thread serial detenido).
+"""
+
+import time
+import logging
+from typing import NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SampleSnapshot(NamedTuple):
+    """Muestra inmutable de telemetría."""
+    power_a: int
+    power_b: int
+    sensor_1: int
+    sensor_2: int
+    state: str
+    settled: bool
+    t_host: float                       # time.monotonic() al recibirla
+    device_time_us: Optional[float] = None
+    seq: int = 0                        # Contador de publicaciones del store
+
+
+class LatestSampleStore:
+    """
+    Contenedor de la última muestra recibida (un escritor, N lectores).
+
+    Las claves de get() coinciden con las de ControlTab.value_labels
+    ('power_a', 'power_b', 'sensor_1', 'sensor_2').
+    """
+
+    def __init__(self):
+        self._snapshot: Optional[SampleSnapshot] = None
+        self._seq = 0
+        self.stale_reads = 0
+
+    def publish(self, pot_a, pot_b, sens_1, sens_2, state, settled, device_time_us=None):
+        """Publica una nueva muestra (llamar solo desde el thread serial)."""
+        self._seq += 1
+        self._snapshot = SampleSnapshot(pot_a, pot_b, sens_1, sens_2, state, bool(settled),
+                                        time.monotonic(), device_time_us, self._seq)
+
+    def snapshot(self) -> Optional[SampleSnapshot]:
+        """Retorna la última muestra completa (None si aún no hay datos)."""
+        return self._snapshot
+
+    def age(self) -> float:
+        """Segundos desde la última muestra (inf si aún no hay datos)."""
+        snap = self._snapshot
+        if snap is None:
+            return float('inf')
+        return time.monotonic() - snap.t_host
+
+    def get(self, key: str, max_age_s: Optional[float] = None):
+        """
+        Lee un campo de la última muestra.
+
+        Args:
+            key: Campo de SampleSnapshot (ej: 'sensor_1')
+            max_age_s: Antigüedad máxima aceptada; si la muestra es más vieja
+                se retorna None (None = sin límite)
+
+        Returns:
+            Valor del campo, o None si no hay datos, la clave no existe o la
+            muestra está vencida
+        """
+        snap = self._snapshot
+        if snap is None or key not in SampleSnapshot._fields:
+            return None
+        if max_age_s is not None and time.monotonic() - snap.t_host > max_age_s:
+            self.stale_reads += 1
+            return None
+        return getattr(snap, key)
+
+    def clear(self):
+        """Descarta la muestra actual (ej: al cambiar de puerto)."""
+        self._snapshot = None
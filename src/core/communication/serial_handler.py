@@ -3,10 +3,24 @@ import serial
 import time
 import logging
 import traceback
+import numpy as np
 from PyQt5.QtCore import QThread, pyqtSignal
 
+from .protocol import MotorProtocol, SAMPLE_DTYPE
+from .telemetry_timing import TelemetryTimingTracker
+from .sample_store import LatestSampleStore
+
 logger = logging.getLogger(__name__)
 
+# Tiempo máximo esperando el ACK del firmware antes de volver a ASCII
+BINARY_NEGOTIATION_TIMEOUT_S = 0.5
+# Timeout de lectura bloqueante: cota de latencia para lotes/negociación
+READ_TIMEOUT_S = 0.005
+# Tamaño del bytearray reutilizable de lectura
+READ_CHUNK_BYTES = 4096
+# Longitud máxima de una línea ASCII antes de considerarla corrupta
+MAX_LINE_BYTES = 256
+
 
 class SerialHandler(QThread):
     """
@@ -15,94 +29,322 @@ class SerialHandler(QThread):
     Reconstruye líneas completas antes de emitirlas para evitar
     datos corruptos a alta velocidad (1 Mbps).
     
+    La lectura bloquea en el driver hasta que hay bytes (con timeout
+    READ_TIMEOUT_S) y se hace sobre un bytearray reutilizable, sin
+    sondeo activo. Desbordes de línea, resincronizaciones binarias y errores
+    de lectura se contabilizan en `stats` (ver get_stats()).
+    
+    Opcionalmente negocia telemetría binaria (tramas fijas con checksum,
+    ver MotorProtocol.BINARY_FRAME). Si el firmware no responde con el
+    ACK dentro de BINARY_NEGOTIATION_TIMEOUT_S se continúa en ASCII.
+    
+    En modo batch (batch_interval_ms > 0) el propio thread parsea la
+    telemetría y emite un único batch_received por ventana de tiempo, en
+    lugar de una señal por muestra. Las líneas que no son telemetría
+    (INFO/ERROR/cabeceras) siguen saliendo por data_received.
+    
+    Toda muestra decodificada se publica además en `sample_store`
+    (LatestSampleStore) para que los lazos de control la lean sin
+    depender de la GUI. El timestamp del dispositivo se desenvuelve una
+    sola vez, aquí (self.timing), y ese mismo valor va al store y a la señal.
+    
     Signals:
-        data_received (str): Emite cada línea COMPLETA recibida del Arduino
+        data_received (str): Líneas COMPLETAS del Arduino que no son telemetría
+        sample_received (int, int, int, int, str, bool, object): Muestra
+            decodificada, ASCII o binaria (pot_a, pot_b, sens_1, sens_2,
+            state, settled, device_time_us desenvuelto o None)
+        batch_received (object, str, bool): Lote de muestras (ndarray con
+            SAMPLE_DTYPE), estado y settled de la última muestra
     """
     data_received = pyqtSignal(str)
+    sample_received = pyqtSignal(int, int, int, int, str, bool, object)
+    batch_received = pyqtSignal(object, str, bool)
 
-    def __init__(self, port, baudrate):
+    def __init__(self, port, baudrate, binary_mode=False, batch_interval_ms=0,
+                 sample_store=None):
         """
         Inicializa el handler de comunicación serial.
         
         Args:
             port (str): Puerto serial (ej: 'COM3', '/dev/ttyUSB0')
             baudrate (int): Velocidad de comunicación (ej: 115200)
+            binary_mode (bool): Negociar telemetría binaria al conectar
+            batch_interval_ms (float): Ventana de emisión por lotes (0 = una
+                señal por muestra)
+            sample_store (LatestSampleStore): Store compartido de la última
+                muestra (se crea uno propio si es None)
         """
         super().__init__()
         self.port = port
         self.baudrate = baudrate
         self.running = True
         self.ser = None
-        # Buffer circular para reconstruir líneas completas
-        self._buffer = ""
-        logger.info(f"SerialHandler inicializado: Puerto={port}, Baudrate={baudrate}")
+        # Buffer circular para reconstruir líneas completas / tramas binarias
+        self._buffer = bytearray()
+        # Estado de la telemetría binaria
+        self.binary_requested = binary_mode
+        self.binary_active = False
+        self._binary_deadline = None
+        # Lectura bloqueante sobre buffer reutilizable
+        self._rx_chunk = bytearray(READ_CHUNK_BYTES)
+        self._rx_view = memoryview(self._rx_chunk)
+        self._discarding_line = False
+        # Timestamps/secuencia del firmware (si los envía)
+        self.timing = TelemetryTimingTracker()
+        # Última muestra para los lazos de control (persiste entre reconexiones)
+        self.sample_store = sample_store if sample_store is not None else LatestSampleStore()
+        # Contadores de diagnóstico (escritos solo por el thread serial)
+        self.stats = {
+            'bytes_received': 0,
+            'reads': 0,
+            'lines': 0,
+            'frames': 0,
+            'line_overflows': 0,
+            'overflow_bytes': 0,
+            'resyncs': 0,
+            'read_errors': 0,
+            'max_in_waiting': 0,
+        }
+        # Emisión por lotes
+        self.batch_interval = batch_interval_ms / 1000.0
+        self._batch = []
+        self._batch_state = ('UNKNOWN', False)
+        self._batch_deadline = 0.0
+        logger.info(f"SerialHandler inicializado: Puerto={port}, Baudrate={baudrate}, "
+                    f"Binario={binary_mode}, Batch={batch_interval_ms}ms")
 
     def run(self):
         """
-        LOOP DE LECTURA SERIAL CON BUFFER CIRCULAR.
+        LOOP DE LECTURA SERIAL BLOQUEANTE CON BUFFER CIRCULAR.
         Reconstruye líneas completas para evitar datos corruptos.
         """
         logger.debug(f"Iniciando thread de lectura serial en {self.port}")
         try:
-            # Puerto serial - timeout pequeño para lectura eficiente
+            # Timeout = cota de latencia; no determina la tasa de sondeo
+            timeout = READ_TIMEOUT_S
+            if self.batch_interval > 0:
+                timeout = min(timeout, self.batch_interval)
             self.ser = serial.Serial(
                 port=self.port, 
                 baudrate=self.baudrate, 
-                timeout=0.001,  # 1ms - permite leer chunks
+                timeout=timeout,
                 write_timeout=0
             )
-            logger.info(f"Puerto {self.port} @ {self.baudrate} bps - Buffer circular activo")
+            logger.info(f"Puerto {self.port} @ {self.baudrate} bps - Lectura bloqueante (timeout={timeout*1000:.1f}ms)")
             
             # Espera inicial para Arduino
             time.sleep(0.1)
-            self._buffer = ""  # Limpiar buffer
+            self._buffer.clear()  # Limpiar buffer
             self.data_received.emit("INFO: Conectado exitosamente.")
             
+            if self.binary_requested:
+                self.request_binary_mode(True)
+            
             # ================================================================
-            # LOOP PRINCIPAL CON BUFFER CIRCULAR
+            # LOOP PRINCIPAL: bloquea hasta 1 byte, luego drena lo pendiente
             # ================================================================
             while self.running:
                 try:
-                    # Leer bytes disponibles
-                    if self.ser.in_waiting:
-                        # Leer chunk de datos (más eficiente que readline)
-                        chunk = self.ser.read(self.ser.in_waiting)
-                        if chunk:
-                            # Agregar al buffer
-                            self._buffer += chunk.decode('utf-8', errors='ignore')
-                            
-                            # Procesar líneas completas (terminan en \n)
-                            while '\n' in self._buffer:
-                                line, self._buffer = self._buffer.split('\n', 1)
-                                line = line.strip()
-                                if line:
-                                    self.data_received.emit(line)
-                            
-                            # Evitar que el buffer crezca indefinidamente
-                            if len(self._buffer) > 200:
-                                self._buffer = ""
-                except:
+                    n = self._read_available()
+                    if n:
+                        self._buffer += self._rx_view[:n]
+                        self._process_buffer()
+                    self._check_binary_negotiation()
+                    if self.batch_interval > 0:
+                        self._flush_batch()
+                except serial.SerialException as e:
+                    if not self.running:
+                        break
+                    self.stats['read_errors'] += 1
+                    logger.error(f"Error de lectura serial en {self.port}: {e}")
+                    self.data_received.emit(f"ERROR: Conexión perdida en {self.port}.")
+                    break
+                except Exception as e:
                     if not self.running:
                         break
+                    self.stats['read_errors'] += 1
+                    logger.warning(f"Error procesando datos seriales: {e}")
+            
+            if self.batch_interval > 0:
+                self._flush_batch(force=True)
             
             # Cierre limpio
             if self.ser and self.ser.is_open:
                 self.ser.close()
                 logger.info("Puerto serial cerrado")
+            logger.info(f"SerialHandler finalizado - estadísticas: {self.get_stats()}")
+            if self.timing.samples:
+                logger.info(f"Temporización del dispositivo: {self.timing.get_stats()}")
         except serial.SerialException as e:
             logger.error(f"Error al abrir puerto {self.port}: {e}")
             self.data_received.emit(f"ERROR: Puerto {self.port} no encontrado.")
         except Exception as e:
             logger.critical(f"Error inesperado en SerialHandler: {e}\n{traceback.format_exc()}")
 
+    def _read_available(self):
+        """
+        Lee en el bytearray reutilizable todo lo pendiente, bloqueando
+        (hasta el timeout del puerto) si no hay nada disponible.
+        
+        Returns:
+            int: Bytes leídos en self._rx_chunk
+        """
+        pending = self.ser.in_waiting
+        if pending > self.stats['max_in_waiting']:
+            self.stats['max_in_waiting'] = pending
+        want = min(max(pending, 1), READ_CHUNK_BYTES)
+        n = self.ser.readinto(self._rx_view[:want])
+        if n:
+            self.stats['reads'] += 1
+            self.stats['bytes_received'] += n
+        return n
+
+    def _process_buffer(self):
+        """Extrae líneas ASCII o tramas binarias completas del buffer."""
+        if not self.binary_active:
+            # Procesar líneas completas (terminan en \n)
+            while True:
+                idx = self._buffer.find(b'\n')
+                if idx < 0:
+                    if len(self._buffer) > MAX_LINE_BYTES:
+                        # Línea sin terminador: descartar hasta el próximo \n
+                        self.stats['line_overflows'] += 1
+                        self.stats['overflow_bytes'] += len(self._buffer)
+                        self._buffer.clear()
+                        self._discarding_line = True
+                    return
+                if self._discarding_line:
+                    # Cola de una línea ya contabilizada como desborde
+                    self.stats['overflow_bytes'] += idx + 1
+                    del self._buffer[:idx + 1]
+                    self._discarding_line = False
+                    continue
+                line = self._buffer[:idx].decode('utf-8', errors='ignore').strip()
+                del self._buffer[:idx + 1]
+                if line:
+                    self.stats['lines'] += 1
+                    self._handle_line(line)
+                if self.binary_active:
+                    # El resto del buffer ya son tramas binarias
+                    break
+        
+        samples, consumed, resyncs = MotorProtocol.decode_binary_frames(self._buffer)
+        if consumed:
+            del self._buffer[:consumed]
+        if resyncs:
+            self.stats['resyncs'] += resyncs
+        self.stats['frames'] += len(samples)
+        for sample in samples:
+            self._emit_sample(sample)
+
+    def _emit_sample(self, sample):
+        """
+        Emite una muestra (pot_a, pot_b, sens_1, sens_2, state, settled
+        [, t_dev_us, seq]) o la acumula en el lote.
+        
+        El timestamp del firmware se desenvuelve aquí, una vez por muestra;
+        store, lote y sample_received reciben el mismo valor.
+        """
+        device_time_us = None
+        if len(sample) > 6 and sample[6] is not None:
+            device_time_us = self.timing.update(sample[6], sample[7])
+        self.sample_store.publish(*sample[:6], device_time_us)
+        if self.batch_interval > 0:
+            if device_time_us is None:
+                t_dev, seq = float('nan'), -1
+            else:
+                t_dev, seq = float(device_time_us), sample[7]
+            self._batch.append((time.time(), sample[0], sample[1], sample[2], sample[3],
+                                sample[5], t_dev, seq))
+            self._batch_state = (sample[4], sample[5])
+        else:
+            self.sample_received.emit(*sample[:6], device_time_us)
+
+    def _flush_batch(self, force=False):
+        """Emite el lote acumulado si venció la ventana de tiempo."""
+        now = time.monotonic()
+        if not force and now < self._batch_deadline:
+            return
+        self._batch_deadline = now + self.batch_interval
+        if not self._batch:
+            return
+        batch = np.array(self._batch, dtype=SAMPLE_DTYPE)
+        self._batch = []
+        self.batch_received.emit(batch, *self._batch_state)
+
+    def _handle_line(self, line):
+        """Procesa una línea ASCII, interceptando los ACK de negociación."""
+        if line == MotorProtocol.BINARY_ACK_ON:
+            self.binary_active = True
+            self._binary_deadline = None
+            logger.info("Telemetría binaria activa")
+            self.data_received.emit("INFO: Telemetría binaria activa")
+            return
+        if line == MotorProtocol.BINARY_ACK_OFF:
+            self._binary_deadline = None
+            logger.info("Telemetría ASCII activa")
+            return
+        sample = MotorProtocol.parse_telemetry_line(line)
+        if sample is not None:
+            self._emit_sample(sample)
+            return
+        self.data_received.emit(line)
+
+    def _check_binary_negotiation(self):
+        """Vuelve a ASCII si el firmware no confirmó el modo binario a tiempo."""
+        if self._binary_deadline is not None and time.monotonic() > self._binary_deadline:
+            self._binary_deadline = None
+            self.binary_requested = False
+            logger.warning("Firmware sin soporte de telemetría binaria - usando ASCII")
+            self.data_received.emit("INFO: Telemetría binaria no soportada, usando ASCII.")
+
+    def request_binary_mode(self, enable):
+        """
+        Solicita al firmware cambiar el formato de telemetría.
+        
+        El cambio efectivo a binario ocurre al recibir BINARY_ACK_ON; al
+        desactivar se vuelve a ASCII de inmediato (las líneas se reconocen
+        aunque queden tramas binarias en tránsito).
+        
+        Args:
+            enable (bool): True para binario, False para ASCII
+            
+        Returns:
+            bool: True si el comando se envió
+        """
+        self.binary_requested = enable
+        if not enable:
+            self.binary_active = False
+            self._binary_deadline = None
+        sent = self.send_command(MotorProtocol.format_binary_mode(enable))
+        if sent and enable and not self.binary_active:
+            self._binary_deadline = time.monotonic() + BINARY_NEGOTIATION_TIMEOUT_S
+        return sent
+
     def stop(self):
         """Detiene el thread de lectura serial de forma segura."""
         logger.debug("Deteniendo SerialHandler")
         self.running = False
+        # La lectura bloqueante retorna como máximo tras READ_TIMEOUT_S
+        if self.ser and self.ser.is_open and hasattr(self.ser, 'cancel_read'):
+            try:
+                self.ser.cancel_read()
+            except Exception:
+                pass
+        self.wait()
         if self.ser and self.ser.is_open:
             self.ser.close()
             logger.info("Puerto serial cerrado en stop()")
-        self.wait()
+    
+    def get_stats(self):
+        """
+        Retorna una copia de los contadores de diagnóstico.
+        
+        Returns:
+            dict: bytes_received, reads, lines, frames, line_overflows,
+            overflow_bytes, resyncs, read_errors, max_in_waiting
+        """
+        return dict(self.stats)
     
     def write(self, data):
         """
@@ -0,0 +1,117 @@
+"""
+Estadísticas de temporización de la telemetría del Arduino.
+
+El firmware puede anexar a cada línea su marca de tiempo `micros()` y un
+contador de secuencia ("...,estado,settled,t_us,seq"). TelemetryTimingTracker
+desenvuelve ambos contadores (desbordan a 2^32 µs ≈ 71 min y 2^16 muestras)
+y acumula pérdidas de muestras y jitter del periodo de muestreo medidos en el
+reloj del dispositivo, independientes de la latencia del event loop de Qt.
+"""
+
+import math
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TelemetryTimingTracker:
+    """
+    Desenvuelve timestamps/secuencias del dispositivo y mide gaps y jitter.
+
+    No es thread-safe: lo alimenta solo el thread serial (SerialHandler).
+    """
+
+    def __init__(self, time_bits: int = 32, seq_bits: int = 16):
+        """
+        Args:
+            time_bits: Ancho del contador de microsegundos del firmware
+            seq_bits: Ancho del contador de secuencia del firmware
+        """
+        self.time_modulo = 1 << time_bits
+        self.seq_modulo = 1 << seq_bits
+        # Un timestamp que retrocede solo es desborde si el anterior estaba en
+        # el último cuarto del rango y el nuevo en el primero
+        self.wrap_margin = self.time_modulo // 4
+        self.reset()
+
+    def reset(self):
+        """Reinicia el estado (nueva conexión o nueva grabación)."""
+        self._last_raw_t = None
+        self._last_seq = None
+        self._t_unwrapped = 0
+        self.samples = 0
+        self.lost_samples = 0
+        self.gap_events = 0
+        self.seq_errors = 0
+        # Welford sobre el intervalo entre muestras consecutivas
+        self._n_intervals = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._min = math.inf
+        self._max = 0
+
+    def update(self, t_dev_us: int, seq: int) -> int:
+        """
+        Registra una muestra del dispositivo.
+
+        Args:
+            t_dev_us: Timestamp crudo del firmware (µs, con desborde)
+            seq: Contador de secuencia crudo (con desborde)
+
+        Returns:
+            int: Timestamp desenvuelto y monótono en µs
+        """
+        self.samples += 1
+        if self._last_raw_t is None:
+            self._t_unwrapped = t_dev_us
+        else:
+            if t_dev_us <= self._last_raw_t and not (
+                    self._last_raw_t >= self.time_modulo - self.wrap_margin
+                    and t_dev_us < self.wrap_margin):
+                # Duplicada o fuera de orden: no es un desborde; se conserva
+                # la última muestra válida como referencia
+                self.seq_errors += 1
+                return self._t_unwrapped
+            dt = (t_dev_us - self._last_raw_t) % self.time_modulo
+            self._t_unwrapped += dt
+
+            dseq = (seq - self._last_seq) % self.seq_modulo
+            if dseq == 0 or dseq > self.seq_modulo // 2:
+                # Duplicada o fuera de orden
+                self.seq_errors += 1
+            elif dseq > 1:
+                self.lost_samples += dseq - 1
+                self.gap_events += 1
+            else:
+                self._n_intervals += 1
+                delta = dt - self._mean
+                self._mean += delta / self._n_intervals
+                self._m2 += delta * (dt - self._mean)
+                self._min = min(self._min, dt)
+                self._max = max(self._max, dt)
+
+        self._last_raw_t = t_dev_us
+        self._last_seq = seq
+        return self._t_unwrapped
+
+    def get_stats(self) -> dict:
+        """
+        Returns:
+            dict: samples, lost_samples, gap_events, seq_errors, loss_ratio e
+            intervalo entre muestras consecutivas (mean/std/min/max en µs;
+            std es el jitter del periodo de muestreo)
+        """
+        n = self._n_intervals
+        std = math.sqrt(self._m2 / (n - 1)) if n > 1 else 0.0
+        expected = self.samples + self.lost_samples
+        return {
+            'samples': self.samples,
+            'lost_samples': self.lost_samples,
+            'gap_events': self.gap_events,
+            'seq_errors': self.seq_errors,
+            'loss_ratio': self.lost_samples / expected if expected else 0.0,
+            'interval_mean_us': self._mean if n else 0.0,
+            'interval_std_us': std,
+            'interval_min_us': self._min if n else 0,
+            'interval_max_us': self._max,
+        }
@@ -1,7 +1,8 @@
 """
 Módulo de controladores del sistema.
 
-Contiene el controlador H∞ para control de motores.
+Contiene el controlador H∞ para control de motores, el barrido paralelo
+de sus ponderaciones y su implementación discreta en punto fijo.
 """
 
 from .hinf_controller import (
@@ -10,10 +11,32 @@ from .hinf_controller import (
     SynthesisResult,
     ValidationResult
 )
+from .hinf_sweep import HInfWeightSweep
+from .discrete_controller import (
+    DiscreteController,
+    FixedPointFormat,
+    QuantizedController,
+    build_device_controller,
+    discretize_controller,
+    quantize_controller,
+    simulate_fixed_point,
+    to_arduino_header,
+    verify_fixed_point
+)
 
 __all__ = [
     'HInfController',
     'SynthesisConfig',
     'SynthesisResult',
-    'ValidationResult'
+    'ValidationResult',
+    'HInfWeightSweep',
+    'DiscreteController',
+    'FixedPointFormat',
+    'QuantizedController',
+    'build_device_controller',
+    'discretize_controller',
+    'quantize_controller',
+    'simulate_fixed_point',
+    'to_arduino_header',
+    'verify_fixed_point'
 ]
@@ -0,0 +1,502 @@
+"""
+Controlador H∞ Discreto en Punto Fijo
+=====================================
+
+Discretiza el controlador reducido (HInfController._reduce_controller_order)
+al periodo real del lazo, lo cuantiza a enteros para ejecutarlo en el
+Arduino y verifica la implementación con una simulación bit a bit.
+
+Estructura en el dispositivo: cascada de secciones de segundo orden
+(biquads) en Forma Directa I, con los polos más cercanos al círculo
+unitario en la última sección:
+
+    acc = b0·x[n] + b1·x[n-1] + b2·x[n-2] - a1·y[n-1] - a2·y[n-2]
+    y[n] = (acc + 2^(s-1)) >> s
+
+    - Coeficientes: enteros con signo de coeff_bits, Q(s) por sección
+    - Señales (entrada, estados, salidas): enteros de state_bits en Q(f)
+    - Acumulador: acc_bits (int64_t en el Arduino)
+    - La salida de la última sección se satura a ±U_max y se guarda
+      saturada en su estado (anti-windup)
+
+La simulación usa enteros de Python con el mismo redondeo, desplazamiento
+aritmético y desborde con aritmética modular que el código C generado, y
+compara contra la misma cascada en punto flotante.
+
+Autor: Sistema de Control L206
+"""
+
+import logging
+import math
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional
+
+import numpy as np
+import control as ct
+from scipy import signal
+
+from config.constants import CONTROL_PERIOD_S, CONTROLLER_DISCRETIZATION
+
+logger = logging.getLogger('MotorControl_L206')
+
+# Margen sobre el pico de señal observado al elegir los bits fraccionarios
+SIGNAL_HEADROOM = 4.0
+# Muestras de la señal de prueba por defecto
+TEST_SIGNAL_SAMPLES = 2000
+
+
+@dataclass
+class FixedPointFormat:
+    """Anchos de palabra de la implementación entera."""
+    coeff_bits: int = 32               # int32_t
+    state_bits: int = 32               # int32_t
+    acc_bits: int = 64                 # int64_t
+    signal_frac_bits: Optional[int] = None  # None = elegir según el rango de entrada
+
+
+@dataclass
+class DiscreteController:
+    """Controlador discretizado C(z) y su cascada de biquads en punto flotante."""
+    num: np.ndarray           # Coeficientes en z⁻¹ (mismo largo que den)
+    den: np.ndarray           # den[0] = 1
+    sos: np.ndarray           # (n_secciones, 6): b0 b1 b2 1 a1 a2
+    Ts: float
+    method: str
+    continuous: object = None
+
+    @property
+    def poles(self) -> np.ndarray:
+        return np.roots(self.den)
+
+    def to_tf(self):
+        """ct.TransferFunction discreta equivalente."""
+        return ct.tf(self.num, self.den, self.Ts)
+
+
+@dataclass
+class QuantizedController:
+    """Cascada cuantizada lista para exportar al Arduino."""
+    coeffs: np.ndarray        # (n_secciones, 5) enteros: b0 b1 b2 a1 a2
+    shifts: np.ndarray        # (n_secciones,) bits fraccionarios de cada sección
+    signal_frac_bits: int
+    fmt: FixedPointFormat
+    u_max: float
+    discrete: DiscreteController
+    warnings: List[str] = field(default_factory=list)
+
+    @property
+    def n_sections(self) -> int:
+        return len(self.coeffs)
+
+    def quantized_sos(self) -> np.ndarray:
+        """Coeficientes efectivos (los que realmente ejecuta el dispositivo)."""
+        scale = 2.0 ** self.shifts[:, None]
+        q = self.coeffs.astype(np.float64) / scale
+        return np.column_stack([q[:, :3], np.ones(self.n_sections), q[:, 3:]])
+
+    def quantized_poles(self) -> np.ndarray:
+        sos = self.quantized_sos()
+        return np.concatenate([np.roots(s[3:]) for s in sos]) if len(sos) else np.zeros(0)
+
+
+def discretize_controller(K_ctrl, Ts: float = CONTROL_PERIOD_S,
+                          method: str = CONTROLLER_DISCRETIZATION) -> DiscreteController:
+    """
+    Discretiza el controlador continuo al periodo del lazo.
+
+    Args:
+        K_ctrl: Controlador (ct.TransferFunction o ct.StateSpace)
+        Ts: Periodo de muestreo en s
+        method: 'tustin' o 'zoh'
+
+    Returns:
+        DiscreteController
+
+    Raises:
+        ValueError: Método desconocido o controlador impropio
+    """
+    if method not in ('tustin', 'zoh'):
+        raise ValueError(f"Método de discretización desconocido: {method}")
+    if hasattr(K_ctrl, 'A') and not hasattr(K_ctrl, 'num'):
+        K_tf = ct.ss2tf(K_ctrl)
+    else:
+        K_tf = K_ctrl
+    num_s = np.trim_zeros(np.ravel(K_tf.num[0][0]).astype(np.float64), 'f')
+    den_s = np.trim_zeros(np.ravel(K_tf.den[0][0]).astype(np.float64), 'f')
+    if len(num_s) > len(den_s):
+        raise ValueError("Controlador impropio: no se puede discretizar para el dispositivo")
+
+    K_d = ct.c2d(ct.tf(num_s, den_s), Ts, method=method)
+    num = np.trim_zeros(np.ravel(K_d.num[0][0]).astype(np.float64), 'f')
+    den = np.trim_zeros(np.ravel(K_d.den[0][0]).astype(np.float64), 'f')
+    if len(num) == 0:
+        num = np.zeros(1)
+    num, den = num / den[0], den / den[0]
+    delay = len(den) - len(num)
+
+    if len(den) == 1:
+        sos = np.array([[num[0], 0.0, 0.0, 1.0, 0.0, 0.0]])
+    else:
+        z, p, k = signal.tf2zpk(num, den)
+        sos = signal.zpk2sos(z, p, k, pairing='nearest')
+        # zpk2sos completa los ceros faltantes con ceros en el origen (factor z):
+        # se compensan con retardos z⁻¹ en las secciones que los tienen
+        for sec in sos:
+            while delay > 0 and sec[2] == 0.0:
+                sec[:3] = [0.0, sec[0], sec[1]]
+                delay -= 1
+    num = np.concatenate([np.zeros(len(den) - len(num)), num])
+
+    logger.info(f"Controlador discretizado ({method}, Ts={Ts * 1000:.1f} ms): "
+                f"orden {len(den) - 1}, {len(sos)} sección(es)")
+    return DiscreteController(num=num, den=den, sos=sos, Ts=Ts, method=method,
+                              continuous=K_ctrl)
+
+
+def _run_float(sos: np.ndarray, x: np.ndarray, u_max: float) -> Dict:
+    """
+    Cascada DF-I en punto flotante con la misma saturación que el dispositivo.
+
+    peaks registra el valor de cada sección ANTES de la saturación: el
+    dispositivo calcula y guarda ese valor en state_bits (con el cast a
+    int32_t) antes de saturarlo, así que los bits de señal deben cubrirlo.
+    """
+    n_sec = len(sos)
+    states = np.zeros((n_sec, 4))  # x1 x2 y1 y2
+    y_out = np.empty(len(x))
+    peaks = np.zeros(n_sec)
+    for n, xn in enumerate(x):
+        v = xn
+        for i in range(n_sec):
+            b0, b1, b2, _, a1, a2 = sos[i]
+            x1, x2, y1, y2 = states[i]
+            y = b0 * v + b1 * x1 + b2 * x2 - a1 * y1 - a2 * y2
+            peaks[i] = max(peaks[i], abs(y))
+            if i == n_sec - 1:
+                y = min(u_max, max(-u_max, y))
+            states[i] = (v, x1, y, y1)
+            v = y
+        y_out[n] = v
+    return {'output': y_out, 'peaks': peaks}
+
+
+def default_test_signal(amplitude: float, n_samples: int = TEST_SIGNAL_SAMPLES,
+                        seed: int = 0) -> np.ndarray:
+    """
+    Señal de error de prueba: escalones de ±amplitude, decaimiento hacia
+    cero (aproximación final) y ruido pequeño.
+    """
+    rng = np.random.default_rng(seed)
+    n = np.arange(n_samples)
+    quarter = max(1, n_samples // 4)
+    steps = amplitude * np.where((n // quarter) % 2 == 0, 1.0, -1.0)
+    decay = np.exp(-(n % quarter) / (quarter / 6.0))
+    return steps * decay + 0.01 * amplitude * rng.standard_normal(n_samples)
+
+
+def quantize_controller(discrete: DiscreteController, u_max: float, input_range: float,
+                        fmt: Optional[FixedPointFormat] = None) -> QuantizedController:
+    """
+    Cuantiza la cascada a enteros.
+
+    Los bits fraccionarios de cada sección se eligen para que su mayor
+    coeficiente use todo coeff_bits. Los de las señales (si fmt no los
+    fija) dejan SIGNAL_HEADROOM sobre el pico observado en la simulación
+    flotante con la señal de prueba de amplitud input_range (pico de la
+    última sección antes de saturar a ±U_max).
+
+    Args:
+        discrete: Controlador discretizado
+        u_max: Saturación de la salida (PWM)
+        input_range: Error máximo esperado a la entrada (unidades del lazo)
+        fmt: Anchos de palabra (por defecto FixedPointFormat())
+
+    Returns:
+        QuantizedController
+    """
+    fmt = fmt or FixedPointFormat()
+    warnings = []
+    sos = discrete.sos
+    coeff_max = 2 ** (fmt.coeff_bits - 1) - 1
+
+    coeffs = np.zeros((len(sos), 5), dtype=np.int64)
+    shifts = np.zeros(len(sos), dtype=np.int64)
+    for i, sec in enumerate(sos):
+        c = np.array([sec[0], sec[1], sec[2], sec[4], sec[5]])
+        peak = float(np.max(np.abs(c)))
+        int_bits = max(0, math.floor(math.log2(peak)) + 1) if peak > 0 else 0
+        shift = fmt.coeff_bits - 1 - int_bits
+        if shift < 1:
+            raise ValueError(f"Sección {i}: coeficiente {peak:.3g} no cabe en {fmt.coeff_bits} bits")
+        q = np.round(c * 2.0 ** shift)
+        # El redondeo puede llevar el mayor coeficiente justo a 2^(bits-1)
+        coeffs[i] = np.clip(q, -coeff_max - 1, coeff_max).astype(np.int64)
+        shifts[i] = shift
+
+    frac = fmt.signal_frac_bits
+    if frac is None:
+        ref = _run_float(sos, default_test_signal(input_range), u_max)
+        peak = max(float(np.max(ref['peaks'])), float(input_range), float(u_max))
+        frac = fmt.state_bits - 1 - math.ceil(math.log2(peak * SIGNAL_HEADROOM))
+        if frac < 0:
+            warnings.append(f"Rango de señal {peak:.3g} excede {fmt.state_bits} bits")
+            frac = 0
+
+    quantized = QuantizedController(coeffs=coeffs, shifts=shifts, signal_frac_bits=int(frac),
+                                    fmt=fmt, u_max=float(u_max), discrete=discrete,
+                                    warnings=warnings)
+    poles_q = quantized.quantized_poles()
+    if len(poles_q) and np.max(np.abs(poles_q)) > 1.0 + 1e-12:
+        warnings.append(f"Polo cuantizado fuera del círculo unitario (|z|={np.max(np.abs(poles_q)):.9f})")
+    return quantized
+
+
+def _wrap(value: int, bits: int) -> int:
+    """Desborde en complemento a dos (lo que hace el hardware)."""
+    half = 1 << (bits - 1)
+    return ((value + half) % (1 << bits)) - half
+
+
+def simulate_fixed_point(quantized: QuantizedController, x) -> Dict:
+    """
+    Simulación bit a bit de la cascada entera y comparación con punto flotante.
+
+    Args:
+        quantized: Controlador cuantizado
+        x: Señal de error (unidades del lazo, flotante)
+
+    Returns:
+        dict con:
+            - output_pwm: ndarray int (lo que enviaría el Arduino)
+            - output_fixed: ndarray flotante (salida antes de redondear a PWM)
+            - output_float: ndarray (referencia en punto flotante)
+            - max_error, rms_error: error de cuantización de la salida (PWM)
+            - snr_db: relación señal/ruido de cuantización
+            - acc_overflows, state_overflows: desbordes detectados
+            - saturations: muestras saturadas a ±U_max
+            - max_acc_bits, max_state_bits: bits usados (con signo)
+    """
+    x = np.asarray(x, dtype=np.float64)
+    fmt = quantized.fmt
+    f = quantized.signal_frac_bits
+    n_sec = quantized.n_sections
+    coeffs = [[int(c) for c in row] for row in quantized.coeffs]
+    shifts = [int(s) for s in quantized.shifts]
+    u_max_q = int(round(quantized.u_max * (1 << f)))
+    state_lim = (1 << (fmt.state_bits - 1)) - 1
+    acc_lim = (1 << (fmt.acc_bits - 1)) - 1
+
+    states = [[0, 0, 0, 0] for _ in range(n_sec)]
+    out_q = np.empty(len(x))
+    out_pwm = np.empty(len(x), dtype=np.int64)
+    acc_ovf = state_ovf = saturations = 0
+    max_acc = max_state = 0
+    half_out = 1 << (f - 1) if f > 0 else 0
+
+    for n, xn in enumerate(x):
+        v = int(round(xn * (1 << f)))
+        if abs(v) > state_lim:
+            state_ovf += 1
+            v = _wrap(v, fmt.state_bits)
+        for i in range(n_sec):
+            b0, b1, b2, a1, a2 = coeffs[i]
+            x1, x2, y1, y2 = states[i]
+            acc = b0 * v + b1 * x1 + b2 * x2 - a1 * y1 - a2 * y2
+            max_acc = max(max_acc, abs(acc))
+            if abs(acc) > acc_lim:
+                acc_ovf += 1
+                acc = _wrap(acc, fmt.acc_bits)
+            y = (acc + (1 << (shifts[i] - 1))) >> shifts[i]
+            max_state = max(max_state, abs(y))
+            if abs(y) > state_lim:
+                state_ovf += 1
+                y = _wrap(y, fmt.state_bits)
+            if i == n_sec - 1:
+                if y > u_max_q:
+                    y, saturations = u_max_q, saturations + 1
+                elif y < -u_max_q:
+                    y, saturations = -u_max_q, saturations + 1
+            states[i] = [v, x1, y, y1]
+            v = y
+        out_q[n] = v / (1 << f)
+        out_pwm[n] = (v + half_out) >> f
+
+    ref = _run_float(quantized.discrete.sos, x, quantized.u_max)['output']
+    err = out_q - ref
+    p_sig = float(np.mean(ref ** 2))
+    p_err = float(np.mean(err ** 2))
+    snr = 10.0 * math.log10(p_sig / p_err) if p_err > 0 and p_sig > 0 else float('inf')
+    return {
+        'output_pwm': out_pwm,
+        'output_fixed': out_q,
+        'output_float': ref,
+        'max_error': float(np.max(np.abs(err))) if len(err) else 0.0,
+        'rms_error': math.sqrt(p_err),
+        'snr_db': snr,
+        'acc_overflows': acc_ovf,
+        'state_overflows': state_ovf,
+        'saturations': saturations,
+        'max_acc_bits': max_acc.bit_length() + 1,
+        'max_state_bits': max_state.bit_length() + 1,
+    }
+
+
+def verify_fixed_point(quantized: QuantizedController, input_range: float,
+                       x=None) -> Dict:
+    """
+    Reporte de la implementación entera: desbordes, pérdida por cuantización
+    y desplazamiento de polos.
+
+    Args:
+        quantized: Controlador cuantizado
+        input_range: Amplitud de la señal de prueba (si x es None)
+        x: Señal de error propia (opcional)
+
+    Returns:
+        dict con los campos de simulate_fixed_point (sin las series) más
+        max_pole_shift, max_pole_radius, ok y warnings
+    """
+    if x is None:
+        x = default_test_signal(input_range)
+    sim = simulate_fixed_point(quantized, x)
+    poles = np.sort_complex(np.concatenate([np.roots(s[3:]) for s in quantized.discrete.sos]))
+    poles_q = np.sort_complex(quantized.quantized_poles())
+    pole_shift = float(np.max(np.abs(poles - poles_q))) if len(poles) else 0.0
+    pole_radius = float(np.max(np.abs(poles_q))) if len(poles_q) else 0.0
+
+    warnings = list(quantized.warnings)
+    if sim['acc_overflows']:
+        warnings.append(f"{sim['acc_overflows']} desbordes del acumulador ({quantized.fmt.acc_bits} bits)")
+    if sim['state_overflows']:
+        warnings.append(f"{sim['state_overflows']} desbordes de estado ({quantized.fmt.state_bits} bits)")
+    if sim['max_error'] >= 0.5:
+        warnings.append(f"Error de cuantización {sim['max_error']:.3f} PWM ≥ 0.5 (cambia el comando)")
+
+    report = {k: v for k, v in sim.items() if not k.startswith('output')}
+    report.update({
+        'max_pole_shift': pole_shift,
+        'max_pole_radius': pole_radius,
+        'ok': not warnings,
+        'warnings': warnings,
+    })
+    return report
+
+
+def to_arduino_header(quantized: QuantizedController, name: str = 'hinf') -> str:
+    """
+    Cabecera C con los coeficientes y la función de paso del controlador.
+
+    La función reproduce exactamente simulate_fixed_point. La entrada es el
+    error en unidades del lazo (error_um / |K|) en Q(SIGNAL_FRAC); la salida
+    es el PWM ya saturado a ±U_max.
+    """
+    prefix = name.upper()
+    fmt = quantized.fmt
+    f = quantized.signal_frac_bits
+    n_sec = quantized.n_sections
+    ctype = {16: 'int16_t', 32: 'int32_t', 64: 'int64_t'}
+    coeff_t = ctype.get(fmt.coeff_bits, 'int32_t')
+    state_t = ctype.get(fmt.state_bits, 'int32_t')
+    acc_t = ctype.get(fmt.acc_bits, 'int64_t')
+    d = quantized.discrete
+    u_max_q = int(round(quantized.u_max * (1 << f)))
+
+    rows = ",\n".join(
+        "    {" + ", ".join(f"{int(c)}" for c in row) + "}" for row in quantized.coeffs)
+    shifts = ", ".join(str(int(s)) for s in quantized.shifts)
+    lines = [
+        f"// Controlador H∞ discretizado ({d.method}, Ts = {d.Ts * 1000:.3f} ms)",
+        f"// C(z) num = {np.array2string(d.num, precision=10, separator=', ')}",
+        f"// C(z) den = {np.array2string(d.den, precision=10, separator=', ')}",
+        f"// Cascada DF-I: coeficientes {fmt.coeff_bits} bits, señales Q{f} en "
+        f"{fmt.state_bits} bits, acumulador {fmt.acc_bits} bits",
+        f"#ifndef {prefix}_CONTROLLER_H",
+        f"#define {prefix}_CONTROLLER_H",
+        "",
+        "#include <stdint.h>",
+        "",
+        f"#define {prefix}_N_SECTIONS {n_sec}",
+        f"#define {prefix}_SIGNAL_FRAC {f}",
+        f"#define {prefix}_TS_US {int(round(d.Ts * 1e6))}UL",
+        f"#define {prefix}_U_MAX_Q {u_max_q}L",
+        "",
+        f"// b0, b1, b2, a1, a2 por sección",
+        f"static const {coeff_t} {prefix}_COEFFS[{prefix}_N_SECTIONS][5] = {{",
+        rows,
+        "};",
+        f"static const uint8_t {prefix}_SHIFT[{prefix}_N_SECTIONS] = {{{shifts}}};",
+        f"static {state_t} {name}_state[{prefix}_N_SECTIONS][4];  // x1, x2, y1, y2",
+        "",
+        f"static inline void {name}_reset(void) {{",
+        f"    for (uint8_t i = 0; i < {prefix}_N_SECTIONS; i++)",
+        f"        {name}_state[i][0] = {name}_state[i][1] = {name}_state[i][2] = {name}_state[i][3] = 0;",
+        "}",
+        "",
+        f"// error_q: error en Q{prefix}_SIGNAL_FRAC. Retorna PWM saturado.",
+        f"static inline int16_t {name}_step({state_t} error_q) {{",
+        f"    {state_t} v = error_q;",
+        f"    for (uint8_t i = 0; i < {prefix}_N_SECTIONS; i++) {{",
+        f"        const {coeff_t} *c = {prefix}_COEFFS[i];",
+        f"        {state_t} *s = {name}_state[i];",
+        f"        {acc_t} acc = ({acc_t})c[0] * v + ({acc_t})c[1] * s[0] + ({acc_t})c[2] * s[1]",
+        f"                  - ({acc_t})c[3] * s[2] - ({acc_t})c[4] * s[3];",
+        f"        {state_t} y = ({state_t})((acc + (({acc_t})1 << ({prefix}_SHIFT[i] - 1))) >> {prefix}_SHIFT[i]);",
+        f"        if (i == {prefix}_N_SECTIONS - 1) {{",
+        f"            if (y > {prefix}_U_MAX_Q) y = {prefix}_U_MAX_Q;",
+        f"            else if (y < -{prefix}_U_MAX_Q) y = -{prefix}_U_MAX_Q;",
+        "        }",
+        "        s[1] = s[0]; s[0] = v;",
+        "        s[3] = s[2]; s[2] = y;",
+        "        v = y;",
+        "    }",
+    ]
+    if f > 0:
+        lines.append(f"    return (int16_t)((v + (({state_t})1 << ({prefix}_SIGNAL_FRAC - 1))) >> {prefix}_SIGNAL_FRAC);")
+    else:
+        lines.append("    return (int16_t)v;")
+    lines += [
+        "}",
+        "",
+        f"#endif  // {prefix}_CONTROLLER_H",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+def build_device_controller(K_ctrl, u_max: float, input_range: float,
+                            Ts: float = CONTROL_PERIOD_S,
+                            method: str = CONTROLLER_DISCRETIZATION,
+                            fmt: Optional[FixedPointFormat] = None) -> Dict:
+    """
+    Discretiza, cuantiza y verifica el controlador en un paso.
+
+    Si la verificación falla por desbordes y fmt no fija los bits de
+    señal, se reintenta con Q menores. report['ok'] False significa que la
+    implementación entera no reproduce al controlador: no exportarla.
+
+    Returns:
+        dict con discrete, quantized y report (verify_fixed_point)
+    """
+    fmt = fmt or FixedPointFormat()
+    discrete = discretize_controller(K_ctrl, Ts, method)
+    quantized = quantize_controller(discrete, u_max, input_range, fmt)
+    report = verify_fixed_point(quantized, input_range)
+    if not report['ok'] and fmt.signal_frac_bits is None:
+        # Desbordes con el Q elegido: probar con menos bits fraccionarios
+        for frac in range(quantized.signal_frac_bits - 1, -1, -1):
+            if not (report['acc_overflows'] or report['state_overflows']):
+                break
+            candidate = quantize_controller(discrete, u_max, input_range,
+                                            replace(fmt, signal_frac_bits=frac))
+            candidate_report = verify_fixed_point(candidate, input_range)
+            quantized, report = candidate, candidate_report
+            if report['ok']:
+                logger.info(f"Punto fijo: desbordes con el Q elegido, se usa Q{frac}")
+                break
+    if report['ok']:
+        logger.info(f"Controlador en punto fijo verificado: Q{quantized.signal_frac_bits}, "
+                    f"error máx {report['max_error']:.2e} PWM, SNR {report['snr_db']:.1f} dB")
+    else:
+        for w in report['warnings']:
+            logger.warning(f"Punto fijo: {w}")
+    return {'discrete': discrete, 'quantized': quantized, 'report': report}
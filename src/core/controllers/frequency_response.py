@@ -0,0 +1,250 @@
+"""
+Respuesta en Frecuencia Vectorizada del Lazo H∞
+===============================================
+
+Evalúa G(jω) y K(jω) una sola vez sobre una grilla de frecuencias común y
+deriva de ellas L = G·K, S = 1/(1+L), KS = K·S y T = L/(1+L). Normas
+(HInfController._calculate_norms), márgenes (_calculate_margins) y el
+diagrama de Bode (hinf_service.plot_bode) reutilizan la misma evaluación.
+
+Evaluación de un sistema SISO en espacio de estados:
+
+    H(jω) = C (jωI - A)⁻¹ B + D
+
+Las funciones de transferencia se llevan a forma canónica controlable
+directamente desde sus coeficientes. Con A = V Λ V⁻¹ diagonalizable
+(caso normal) queda
+H(jω) = Σ (C V)ᵢ (V⁻¹ B)ᵢ / (jω - λᵢ) + D, un producto matricial (N × n)
+sin resolver un sistema lineal por frecuencia. Si V está mal condicionada
+se resuelve el lote (N, n, n) con np.linalg.solve.
+
+Autor: Sistema de Control L206
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+import control as ct
+
+logger = logging.getLogger('MotorControl_L206')
+
+# Grilla común: 100 puntos por década, cubre cruces de ganancia hasta ~10⁵ rad/s
+DEFAULT_OMEGA = np.logspace(-3, 5, 801)
+# Evaluaciones de lazo guardadas (LRU)
+CACHE_SIZE = 16
+# Condición máxima de la matriz de autovectores para usar la forma diagonal
+_EIG_COND_MAX = 1e8
+
+
+def _system_key(sys) -> tuple:
+    """Clave por coeficientes (dos objetos con la misma dinámica comparten caché)."""
+    if isinstance(sys, ct.TransferFunction):
+        return ('tf', np.ravel(sys.num[0][0]).tobytes(), np.ravel(sys.den[0][0]).tobytes())
+    if isinstance(sys, ct.StateSpace):
+        return ('ss',) + tuple(np.asarray(m, dtype=float).tobytes()
+                               for m in (sys.A, sys.B, sys.C, sys.D))
+    return ('const', float(sys))
+
+
+def _state_space(sys) -> tuple:
+    """(A, B, C, D) de un sistema SISO; las tf van a forma canónica controlable."""
+    if isinstance(sys, ct.TransferFunction):
+        num = np.trim_zeros(np.ravel(sys.num[0][0]).astype(np.float64), 'f')
+        den = np.trim_zeros(np.ravel(sys.den[0][0]).astype(np.float64), 'f')
+        num, den = num / den[0], den / den[0]
+        n = len(den) - 1
+        num = np.concatenate([np.zeros(n + 1 - len(num)), num])
+        D = num[0]
+        A = np.zeros((n, n))
+        if n:
+            A[0, :] = -den[1:]
+            A[1:, :-1] = np.eye(n - 1)
+        B = np.zeros(n)
+        if n:
+            B[0] = 1.0
+        C = num[1:] - D * den[1:]
+        return A, B, C, D
+    return (np.asarray(sys.A, dtype=np.float64), np.asarray(sys.B, dtype=np.float64)[:, 0],
+            np.asarray(sys.C, dtype=np.float64)[0, :], float(np.asarray(sys.D)[0, 0]))
+
+
+class SystemEvaluator:
+    """
+    Evaluador H(jω) de un sistema SISO con la descomposición precalculada.
+
+    La conversión a espacio de estados y la descomposición modal se hacen
+    una vez; cada llamada posterior es un producto matricial.
+    """
+
+    def __init__(self, sys):
+        """
+        Args:
+            sys: ct.TransferFunction, ct.StateSpace o escalar
+        """
+        if np.isscalar(sys) or isinstance(sys, (int, float)):
+            A, B, C, D = np.zeros((0, 0)), np.zeros(0), np.zeros(0), float(sys)
+        else:
+            A, B, C, D = _state_space(sys)
+        self._D = complex(D)
+        self._A, self._B, self._C = A, B.astype(complex), C
+        self._poles = self._residues = None
+        if A.shape[0]:
+            lam, V = np.linalg.eig(A)
+            if np.linalg.cond(V) < _EIG_COND_MAX:
+                self._poles = lam
+                self._residues = (C @ V) * np.linalg.solve(V, self._B)
+
+    def __call__(self, omega) -> np.ndarray:
+        """Respuesta compleja en las frecuencias omega [rad/s]."""
+        s = 1j * np.atleast_1d(np.asarray(omega, dtype=np.float64))
+        n = self._A.shape[0]
+        if n == 0:
+            return np.full(s.shape, self._D)
+        if self._poles is not None:
+            return self._residues @ (1.0 / (s[None, :] - self._poles[:, None])) + self._D
+        # A defectiva o casi: resolver (sI - A) x = B para todas las frecuencias a la vez
+        M = s[:, None, None] * np.eye(n)[None, :, :] - self._A[None, :, :]
+        x = np.linalg.solve(M, np.broadcast_to(self._B, (len(s), n))[..., None])[..., 0]
+        return x @ self._C + self._D
+
+
+def evaluate(sys, omega: np.ndarray) -> np.ndarray:
+    """
+    Respuesta compleja H(jω) de un sistema SISO (tf, ss o constante).
+
+    Args:
+        sys: ct.TransferFunction, ct.StateSpace o escalar
+        omega: Frecuencias en rad/s
+
+    Returns:
+        ndarray complejo (N,)
+    """
+    return SystemEvaluator(sys)(omega)
+
+
+class LoopFrequencyResponse:
+    """G(jω), K(jω) y funciones de sensibilidad del lazo sobre una grilla común."""
+
+    def __init__(self, G, K_ctrl, omega: Optional[np.ndarray] = None):
+        """
+        Args:
+            G: Planta (modelo de velocidad K/(τs+1))
+            K_ctrl: Controlador
+            omega: Grilla en rad/s (por defecto DEFAULT_OMEGA)
+        """
+        self.omega = DEFAULT_OMEGA if omega is None else np.asarray(omega, dtype=np.float64)
+        self._G_sys = G
+        self._K_sys = K_ctrl
+        self._G_eval = SystemEvaluator(G)
+        self._K_eval = SystemEvaluator(K_ctrl)
+        self.G = self._G_eval(self.omega)
+        self.K = self._K_eval(self.omega)
+        self.L = self.G * self.K
+        self.S = 1.0 / (1.0 + self.L)
+        self.T = self.L * self.S
+        self.KS = self.K * self.S
+        self._weights: Dict[tuple, np.ndarray] = {}
+        self._margins: Optional[Dict] = None
+
+    @property
+    def L_position(self) -> np.ndarray:
+        """Lazo de posición L(jω)/(jω) (integrador externo, ver plot_bode)."""
+        return self.L / (1j * self.omega)
+
+    def weight(self, W) -> np.ndarray:
+        """W(jω) sobre la grilla (cacheado por coeficientes)."""
+        key = _system_key(W)
+        if key not in self._weights:
+            self._weights[key] = evaluate(W, self.omega)
+        return self._weights[key]
+
+    def weighted_norms(self, W1, W2, W3) -> Dict:
+        """||W1·S||∞, ||W2·K·S||∞ y ||W3·T||∞ sobre la grilla."""
+        norm_W1S = float(np.max(np.abs(self.weight(W1) * self.S)))
+        norm_W2KS = float(np.max(np.abs(self.weight(W2) * self.KS)))
+        norm_W3T = float(np.max(np.abs(self.weight(W3) * self.T)))
+        return {
+            'norm_W1S': norm_W1S,
+            'norm_W2KS': norm_W2KS,
+            'norm_W3T': norm_W3T,
+            'gamma_verified': max(norm_W1S, norm_W2KS, norm_W3T),
+        }
+
+    @staticmethod
+    def _crossings(f: np.ndarray, omega: np.ndarray) -> np.ndarray:
+        """Frecuencias (interpolación en log ω) donde f cambia de signo."""
+        idx = np.flatnonzero(np.signbit(f[:-1]) != np.signbit(f[1:]))
+        if len(idx) == 0:
+            return idx.astype(float)
+        lw = np.log10(omega)
+        frac = f[idx] / (f[idx] - f[idx + 1])
+        return 10.0 ** (lw[idx] + frac * (lw[idx + 1] - lw[idx]))
+
+    def margins(self) -> Dict:
+        """
+        Márgenes de ganancia y fase con la misma semántica que ct.margin.
+
+        Los cruces se ubican en la grilla y se interpolan; L se evalúa de
+        nuevo solo en esas frecuencias. Si |L| no pasa de >1 a <1 dentro de
+        la grilla (cruce posiblemente fuera de rango) se usa ct.margin.
+
+        Returns:
+            dict con gain_margin, phase_margin [°], wcg, wcp [rad/s]
+        """
+        if self._margins is not None:
+            return self._margins
+        mag = np.abs(self.L)
+        if not (mag[0] > 1.0 and mag[-1] < 1.0):
+            gm, pm, wcg, wcp = ct.margin(self._G_sys * self._K_sys)
+            self._margins = {'gain_margin': gm, 'phase_margin': pm, 'wcg': wcg, 'wcp': wcp}
+            return self._margins
+
+        # Cruce de ganancia |L| = 1 → margen de fase (el menor)
+        pm, wcp = float('inf'), float('nan')
+        for w in self._crossings(np.log(mag), self.omega):
+            l_w = self._evaluate_loop(w)
+            p = (np.degrees(np.angle(l_w)) + 180.0) % 360.0
+            p = p - 360.0 if p > 180.0 else p
+            if p < pm:
+                pm, wcp = float(p), float(w)
+
+        # Cruce de fase: Im(L) = 0 con Re(L) < 0 → margen de ganancia (el menor)
+        gm, wcg = float('inf'), float('nan')
+        for w in self._crossings(self.L.imag, self.omega):
+            l_w = self._evaluate_loop(w)
+            if l_w.real < 0:
+                g = 1.0 / abs(l_w)
+                if g < gm:
+                    gm, wcg = float(g), float(w)
+
+        self._margins = {'gain_margin': gm, 'phase_margin': pm, 'wcg': wcg, 'wcp': wcp}
+        return self._margins
+
+    def _evaluate_loop(self, w: float) -> complex:
+        """L(jω) exacto en una frecuencia fuera de la grilla."""
+        return complex(self._G_eval(w)[0] * self._K_eval(w)[0])
+
+
+_cache: "OrderedDict[tuple, LoopFrequencyResponse]" = OrderedDict()
+
+
+def get_loop_response(G, K_ctrl, omega: Optional[np.ndarray] = None) -> LoopFrequencyResponse:
+    """
+    LoopFrequencyResponse cacheado por (planta, controlador, grilla).
+
+    Síntesis, normas, márgenes y Bode del mismo controlador comparten una
+    única evaluación.
+    """
+    omega_arr = DEFAULT_OMEGA if omega is None else np.asarray(omega, dtype=np.float64)
+    key = (_system_key(G), _system_key(K_ctrl), omega_arr.tobytes())
+    response = _cache.get(key)
+    if response is not None:
+        _cache.move_to_end(key)
+        return response
+    response = LoopFrequencyResponse(G, K_ctrl, omega_arr)
+    _cache[key] = response
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return response
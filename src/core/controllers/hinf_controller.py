@@ -16,11 +16,14 @@ Refactorizado: 2025-12-15
 import logging
 import traceback
 import time
+import concurrent.futures
 import numpy as np
 import control as ct
 from dataclasses import dataclass, field
 from typing import Optional, Tuple, Dict, Any, List
 
+from core.controllers.frequency_response import get_loop_response
+
 logger = logging.getLogger('MotorControl_L206')
 
 
@@ -300,7 +303,7 @@ class HInfController:
                 )
             
             # 11. Calcular márgenes y normas
-            margins = self._calculate_margins(G * K_ctrl)
+            margins = self._calculate_margins(G, K_ctrl)
             norms = self._calculate_norms(G, K_ctrl)
             
             logger.info(f"✅ Síntesis completada: γ={gam:.4f}, Kp={Kp:.4f}, Ki={Ki:.4f}")
@@ -1052,18 +1055,22 @@ class HInfController:
     # CÁLCULO DE MÁRGENES
     # =========================================================================
     
-    def _calculate_margins(self, L) -> Dict:
+    def _calculate_margins(self, G, K_ctrl) -> Dict:
         """
-        Calcula márgenes de ganancia y fase.
+        Calcula márgenes de ganancia y fase del lazo G*K.
+        
+        Usa la respuesta en frecuencia compartida con _calculate_norms.
         
         Args:
-            L: Lazo abierto G*K
+            G: Planta
+            K_ctrl: Controlador
             
         Returns:
             Dict con márgenes
         """
         try:
-            gm, pm, wcg, wcp = ct.margin(L)
+            m = get_loop_response(G, K_ctrl).margins()
+            gm, pm, wcg, wcp = m['gain_margin'], m['phase_margin'], m['wcg'], m['wcp']
             
             return {
                 'gain_margin': gm if np.isfinite(gm) else float('inf'),
@@ -1084,6 +1091,10 @@ class HInfController:
         """
         Calcula normas H∞ de sensibilidad.
         
+        S, K·S y T se evalúan una sola vez por controlador sobre la grilla
+        común (core.controllers.frequency_response) y se ponderan con
+        W1, W2 y W3.
+        
         Args:
             G: Planta
             K_ctrl: Controlador
@@ -1092,39 +1103,7 @@ class HInfController:
             Dict con normas
         """
         try:
-            L = G * K_ctrl
-            S = ct.feedback(1, L)
-            T = ct.feedback(L, 1)
-            
-            omega = np.logspace(-2, 3, 500)
-            
-            # W1*S
-            W1S = self.W1 * S
-            mag_W1S, _, _ = ct.frequency_response(W1S, omega)
-            if mag_W1S.ndim > 1:
-                mag_W1S = mag_W1S[0, :]
-            norm_W1S = float(np.max(np.abs(mag_W1S)))
-            
-            # W2*K*S
-            W2KS = self.W2 * K_ctrl * S
-            mag_W2KS, _, _ = ct.frequency_response(W2KS, omega)
-            if mag_W2KS.ndim > 1:
-                mag_W2KS = mag_W2KS[0, :]
-            norm_W2KS = float(np.max(np.abs(mag_W2KS)))
-            
-            # W3*T
-            W3T = self.W3 * T
-            mag_W3T, _, _ = ct.frequency_response(W3T, omega)
-            if mag_W3T.ndim > 1:
-                mag_W3T = mag_W3T[0, :]
-            norm_W3T = float(np.max(np.abs(mag_W3T)))
-            
-            return {
-                'norm_W1S': norm_W1S,
-                'norm_W2KS': norm_W2KS,
-                'norm_W3T': norm_W3T,
-                'gamma_verified': max(norm_W1S, norm_W2KS, norm_W3T)
-            }
+            return get_loop_response(G, K_ctrl).weighted_norms(self.W1, self.W2, self.W3)
             
         except Exception as e:
             logger.warning(f"Error calculando normas: {e}")
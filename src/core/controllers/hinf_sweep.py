@@ -0,0 +1,318 @@
+"""
+Barrido Paralelo de Ponderaciones H∞
+====================================
+
+Ejecuta HInfController.synthesize sobre una grilla de parámetros de
+ponderación (Ms, wb, eps, U_max, w_unc, eps_T de _build_weights) en un pool
+de procesos, con el mismo límite SYNTHESIS_TIMEOUT por síntesis, y ordena los
+resultados:
+
+    1. Síntesis exitosa y estable
+    2. Cumple márgenes mínimos (MF ≥ min_phase_margin, MG ≥ min_gain_margin_db)
+    3. Menor γ
+    4. Menor orden del controlador (reducido)
+    5. Mayor margen de fase
+
+Cada síntesis exitosa se guarda en una caché JSON persistente (HINF_SWEEP_CACHE_FILE)
+con clave (planta, ponderaciones, método): repetir una configuración ya
+sintetizada no vuelve a ejecutar mixsyn.
+
+Uso:
+    sweep = HInfWeightSweep()
+    base = SynthesisConfig(K=0.56, tau=0.033)
+    ranking = sweep.run(base, {'Ms': [1.2, 1.5, 2.0], 'wb': [2, 5, 10]})
+    best = ranking[0]  # dict con gamma, margins, Kp, Ki, config...
+    config = sweep.to_config(best)
+
+Autor: Sistema de Control L206
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import itertools
+import multiprocessing
+from dataclasses import asdict, replace
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import control as ct
+
+from config.constants import HINF_SWEEP_CACHE_FILE
+from core.controllers.hinf_controller import HInfController, SynthesisConfig
+
+logger = logging.getLogger('MotorControl_L206')
+
+# Parámetros de SynthesisConfig que se pueden barrer
+SWEEP_PARAMETERS = ('Ms', 'wb', 'eps', 'U_max', 'w_unc', 'eps_T')
+
+
+def _finite(value, default=None):
+    """float JSON-compatible (inf/NaN → default)."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return default
+    return value if np.isfinite(value) else default
+
+
+def _synthesis_worker(config_dict: Dict) -> Dict:
+    """
+    Ejecuta una síntesis en un proceso del pool.
+
+    Retorna solo datos serializables (sin objetos de python-control) para
+    poder enviarlos al proceso principal y guardarlos en la caché.
+    """
+    t_start = time.perf_counter()
+    result = HInfController().synthesize(SynthesisConfig(**config_dict))
+    entry = {
+        'config': config_dict,
+        'success': bool(result.success),
+        'message': result.message,
+        'gamma': _finite(result.gamma),
+        'Kp': _finite(result.Kp),
+        'Ki': _finite(result.Ki),
+        'is_stable': bool(result.is_stable),
+        'method_used': result.method_used,
+        'margins': {k: _finite(v) for k, v in (result.margins or {}).items()},
+        'norms': {k: _finite(v) for k, v in (result.norms or {}).items()},
+        'order': None,
+        'order_full': None,
+        'controller_tf': None,
+        'elapsed_s': 0.0,
+    }
+    if result.success and result.controller is not None:
+        K_tf = ct.tf(result.controller)
+        entry['controller_tf'] = [np.ravel(K_tf.num[0][0]).tolist(),
+                                  np.ravel(K_tf.den[0][0]).tolist()]
+        entry['order'] = len(entry['controller_tf'][1]) - 1
+        entry['order_full'] = int(getattr(result.controller_full, 'nstates',
+                                          entry['order']))
+    entry['elapsed_s'] = time.perf_counter() - t_start
+    return entry
+
+
+class HInfWeightSweep:
+    """Barrido de ponderaciones H∞ en paralelo con caché persistente."""
+
+    def __init__(self, cache_path: Optional[str] = HINF_SWEEP_CACHE_FILE,
+                 max_workers: Optional[int] = None,
+                 timeout_s: float = HInfController.SYNTHESIS_TIMEOUT,
+                 min_phase_margin: float = 30.0, min_gain_margin_db: float = 6.0):
+        """
+        Args:
+            cache_path: Archivo JSON de caché (None = solo en memoria)
+            max_workers: Procesos del pool (por defecto núcleos - 1)
+            timeout_s: Límite por síntesis (SYNTHESIS_TIMEOUT)
+            min_phase_margin: Margen de fase mínimo aceptable [°]
+            min_gain_margin_db: Margen de ganancia mínimo aceptable [dB]
+        """
+        self.cache_path = cache_path
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.timeout_s = timeout_s
+        self.min_phase_margin = min_phase_margin
+        self.min_gain_margin_db = min_gain_margin_db
+        self._cache: Dict[str, Dict] = {}
+        self._load_cache()
+
+    # ------------------------------------------------------------------
+    # Caché
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def cache_key(config: SynthesisConfig) -> str:
+        """Clave estable de (planta, ponderaciones, método)."""
+        data = {k: (round(v, 12) if isinstance(v, float) else v)
+                for k, v in asdict(config).items()}
+        return hashlib.sha1(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _load_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                self._cache = json.load(f).get('results', {})
+            logger.info(f"[HInfSweep] Caché cargada: {len(self._cache)} síntesis")
+        except (OSError, ValueError) as e:
+            logger.warning(f"[HInfSweep] No se pudo leer la caché {self.cache_path}: {e}")
+            self._cache = {}
+
+    def _save_cache(self):
+        if not self.cache_path:
+            return
+        tmp_path = self.cache_path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'results': self._cache}, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.warning(f"[HInfSweep] No se pudo guardar la caché: {e}")
+
+    def clear_cache(self):
+        """Borra la caché (memoria y disco)."""
+        self._cache = {}
+        if self.cache_path and os.path.exists(self.cache_path):
+            os.remove(self.cache_path)
+
+    # ------------------------------------------------------------------
+    # Grilla y ejecución
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def build_grid(base_config: SynthesisConfig,
+                   grid: Dict[str, Sequence[float]]) -> List[SynthesisConfig]:
+        """
+        Producto cartesiano de los valores de cada parámetro sobre base_config.
+
+        Raises:
+            ValueError: Si se barre un parámetro que no es de ponderación
+        """
+        unknown = set(grid) - set(SWEEP_PARAMETERS)
+        if unknown:
+            raise ValueError(f"Parámetros no barribles: {sorted(unknown)} "
+                             f"(válidos: {', '.join(SWEEP_PARAMETERS)})")
+        names = list(grid)
+        return [replace(base_config, **dict(zip(names, map(float, values))))
+                for values in itertools.product(*(grid[n] for n in names))]
+
+    def run(self, base_config: SynthesisConfig, grid: Dict[str, Sequence[float]],
+            progress_callback: Optional[Callable[[int, int], None]] = None) -> List[Dict]:
+        """
+        Sintetiza todas las combinaciones de la grilla y retorna el ranking.
+
+        Args:
+            base_config: Planta (K, tau), método y valores no barridos
+            grid: {parámetro: valores} (ver SWEEP_PARAMETERS)
+            progress_callback: Llamado con (completadas, total)
+
+        Returns:
+            Lista de dicts ordenada (mejor primero). Cada dict tiene config,
+            success, gamma, Kp, Ki, margins, norms, order, order_full,
+            controller_tf, elapsed_s, cached, rank y meets_margins.
+        """
+        configs = self.build_grid(base_config, grid)
+        total = len(configs)
+        entries: Dict[str, Dict] = {}
+        pending = []
+        for config in configs:
+            key = self.cache_key(config)
+            if key in entries:
+                continue
+            if key in self._cache:
+                entries[key] = dict(self._cache[key], cached=True)
+            else:
+                pending.append((key, config))
+
+        done = len(entries)
+        if progress_callback:
+            progress_callback(done, total)
+        logger.info(f"[HInfSweep] {total} combinaciones: {done} en caché, "
+                    f"{len(pending)} a sintetizar con {self.max_workers} procesos")
+
+        t_start = time.perf_counter()
+        for key, entry in self._run_pool(pending):
+            entries[key] = dict(entry, cached=False)
+            if entry['success']:
+                # Los fallos no se guardan: pueden deberse al entorno (slycot, timeout)
+                self._cache[key] = entry
+            done += 1
+            if progress_callback:
+                progress_callback(done, total)
+        if pending:
+            self._save_cache()
+            logger.info(f"[HInfSweep] {len(pending)} síntesis en {time.perf_counter() - t_start:.1f}s")
+
+        return self.rank(list(entries.values()))
+
+    def _run_pool(self, pending):
+        """
+        Genera (key, entry) a medida que terminan las síntesis.
+
+        Se mantienen como máximo max_workers tareas en vuelo para que el
+        plazo de cada una corra desde su inicio real. Si alguna excede
+        timeout_s el pool se termina (mixsyn no se puede interrumpir) y las
+        tareas restantes continúan en un pool nuevo.
+        """
+        queue = list(reversed(pending))
+        while queue:
+            pool = multiprocessing.Pool(processes=min(self.max_workers, len(queue)))
+            in_flight = {}
+            timed_out = False
+            try:
+                while (queue or in_flight) and not timed_out:
+                    while queue and len(in_flight) < self.max_workers:
+                        key, config = queue.pop()
+                        async_result = pool.apply_async(_synthesis_worker, (asdict(config),))
+                        in_flight[key] = (config, async_result, time.monotonic() + self.timeout_s)
+                    for key in list(in_flight):
+                        config, async_result, deadline = in_flight[key]
+                        if async_result.ready():
+                            del in_flight[key]
+                            try:
+                                yield key, async_result.get()
+                            except Exception as e:
+                                yield key, self._failed_entry(config, f"Error: {e}")
+                        elif time.monotonic() > deadline:
+                            del in_flight[key]
+                            timed_out = True
+                            logger.warning(f"[HInfSweep] Timeout ({self.timeout_s}s): {asdict(config)}")
+                            yield key, self._failed_entry(config, 'timeout')
+                    time.sleep(0.01)
+            finally:
+                pool.terminate()
+                pool.join()
+            # Las tareas en vuelo al terminar el pool se reintentan
+            queue.extend((key, config) for key, (config, _, _) in in_flight.items())
+
+    @staticmethod
+    def _failed_entry(config: SynthesisConfig, message: str) -> Dict:
+        return {'config': asdict(config), 'success': False, 'message': message,
+                'gamma': None, 'Kp': None, 'Ki': None, 'is_stable': False,
+                'method_used': config.method, 'margins': {}, 'norms': {},
+                'order': None, 'order_full': None, 'controller_tf': None,
+                'elapsed_s': 0.0}
+
+    # ------------------------------------------------------------------
+    # Ranking
+    # ------------------------------------------------------------------
+
+    def _meets_margins(self, entry: Dict) -> bool:
+        margins = entry.get('margins') or {}
+        pm = margins.get('phase_margin') or 0.0
+        gm_db = margins.get('gm_db')
+        # gm_db None = margen infinito (se guardó inf como None)
+        return pm >= self.min_phase_margin and (gm_db is None or gm_db >= self.min_gain_margin_db)
+
+    def rank(self, entries: List[Dict]) -> List[Dict]:
+        """Ordena resultados: estables, con márgenes, menor γ, menor orden, mayor MF."""
+        def sort_key(entry):
+            ok = entry['success'] and entry['is_stable']
+            gamma = entry['gamma'] if entry['gamma'] is not None else float('inf')
+            order = entry['order'] if entry['order'] is not None else 99
+            pm = (entry.get('margins') or {}).get('phase_margin') or 0.0
+            return (not ok, not (ok and self._meets_margins(entry)), gamma, order, -pm)
+
+        ranked = sorted(entries, key=sort_key)
+        for i, entry in enumerate(ranked):
+            entry['rank'] = i + 1
+            entry['meets_margins'] = entry['success'] and self._meets_margins(entry)
+        return ranked
+
+    # ------------------------------------------------------------------
+    # Conversión de resultados
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def to_config(entry: Dict) -> SynthesisConfig:
+        """SynthesisConfig de un resultado (para re-sintetizar con HInfController)."""
+        return SynthesisConfig(**entry['config'])
+
+    @staticmethod
+    def to_controller(entry: Dict):
+        """Controlador reducido como ct.TransferFunction (None si falló)."""
+        if not entry.get('controller_tf'):
+            return None
+        num, den = entry['controller_tf']
+        return ct.tf(num, den)
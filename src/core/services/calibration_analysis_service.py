@@ -9,6 +9,7 @@ Incluye:
 - Posición con línea de homogeneidad y barras de error
 - PWM vs Tiempo
 - Respuesta al escalón: Predicción (fitted) vs Real
+- Identificación en lote de todos los escalones de la grabación
 
 Creado: 2026-01-07
 """
@@ -21,8 +22,17 @@ import matplotlib.pyplot as plt
 from scipy.optimize import curve_fit
 from matplotlib.figure import Figure
 
+from data.columnar import load_recording, COLUMNAR_EXTENSION
+from core.analysis.step_identification import BatchStepIdentifier
+
 logger = logging.getLogger('MotorControl_L206')
 
+# Criterio para preferir la estimación en lote sobre la del CSV (método 63.2%)
+BATCH_MIN_STEPS = 3           # Escalones no-outlier mínimos
+BATCH_MAX_K_CV = 0.10         # Dispersión máxima de K entre escalones
+BATCH_MAX_TAU_CV = 0.25       # Dispersión máxima de τ entre escalones
+BATCH_MIN_CONFIDENCE = 0.7    # Confianza media mínima
+
 
 class CalibrationAnalysisService:
     """Servicio para generar gráficos de análisis de calibración."""
@@ -119,7 +129,7 @@ class CalibrationAnalysisService:
         
         # Buscar archivos
         for file in os.listdir(base_path):
-            if file.endswith('.csv'):
+            if file.endswith(('.csv', COLUMNAR_EXTENSION)):
                 file_lower = file.lower()
                 
                 # Motor A
@@ -142,7 +152,7 @@ class CalibrationAnalysisService:
     def load_motor_data(csv_path, motor_name):
         """Carga datos de calibración del motor."""
         logger.info(f"Cargando datos de {motor_name} desde {csv_path}")
-        df = pd.read_csv(csv_path)
+        df = load_recording(csv_path)
         
         time_ms = df['Timestamp_ms'].values
         time_s = time_ms / 1000.0
@@ -170,18 +180,14 @@ class CalibrationAnalysisService:
         Returns:
             tuple: (sensor_um, intercept, slope)
         """
-        from config.constants import CALIBRATION_X, CALIBRATION_Y
-        
-        if motor_name == "Motor A":
-            cal = CALIBRATION_X
-        else:  # Motor B
-            cal = CALIBRATION_Y
+        from config.constants import get_calibration_snapshot
         
-        intercept = cal['intercept']
-        slope = cal['slope']
+        cal = get_calibration_snapshot()
+        axis = 'x' if motor_name == "Motor A" else 'y'  # Motor B → eje Y
+        intercept, slope = cal.axis(axis)
         
         # Aplicar calibración (relación inversa para estos sensores)
-        sensor_um = intercept - slope * sensor_adc
+        sensor_um = cal.adc_to_um(sensor_adc, axis)
         
         logger.info(f"{motor_name}: intercept={intercept:.2f}µm, slope={slope:.4f}µm/ADC")
         
@@ -293,6 +299,78 @@ class CalibrationAnalysisService:
         
         return K, tau
     
+    @staticmethod
+    def identify_all_steps(time_s, sensor_um, pwm, motor_name):
+        """
+        Identifica K, τ y tiempo muerto de todos los escalones de la grabación.
+
+        Args:
+            time_s: Array de tiempo en segundos
+            sensor_um: Array de posición en µm
+            pwm: Array de señal PWM
+            motor_name: "Motor A" o "Motor B"
+
+        Returns:
+            dict: Resultado de BatchStepIdentifier.identify (steps, summary, ...)
+        """
+        logger.info(f"[{motor_name}] Identificación en lote de escalones...")
+        result = BatchStepIdentifier().identify(time_s, sensor_um, pwm)
+        logger.info(f"[{motor_name}] {result['message']}")
+        return result
+    
+    @staticmethod
+    def batch_estimate_is_reliable(overall):
+        """
+        Indica si la estimación en lote cumple el criterio de calidad.
+        
+        Args:
+            overall: summary['all'] de BatchStepIdentifier.identify
+            
+        Returns:
+            tuple: (bool, motivo del rechazo o '')
+        """
+        n_steps = overall.get('n_steps', 0)
+        if n_steps < BATCH_MIN_STEPS:
+            return False, f"{n_steps} escalones válidos (mínimo {BATCH_MIN_STEPS})"
+        if overall['K_cv'] > BATCH_MAX_K_CV:
+            return False, f"CV de K {overall['K_cv'] * 100:.1f}% > {BATCH_MAX_K_CV * 100:.0f}%"
+        if overall['tau_cv'] > BATCH_MAX_TAU_CV:
+            return False, f"CV de τ {overall['tau_cv'] * 100:.1f}% > {BATCH_MAX_TAU_CV * 100:.0f}%"
+        if overall['confidence'] < BATCH_MIN_CONFIDENCE:
+            return False, f"confianza {overall['confidence']:.2f} < {BATCH_MIN_CONFIDENCE:.2f}"
+        return True, ''
+    
+    @classmethod
+    def estimate_tf_params(cls, time_s, sensor_um, pwm, motor_name):
+        """
+        K y τ de la grabación.
+        
+        Por defecto se usan los parámetros del CSV (extract_tf_params_from_csv).
+        El promedio ponderado por confianza de todos los escalones los
+        reemplaza solo si su dispersión y confianza cumplen el criterio de
+        batch_estimate_is_reliable. Se registra qué fuente se usó.
+        
+        Returns:
+            tuple: (K, tau, batch_result) con K positivo en µm/s/PWM;
+            batch_result['tf_source'] es 'batch' o 'csv'
+        """
+        K, tau = cls.extract_tf_params_from_csv(time_s, sensor_um, pwm, motor_name)
+        batch = cls.identify_all_steps(time_s, sensor_um, pwm, motor_name)
+        overall = batch['summary'].get('all', {}) if batch['success'] else {}
+        reliable, reason = cls.batch_estimate_is_reliable(overall)
+        if reliable:
+            K, tau = abs(overall['K']), overall['tau']
+            batch['tf_source'] = 'batch'
+            logger.info(f"[{motor_name}] Fuente K/τ: lote ({overall['n_steps']} escalones): "
+                        f"K = {K:.4f} ± {overall['K_std']:.4f}, "
+                        f"τ = {tau:.4f} ± {overall['tau_std']:.4f} s, "
+                        f"θ = {overall['dead_time'] * 1000:.1f} ms")
+        else:
+            batch['tf_source'] = 'csv'
+            logger.info(f"[{motor_name}] Fuente K/τ: CSV (método 63.2%), K = {K:.4f}, τ = {tau:.4f} s; "
+                        f"estimación en lote descartada: {reason}")
+        return K, tau, batch
+    
     @staticmethod
     def validate_tf_params(K, tau, motor):
         """
@@ -530,7 +608,8 @@ Error predicción @ t=1s:
             motor_b_csv: Ruta al CSV de Motor B (None = auto-detectar)
             
         Returns:
-            dict: {'motor_a': Figure, 'motor_b': Figure, 'success': bool, 'message': str}
+            dict: {'motor_a': Figure, 'motor_b': Figure, 'steps_a': dict, 'steps_b': dict,
+                   'success': bool, 'message': str}
         """
         try:
             # Auto-detectar archivos si no se proporcionan
@@ -554,8 +633,8 @@ Error predicción @ t=1s:
             time_a, sensor_adc_a, pwm_a = cls.load_motor_data(motor_a_csv, "Motor A")
             sensor_um_a, intercept_a, slope_a = cls.calculate_calibration(sensor_adc_a, "Motor A")
             
-            # NUEVO: Extraer K y τ directamente del CSV
-            K_a, tau_a = cls.extract_tf_params_from_csv(time_a, sensor_um_a, pwm_a, "Motor A")
+            # Extraer K y τ de todos los escalones del CSV
+            K_a, tau_a, steps_a = cls.estimate_tf_params(time_a, sensor_um_a, pwm_a, "Motor A")
             
             # Validar parámetros
             if not cls.validate_tf_params(K_a, tau_a, 'A'):
@@ -572,8 +651,8 @@ Error predicción @ t=1s:
             time_b, sensor_adc_b, pwm_b = cls.load_motor_data(motor_b_csv, "Motor B")
             sensor_um_b, intercept_b, slope_b = cls.calculate_calibration(sensor_adc_b, "Motor B")
             
-            # NUEVO: Extraer K y τ directamente del CSV
-            K_b, tau_b = cls.extract_tf_params_from_csv(time_b, sensor_um_b, pwm_b, "Motor B")
+            # Extraer K y τ de todos los escalones del CSV
+            K_b, tau_b, steps_b = cls.estimate_tf_params(time_b, sensor_um_b, pwm_b, "Motor B")
             
             # Validar parámetros
             if not cls.validate_tf_params(K_b, tau_b, 'B'):
@@ -591,7 +670,9 @@ Error predicción @ t=1s:
                 'success': True,
                 'message': 'Análisis completado exitosamente',
                 'motor_a': fig_a,
-                'motor_b': fig_b
+                'motor_b': fig_b,
+                'steps_a': steps_a,
+                'steps_b': steps_b
             }
             
         except FileNotFoundError as e:
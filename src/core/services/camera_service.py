@@ -23,7 +23,10 @@ import cv2
 from PyQt5.QtCore import QObject, pyqtSignal
 
 from hardware.camera.camera_worker import CameraWorker
+from hardware.camera.frame_pool import FrameSlot
+from hardware.camera.simulated_camera import SimulatedThorlabsCamera, list_simulated_cameras
 from config.hardware_availability import THORLABS_AVAILABLE, Thorlabs
+from config.constants import CAMERA_SIMULATED
 
 
 logger = logging.getLogger('MotorControl_L206')
@@ -54,16 +57,48 @@ class CameraService(QObject):
     cameras_detected = pyqtSignal(list)  # lista de cámaras
     error_occurred = pyqtSignal(str)  # mensaje de error
 
-    def __init__(self, parent=None, thorlabs_available: bool = False):
+    def __init__(self, parent=None, thorlabs_available: bool = False, camera_factory=None):
+        """
+        Args:
+            parent: QObject padre.
+            thorlabs_available: Si pylablib/Thorlabs está disponible.
+            camera_factory: Callable que crea la cámara. Con CAMERA_SIMULATED
+                y sin factory se usa SimulatedThorlabsCamera.
+        """
         super().__init__(parent)
         self.worker: Optional[CameraWorker] = None
         self._thorlabs_available = thorlabs_available
+        if camera_factory is None and CAMERA_SIMULATED:
+            camera_factory = SimulatedThorlabsCamera
+        self._camera_factory = camera_factory
+        self._z_source = None  # Fuente de Z para la cámara simulada
+        self._display_params = {}  # Ajustes de DisplayConverter de la sesión
+        self._display_size = (0, 0)  # Tamaño del widget de video (0 = completo)
         self._pending_capture = False  # Flag para captura después de autofoco
 
     def set_thorlabs_available(self, available: bool) -> None:
         """Configura si el SDK de Thorlabs está disponible."""
         self._thorlabs_available = available
 
+    def set_simulated_z_source(self, z_source) -> None:
+        """Fuente de Z real para la cámara simulada (ej: SimulatedCFocusController.true_z).
+
+        Se aplica a la cámara conectada y a las que se conecten después;
+        no tiene efecto sobre una cámara física.
+        """
+        self._z_source = z_source
+        self._apply_z_source()
+
+    def _apply_z_source(self) -> None:
+        cam = self.worker.cam if self.worker is not None else None
+        if cam is not None and hasattr(cam, 'set_z_source'):
+            cam.set_z_source(self._z_source)
+
+    @property
+    def simulated(self) -> bool:
+        """True si la cámara la crea una factory propia (ej: cámara simulada)."""
+        return self._camera_factory is not None
+
     def connect_camera(self, thorlabs_available: Optional[bool] = None, buffer_size: int = 2) -> None:
         """Conecta con la cámara Thorlabs usando CameraWorker.
 
@@ -74,7 +109,7 @@ class CameraService(QObject):
         if thorlabs_available is not None:
             self._thorlabs_available = thorlabs_available
 
-        if not self._thorlabs_available:
+        if not self._thorlabs_available and not self.simulated:
             msg = "❌ Error: pylablib no está disponible"
             self.status_changed.emit(msg)
             logger.warning(f"[CameraService] {msg}")
@@ -83,10 +118,13 @@ class CameraService(QObject):
 
         if self.worker is None:
             logger.info("[CameraService] Creando CameraWorker...")
-            self.worker = CameraWorker()
+            self.worker = CameraWorker(camera_factory=self._camera_factory)
             self.worker.connection_success.connect(self._on_worker_connected)
             self.worker.new_frame_ready.connect(self._on_new_frame)
             self.worker.status_update.connect(self.status_changed.emit)
+            if self._display_params:
+                self.worker.display_converter.configure(**self._display_params)
+            self.worker.set_display_size(*self._display_size)
 
         # Configurar buffer inicial
         try:
@@ -153,13 +191,59 @@ class CameraService(QObject):
         """Reemite el resultado de conexión a la UI."""
         if success:
             logger.info(f"[CameraService] Cámara conectada: {info}")
+            self._apply_z_source()
         else:
             logger.error(f"[CameraService] Fallo de conexión: {info}")
         self.connected.emit(success, info)
 
-    def _on_new_frame(self, q_image, raw_frame) -> None:
-        """Reemite el frame nuevo para que la UI lo consuma."""
-        self.frame_ready.emit(q_image, raw_frame)
+    def _on_new_frame(self, q_image, slot) -> None:
+        """Reemite el frame nuevo para que la UI lo consuma.
+
+        El worker entrega una FrameSlot retenida: raw_frame es válido durante
+        la emisión de frame_ready (los receptores que lo guarden deben copiarlo)
+        y la ranura se devuelve al pool al terminar.
+        """
+        if not isinstance(slot, FrameSlot):
+            self.frame_ready.emit(q_image, slot)
+            return
+        try:
+            self.frame_ready.emit(q_image, slot.raw)
+        finally:
+            slot.release()
+
+    def set_display_conversion(self, **params) -> None:
+        """Ajusta la conversión a uint8 de la vista en vivo.
+
+        Args:
+            **params: Parámetros de DisplayConverter.configure (mode,
+                fixed_range, percentiles, update_interval, gamma).
+        """
+        if self.worker is None:
+            # Se aplica al crear el worker
+            self._display_params.update(params)
+            return
+        try:
+            self.worker.display_converter.configure(**params)
+            self._display_params.update(params)
+            logger.info(f"[CameraService] Conversión de display: {params}")
+        except ValueError as e:
+            self.error_occurred.emit(str(e))
+            logger.warning(f"[CameraService] {e}")
+
+    def set_display_size(self, width: int, height: int) -> None:
+        """Tamaño del widget de video para el stream de display reducido.
+
+        frame_ready entrega la QImage ya reducida a ese tamaño (en el thread
+        del worker); el raw_frame sigue siendo el frame completo para
+        captura y detección. 0 = display a resolución completa.
+        """
+        self._display_size = (int(width), int(height))
+        if self.worker is not None:
+            self.worker.set_display_size(width, height)
+
+    def snapshot_frame(self) -> Optional[np.ndarray]:
+        """Copia del frame actual, con su ranura retenida durante la copia."""
+        return self.worker.copy_current_frame() if self.worker is not None else None
 
     # ==================================================================
     # DETECCIÓN DE CÁMARAS
@@ -171,6 +255,12 @@ class CameraService(QObject):
         Returns:
             Lista de identificadores de cámaras encontradas.
         """
+        if self.simulated:
+            cameras = list_simulated_cameras()
+            self.status_changed.emit(f"✅ Cámara simulada: {cameras[0]}")
+            self.cameras_detected.emit(cameras)
+            return cameras
+
         if not self._thorlabs_available:
             self.status_changed.emit("❌ Error: pylablib no está instalado")
             self.error_occurred.emit("pylablib no está instalado")
@@ -309,7 +399,10 @@ class CameraService(QObject):
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = os.path.join(folder, f"captura_{timestamp}.{img_format}")
             
-            frame = self.worker.current_frame.copy()
+            frame = self.snapshot_frame()
+            if frame is None:
+                self.status_changed.emit("❌ Error: No hay frame disponible")
+                return None
             frame_info = f"Original: {frame.shape}, dtype={frame.dtype}"
             
             # Normalizar frame uint16 para visualización correcta
@@ -374,7 +467,10 @@ class CameraService(QObject):
         
         try:
             # Obtener frame actual
-            frame = self.worker.current_frame.copy()
+            frame = self.snapshot_frame()
+            if frame is None:
+                self.status_changed.emit(f"❌ Error: No hay frame disponible para imagen {image_index}")
+                return False
             h_orig, w_orig = frame.shape[:2]
             original_dtype = frame.dtype
             
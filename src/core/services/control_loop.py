@@ -0,0 +1,169 @@
+"""
+Thread de Lazo de Control con Periodo Fijo
+==========================================
+
+Ejecuta un paso de control (ej: TestService._execute_trajectory_step) a
+periodo fijo fuera del thread de la GUI, de modo que repintados, guardado
+de imágenes o resultados de detección no retrasen el lazo.
+
+El planificador usa time.monotonic() con instantes absolutos
+(t_k = t_0 + k·T): un ciclo retrasado no desplaza a los siguientes, por lo
+que no se acumula deriva. Si un paso excede el periodo se registra un
+overrun y se saltan los ciclos perdidos en lugar de ejecutarlos en ráfaga.
+
+Autor: Sistema de Control L206
+"""
+
+import math
+import time
+import heapq
+import logging
+import threading
+from typing import Callable
+
+from PyQt5.QtCore import QThread
+
+logger = logging.getLogger('MotorControl_L206')
+
+# Margen final de espera activa: Event.wait/sleep tienen granularidad gruesa
+# en algunos sistemas (Windows ~1-15 ms)
+SPIN_THRESHOLD_S = 0.001
+
+
+class ControlLoopThread(QThread):
+    """
+    Ejecuta `step` cada `period_s` segundos en un thread dedicado.
+
+    Estadísticas (get_stats):
+        cycles: Pasos ejecutados
+        overruns: Pasos cuya ejecución superó el periodo
+        missed_cycles: Ciclos saltados por overruns
+        jitter_*: Retraso del inicio de cada paso respecto a su instante
+            planificado (mean/std/max, en ms)
+        exec_*: Duración de los pasos (mean/max, en ms)
+    """
+
+    def __init__(self, step: Callable[[], None], period_s: float = 0.01,
+                 name: str = "control", parent=None):
+        """
+        Args:
+            step: Función sin argumentos a ejecutar cada periodo
+            period_s: Periodo del lazo en segundos
+            name: Nombre para logs
+            parent: Parent Qt object
+        """
+        super().__init__(parent)
+        self.step = step
+        self.period_s = period_s
+        self.name = name
+        self._stop_event = threading.Event()
+        self._pending = []  # heap de (instante, orden, callback)
+        self._pending_lock = threading.Lock()
+        self._pending_seq = 0
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.cycles = 0
+        self.overruns = 0
+        self.missed_cycles = 0
+        self._lat_mean = 0.0
+        self._lat_m2 = 0.0
+        self._lat_max = 0.0
+        self._exec_total = 0.0
+        self._exec_max = 0.0
+
+    def call_later(self, delay_s: float, callback: Callable[[], None]):
+        """
+        Programa `callback` para ejecutarse en este thread tras `delay_s`.
+
+        Equivalente a QTimer.singleShot para código que corre en el lazo
+        (un thread sin event loop no procesa QTimer).
+        """
+        with self._pending_lock:
+            self._pending_seq += 1
+            heapq.heappush(self._pending,
+                           (time.monotonic() + delay_s, self._pending_seq, callback))
+
+    def _run_pending(self, now: float):
+        while True:
+            with self._pending_lock:
+                if not self._pending or self._pending[0][0] > now:
+                    return
+                _, _, callback = heapq.heappop(self._pending)
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"[ControlLoop:{self.name}] Error en callback programado: {e}")
+
+    def _wait_until(self, deadline: float):
+        """Espera hasta `deadline` (monotónico) o hasta que se pida detener."""
+        remaining = deadline - time.monotonic()
+        if remaining > SPIN_THRESHOLD_S:
+            if self._stop_event.wait(remaining - SPIN_THRESHOLD_S):
+                return
+        while time.monotonic() < deadline:
+            time.sleep(0)
+
+    def run(self):
+        """Bucle de control con planificación absoluta (sin deriva)."""
+        period = self.period_s
+        logger.info(f"[ControlLoop:{self.name}] Iniciado ({1.0 / period:.0f} Hz)")
+        next_t = time.monotonic()
+        while not self._stop_event.is_set():
+            self._wait_until(next_t)
+            if self._stop_event.is_set():
+                break
+
+            start = time.monotonic()
+            lateness = start - next_t
+            try:
+                self._run_pending(start)
+                self.step()
+            except Exception as e:
+                logger.error(f"[ControlLoop:{self.name}] Error en paso de control: {e}")
+            elapsed = time.monotonic() - start
+
+            # Estadísticas (Welford para el retraso de inicio)
+            self.cycles += 1
+            delta = lateness - self._lat_mean
+            self._lat_mean += delta / self.cycles
+            self._lat_m2 += delta * (lateness - self._lat_mean)
+            self._lat_max = max(self._lat_max, lateness)
+            self._exec_total += elapsed
+            self._exec_max = max(self._exec_max, elapsed)
+            if elapsed > period:
+                self.overruns += 1
+
+            next_t += period
+            now = time.monotonic()
+            if now > next_t:
+                # Saltar ciclos perdidos manteniendo la grilla t_0 + k·T
+                skipped = int((now - next_t) / period) + 1
+                self.missed_cycles += skipped
+                next_t += skipped * period
+
+        logger.info(f"[ControlLoop:{self.name}] Detenido: {self.get_stats()}")
+
+    def stop(self, timeout_ms: int = 1000):
+        """
+        Detiene el lazo. Puede llamarse desde el propio paso de control
+        (en ese caso no espera al thread).
+        """
+        self._stop_event.set()
+        if QThread.currentThread() is not self and self.isRunning():
+            self.wait(timeout_ms)
+
+    def get_stats(self) -> dict:
+        """Retorna estadísticas de temporización del lazo."""
+        n = self.cycles
+        std = math.sqrt(self._lat_m2 / (n - 1)) if n > 1 else 0.0
+        return {
+            'cycles': n,
+            'overruns': self.overruns,
+            'missed_cycles': self.missed_cycles,
+            'jitter_mean_ms': self._lat_mean * 1000.0,
+            'jitter_std_ms': std * 1000.0,
+            'jitter_max_ms': self._lat_max * 1000.0,
+            'exec_mean_ms': (self._exec_total / n * 1000.0) if n else 0.0,
+            'exec_max_ms': self._exec_max * 1000.0,
+        }
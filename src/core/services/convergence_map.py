@@ -0,0 +1,216 @@
+"""
+Mapa de Convergencia por Región
+===============================
+
+Registra cómo converge TestService en cada región de la platina (celdas de
+CONVERGENCE_REGION_UM) y propone, para los puntos siguientes de la misma
+región, un plan de aproximación:
+
+    - min_pwm: piso del PWM adaptativo en la aproximación final, y
+      breakaway_pwm: PWM mínimo aplicado a un eje fuera de tolerancia para
+      vencer la fricción estática (0 = sin compensación). Ambos suben en
+      pasos de pwm_step cuando un punto fue "pegajoso" (fallback, más de
+      sticky_attempts ciclos cerca del objetivo o más de sticky_settle_s
+      desde que entró en la banda de fallback, sin contar el recorrido) y
+      bajan medio paso cuando converge rápido (aumento aditivo,
+      disminución lenta).
+    - tolerance_um: si la región termina casi siempre en fallback (o
+      aceptada con la tolerancia ya relajada), se usa directamente el error
+      que realmente alcanza (p75 × 1.05), acotado entre la tolerancia pedida
+      y la tolerancia de fallback.
+    - attempt_budget: 2 × p75 de los ciclos que necesitaron los puntos que
+      sí se estabilizaron; si nunca se estabiliza, min_attempt_budget. Evita
+      gastar MAX_ATTEMPTS_PER_POINT ciclos donde el fallback es seguro.
+
+Autor: Sistema de Control L206
+"""
+
+import math
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+import numpy as np
+
+logger = logging.getLogger('MotorControl_L206')
+
+
+@dataclass(frozen=True)
+class PointPlan:
+    """Parámetros de convergencia elegidos para un punto."""
+    tolerance_um: float
+    attempt_budget: int
+    min_pwm: float
+    breakaway_pwm: float = 0.0
+    learned: bool = False
+
+
+class _RegionStats:
+    """Historial reciente de una celda."""
+
+    def __init__(self, history: int, base_min_pwm: float):
+        self.attempts = deque(maxlen=history)
+        self.settle_s = deque(maxlen=history)
+        self.fallback = deque(maxlen=history)
+        self.relaxed = deque(maxlen=history)
+        self.error_um = deque(maxlen=history)
+        self.points = 0
+        self.lock_events = 0
+        self.min_pwm = base_min_pwm
+        self.breakaway_pwm = 0.0
+
+
+class ConvergenceMap:
+    """Estadísticas de convergencia por región y plan para puntos futuros."""
+
+    def __init__(self, region_um: float = 500.0, base_min_pwm: float = 80.0,
+                 max_min_pwm: float = 200.0, pwm_step: float = 20.0,
+                 sticky_attempts: int = 50, sticky_settle_s: float = 3.0,
+                 breakaway_start_pwm: float = 60.0, fallback_rate_threshold: float = 0.5,
+                 min_attempt_budget: int = 50, min_samples: int = 3, history: int = 20):
+        """
+        Args:
+            region_um: Lado de cada celda en µm
+            base_min_pwm: Piso de PWM por defecto (el de _get_adaptive_pwm_limit)
+            max_min_pwm: Piso máximo aprendido
+            pwm_step: Incremento del piso tras un punto pegajoso
+            sticky_attempts: Ciclos cerca del objetivo a partir de los cuales
+                un punto se considera pegajoso
+            sticky_settle_s: Tiempo dentro de la banda de fallback a partir
+                del cual un punto se considera pegajoso
+            breakaway_start_pwm: Primer valor de breakaway_pwm al activarse
+            fallback_rate_threshold: Fracción de fallbacks para relajar la tolerancia
+            min_attempt_budget: Presupuesto mínimo de ciclos por punto
+            min_samples: Puntos por región antes de usar sus estadísticas
+            history: Puntos recientes recordados por región
+        """
+        self.region_um = region_um
+        self.base_min_pwm = base_min_pwm
+        self.max_min_pwm = max_min_pwm
+        self.pwm_step = pwm_step
+        self.sticky_attempts = sticky_attempts
+        self.sticky_settle_s = sticky_settle_s
+        self.breakaway_start_pwm = breakaway_start_pwm
+        self.fallback_rate_threshold = fallback_rate_threshold
+        self.min_attempt_budget = min_attempt_budget
+        self.min_samples = min_samples
+        self.history = history
+        self._regions: Dict[Tuple[int, int], _RegionStats] = {}
+        self._lock = threading.Lock()
+
+    def region_of(self, x_um: float, y_um: float) -> Tuple[int, int]:
+        """Celda que contiene el punto (x, y)."""
+        return (int(math.floor(x_um / self.region_um)), int(math.floor(y_um / self.region_um)))
+
+    def record(self, x_um: float, y_um: float, attempts: int, settle_s: float,
+               fallback: bool, error_um: float, lock_events: int = 0, relaxed: bool = False):
+        """
+        Registra la convergencia de un punto aceptado.
+
+        Args:
+            x_um, y_um: Objetivo del punto
+            attempts: Ciclos cerca del objetivo hasta aceptarlo
+            settle_s: Tiempo desde la primera entrada en la banda de fallback
+                hasta aceptarlo (sin el recorrido)
+            fallback: True si se aceptó con la tolerancia de fallback
+            error_um: Mayor error de los ejes no bloqueados al aceptar
+            lock_events: Ejes bloqueados en el punto (_detect_axis_lock)
+            relaxed: True si se aceptó con la tolerancia relajada del plan
+                (error por encima de la tolerancia pedida)
+        """
+        key = self.region_of(x_um, y_um)
+        with self._lock:
+            region = self._regions.get(key)
+            if region is None:
+                region = self._regions[key] = _RegionStats(self.history, self.base_min_pwm)
+            region.points += 1
+            region.lock_events += lock_events
+            region.attempts.append(int(attempts))
+            region.settle_s.append(float(settle_s))
+            region.fallback.append(bool(fallback))
+            region.relaxed.append(bool(relaxed))
+            region.error_um.append(abs(float(error_um)))
+
+            if fallback or attempts > self.sticky_attempts or settle_s > self.sticky_settle_s:
+                region.min_pwm = min(self.max_min_pwm, region.min_pwm + self.pwm_step)
+                if region.breakaway_pwm == 0.0:
+                    region.breakaway_pwm = self.breakaway_start_pwm
+                else:
+                    region.breakaway_pwm = min(self.max_min_pwm, region.breakaway_pwm + self.pwm_step)
+            else:
+                region.min_pwm = max(self.base_min_pwm, region.min_pwm - self.pwm_step / 2.0)
+                region.breakaway_pwm -= self.pwm_step / 2.0
+                if region.breakaway_pwm < self.breakaway_start_pwm:
+                    region.breakaway_pwm = 0.0
+
+    def plan(self, x_um: float, y_um: float, tolerance_um: float,
+             fallback_tolerance_um: float, max_attempts: int) -> PointPlan:
+        """
+        Plan de convergencia para un punto.
+
+        Args:
+            x_um, y_um: Objetivo del punto
+            tolerance_um: Tolerancia pedida
+            fallback_tolerance_um: Tolerancia de fallback
+            max_attempts: Presupuesto máximo (MAX_ATTEMPTS_PER_POINT)
+
+        Returns:
+            PointPlan (valores por defecto si la región no tiene historial)
+        """
+        default = PointPlan(tolerance_um, max_attempts, self.base_min_pwm)
+        with self._lock:
+            region = self._regions.get(self.region_of(x_um, y_um))
+            if region is None or len(region.attempts) < self.min_samples:
+                return default
+            attempts = np.asarray(region.attempts)
+            fallback = np.asarray(region.fallback)
+            relaxed = np.asarray(region.relaxed)
+            errors = np.asarray(region.error_um)
+            min_pwm = region.min_pwm
+            breakaway_pwm = region.breakaway_pwm
+
+        # Las aceptaciones con tolerancia relajada siguen sin alcanzar la pedida
+        loose = fallback | relaxed
+        tolerance = tolerance_um
+        if loose.mean() >= self.fallback_rate_threshold:
+            reached = float(np.percentile(errors[loose], 75)) * 1.05
+            tolerance = min(fallback_tolerance_um, max(tolerance_um, reached))
+
+        stable = attempts[~fallback]
+        if len(stable):
+            budget = int(math.ceil(2.0 * np.percentile(stable, 75)))
+        else:
+            budget = self.min_attempt_budget
+        budget = max(self.min_attempt_budget, min(max_attempts, budget))
+
+        return PointPlan(tolerance, budget, min_pwm, breakaway_pwm, learned=True)
+
+    def clear(self):
+        """Olvida todas las regiones."""
+        with self._lock:
+            self._regions.clear()
+
+    def get_stats(self) -> Dict[Tuple[int, int], Dict]:
+        """
+        Resumen por región.
+
+        Returns:
+            dict {(ix, iy): {points, lock_events, attempts_median, settle_mean_s,
+            fallback_rate, relaxed_rate, min_pwm, breakaway_pwm}}
+        """
+        with self._lock:
+            return {
+                key: {
+                    'points': r.points,
+                    'lock_events': r.lock_events,
+                    'attempts_median': float(np.median(r.attempts)),
+                    'settle_mean_s': float(np.mean(r.settle_s)),
+                    'fallback_rate': float(np.mean(r.fallback)),
+                    'relaxed_rate': float(np.mean(r.relaxed)),
+                    'min_pwm': r.min_pwm,
+                    'breakaway_pwm': r.breakaway_pwm,
+                }
+                for key, r in self._regions.items() if r.attempts
+            }
@@ -27,7 +27,10 @@ from gui.windows import MatplotlibWindow
 from core.controllers.hinf_controller import (
     HInfController, SynthesisConfig, SynthesisResult
 )
-from config.constants import um_to_adc, DEADZONE_ADC, CALIBRATION_X
+from core.controllers.frequency_response import get_loop_response
+from core.controllers.discrete_controller import build_device_controller, to_arduino_header
+from config.constants import (um_to_adc, DEADZONE_ADC, CALIBRATION_X,
+                              FIXED_POINT_ERROR_RANGE_UM)
 
 logger = logging.getLogger("MotorControl_L206")
 
@@ -304,29 +307,19 @@ def plot_bode(tab):
         return
 
     try:
-        # Para CONTROL DE POSICIÓN: L(s) = G_pos(s) · K_hinf(s)
+        # Para CONTROL DE POSICIÓN: L(s) = G_pos(s) · K_hinf(s) = G_vel(s) · K_hinf(s) / s
+        # La evaluación de G_vel y K_hinf es la misma que usó la síntesis (caché)
         G_vel = tab.synthesized_plant  # K / (τs + 1)
         K_hinf = tab.synthesized_controller
+        loop = get_loop_response(G_vel, K_hinf)
         
-        # Agregar integrador para modelo de posición
-        integrator = ct.tf([1], [1, 0])  # 1/s
-        G_pos = G_vel * integrator  # K / (s·(τs + 1))
-        
-        L = G_pos * K_hinf
+        visible = (loop.omega >= 1e-2) & (loop.omega <= 1e3)
+        omega = loop.omega[visible]
+        L_pos = loop.L_position[visible]
+        mag = np.abs(L_pos)
+        phase = np.unwrap(np.angle(L_pos))
 
         fig = Figure(figsize=(12, 10), facecolor="#2E2E2E")
-        omega_eval = np.logspace(-2, 3, 500)
-        response = ct.frequency_response(L, omega_eval)
-
-        if hasattr(response, "omega"):
-            omega, mag, phase = response.omega, response.magnitude, response.phase
-        else:
-            mag, phase, omega = response
-
-        if hasattr(mag, "ndim") and mag.ndim > 1:
-            mag = mag[0, 0, :] if mag.ndim == 3 else mag[0, :]
-        if hasattr(phase, "ndim") and phase.ndim > 1:
-            phase = phase[0, 0, :] if phase.ndim == 3 else phase[0, :]
 
         # Magnitud
         ax1 = fig.add_subplot(211)
@@ -383,6 +376,14 @@ def export_controller(tab):
         tab.results_text.setText("❌ Error: Primero debes sintetizar el controlador.")
         return
 
+    # K escala el error de entrada del controlador en punto fijo y se guarda en el pickle
+    try:
+        K_value = abs(float(tab.K_input.text())) or 1.0
+    except ValueError:
+        tab.results_text.setText(f"❌ Error: K inválido ('{tab.K_input.text()}'). "
+                                 f"Ingresa la ganancia de la planta en µm/s/PWM.")
+        return
+
     try:
         # Pedir nombre personalizado al usuario
         from PyQt5.QtWidgets import QInputDialog
@@ -403,6 +404,7 @@ def export_controller(tab):
         name = re.sub(r'[<>:"/\\|?*]', '_', name.strip())
         filename = f"{name}.txt"
         pickle_filename = f"{name}.pkl"
+        header_filename = f"{name}_arduino.h"
 
         # Convertir a TransferFunction si es StateSpace
         controller = tab.synthesized_controller
@@ -433,6 +435,15 @@ def export_controller(tab):
             plant_num = np.array(plant.num[0][0]).flatten()
             plant_den = np.array(plant.den[0][0]).flatten()
 
+        # Controlador discreto en punto fijo para el Arduino (el error de
+        # entrada está en unidades del lazo: error_um / |K|)
+        u_max = float(getattr(tab, 'Umax_designed', 100))
+        device = None
+        try:
+            device = build_device_controller(controller, u_max, FIXED_POINT_ERROR_RANGE_UM / K_value)
+        except Exception as e:
+            logger.warning(f"No se pudo generar el controlador en punto fijo: {e}")
+
         # Escribir archivo de texto
         with open(filename, 'w', encoding='utf-8') as f:
             f.write("=" * 70 + "\n")
@@ -454,6 +465,25 @@ def export_controller(tab):
             f.write(f"  Ms = {tab.w1_Ms.text()}\n")
             f.write(f"  ωb = {tab.w1_wb.text()} rad/s\n")
             f.write(f"  U_max = {tab.w2_umax.text()} PWM\n")
+            if device is not None:
+                discrete, quantized, report = device['discrete'], device['quantized'], device['report']
+                f.write(f"\nCONTROLADOR DISCRETO C(z) ({discrete.method}, Ts = {discrete.Ts * 1000:.1f} ms):\n")
+                f.write(f"  Numerador: {discrete.num}\n  Denominador: {discrete.den}\n")
+                f.write(f"\nPUNTO FIJO ({header_filename}):\n")
+                f.write(f"  Secciones: {quantized.n_sections}, señales Q{quantized.signal_frac_bits}\n")
+                f.write(f"  Error máx = {report['max_error']:.3e} PWM, SNR = {report['snr_db']:.1f} dB\n")
+                f.write(f"  Desbordes: acumulador {report['acc_overflows']}, estado {report['state_overflows']}\n")
+                f.write(f"  Desplazamiento máx de polos = {report['max_pole_shift']:.3e}\n")
+                for w in report['warnings']:
+                    f.write(f"  ⚠️ {w}\n")
+                if not report['ok']:
+                    f.write(f"  ❌ Verificación fallida: {header_filename} NO generado\n")
+
+        # Solo exportar la cabecera si la implementación entera fue verificada
+        header_ok = device is not None and device['report']['ok']
+        if header_ok:
+            with open(header_filename, 'w', encoding='utf-8') as hf:
+                hf.write(to_arduino_header(device['quantized']))
 
         # Guardar pickle
         controller_data = {
@@ -474,6 +504,17 @@ def export_controller(tab):
             'Kp': Kp,
             'Ki': Ki,
             'is_pi': is_pi,
+            'discrete': None if device is None else {
+                'num': device['discrete'].num.tolist(),
+                'den': device['discrete'].den.tolist(),
+                'Ts': device['discrete'].Ts,
+                'method': device['discrete'].method,
+                'coeffs': device['quantized'].coeffs.tolist(),
+                'shifts': device['quantized'].shifts.tolist(),
+                'signal_frac_bits': device['quantized'].signal_frac_bits,
+                'report': device['report'],
+                'exported': header_ok,
+            },
             'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
         }
 
@@ -481,6 +522,15 @@ def export_controller(tab):
             pickle.dump(controller_data, pf)
 
         tab.results_text.append(f"\n✅ Controlador '{name}' exportado:\n  📄 {filename}\n  💾 {pickle_filename}")
+        if header_ok:
+            report = device['report']
+            tab.results_text.append(
+                f"  🔌 {header_filename} (✅ punto fijo Q{device['quantized'].signal_frac_bits}: "
+                f"error máx {report['max_error']:.2e} PWM)")
+        elif device is not None:
+            tab.results_text.append(
+                f"  ⚠️ {header_filename} NO generado (verificación de punto fijo fallida): "
+                + "; ".join(device['report']['warnings']))
         logger.info(f"Controlador exportado: {filename}")
 
     except Exception as e:
@@ -640,8 +690,17 @@ def execute_hinf_control(tab):
         sensor_adc = tab.get_sensor_value_callback(sensor_key)
 
         if sensor_adc is None:
-            logger.warning(f"Sensor {sensor_key} retornó None")
+            # Sin datos o muestra vencida: detener el motor (el último PWM
+            # seguiría aplicado) y no actuar con información vieja
+            tab.send_command_callback('A,0,0')
+            if not getattr(tab, 'control_sensor_stale', False):
+                logger.warning(f"Sensor {sensor_key} sin datos recientes: PWM a 0, control en espera")
+                tab.results_text.append(f"⚠️ Sensor {sensor_key} sin datos recientes: PWM a 0")
+                tab.control_sensor_stale = True
             return
+        if getattr(tab, 'control_sensor_stale', False):
+            logger.info(f"Sensor {sensor_key} con datos nuevamente, control reanudado")
+        tab.control_sensor_stale = False
 
         # CONTROL EN ESPACIO µm (NO en ADC)
         # Esto garantiza homogeneidad independiente de no-linealidad del sensor
@@ -31,6 +31,8 @@ from PyQt5.QtCore import QObject, pyqtSignal, QTimer, QCoreApplication
 
 from core.services.microscopy_state import MicroscopyStateManager, MicroscopyState
 from core.validators import MicroscopyValidator, MicroscopyConfig, ValidationResult
+from core.trajectory.move_time_estimator import MoveTimeEstimator
+from core.utils.display_conversion import frame_to_uint8
 
 logger = logging.getLogger('MotorControl_L206')
 
@@ -98,6 +100,11 @@ class MicroscopyService(QObject):
         self._state_manager = MicroscopyStateManager()
         self._validator = MicroscopyValidator()
         
+        # Tiempos reales de movimiento aprendidos de TestService
+        self._move_estimator = MoveTimeEstimator()
+        if self._test_service is not None:
+            self._test_service.trajectory_move_timed.connect(self._move_estimator.on_move_timed)
+        
         # Configuración y parámetros
         self._microscopy_config: Optional[dict] = None
         self._delay_before_ms = 0
@@ -160,6 +167,12 @@ class MicroscopyService(QObject):
         
         logger.info("[MicroscopyService] ✓ Tolerancia: %.1fµm, Pausa: %.1fs", 
                    self._trajectory_tolerance, self._trajectory_pause)
+        
+        estimate = self.estimate_run_time(config, trajectory)
+        self.status_changed.emit(
+            f"⏱️ Duración estimada: {estimate['estimated_completion']} "
+            f"(movimiento {estimate['move_time_s']:.0f}s, {self._move_estimator.n_samples} movimientos medidos)"
+        )
 
         # VALIDACIÓN 3: Callbacks de control
         if not (self._set_dual_refs and self._start_dual_control and self._stop_dual_control):
@@ -253,6 +266,32 @@ class MicroscopyService(QObject):
         logger.info("[MicroscopyService] ✅ Trayectoria completa iniciada: %d puntos", total)
         return True
 
+    def estimate_run_time(self, config: dict, trajectory=None) -> dict:
+        """Estima la duración de la microscopía con el modelo de movimiento aprendido.
+
+        Args:
+            config: Configuración (mismas keys que start_microscopy)
+            trajectory: Puntos (x, y) en µm; por defecto los del proveedor
+
+        Returns:
+            dict de MicroscopyValidator.estimate_time (incluye per_point_s)
+        """
+        if trajectory is None and self._get_trajectory is not None:
+            trajectory = self._get_trajectory()
+        points = [] if trajectory is None else [tuple(p) for p in trajectory]
+        micro_config = MicroscopyConfig(
+            trajectory=points,
+            autofocus_enabled=bool(config.get('autofocus_enabled', False)),
+            delay_before=config.get('delay_before', 2.0),
+            delay_after=config.get('delay_after', 0.2),
+        )
+        return self._validator.estimate_time(micro_config, move_estimator=self._move_estimator)
+
+    @property
+    def move_estimator(self) -> MoveTimeEstimator:
+        """Estimador de tiempo de movimiento (historial de esta sesión)."""
+        return self._move_estimator
+
     def stop_microscopy(self) -> None:
         """Detiene la microscopia automatizada."""
         if not self._state_manager.is_active:
@@ -424,13 +463,9 @@ class MicroscopyService(QObject):
             self._resume_test_service()
             return
 
-        # Convertir uint16 -> uint8
+        # Convertir uint16 -> uint8 (tabla escalada al máximo del frame)
         if frame.dtype == np.uint16:
-            frame_max = frame.max()
-            if frame_max > 0:
-                frame_uint8 = (frame / frame_max * 255).astype(np.uint8)
-            else:
-                frame_uint8 = np.zeros_like(frame, dtype=np.uint8)
+            frame_uint8 = frame_to_uint8(frame)
         else:
             frame_uint8 = frame.astype(np.uint8)
 
@@ -679,8 +714,7 @@ class MicroscopyService(QObject):
         # Asegurar formato uint8 para análisis
         frame = frame_bgr
         if frame.dtype == np.uint16:
-            maxv = frame.max()
-            frame = (frame / maxv * 255).astype(np.uint8) if maxv > 0 else frame.astype(np.uint8)
+            frame = frame_to_uint8(frame)
 
         h_img, w_img = frame.shape[:2]
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if len(frame.shape) == 3 else frame
@@ -966,10 +1000,7 @@ class MicroscopyService(QObject):
                 
                 # Normalizar uint16 a uint8 si es necesario
                 if frame_copy.dtype == np.uint16:
-                    if frame_copy.max() > 0:
-                        frame_copy = (frame_copy / frame_copy.max() * 255).astype(np.uint8)
-                    else:
-                        frame_copy = frame_copy.astype(np.uint8)
+                    frame_copy = frame_to_uint8(frame_copy)
                 
                 # Generar nombre de archivo con sufijo de índice focal
                 # Ejemplo: sample_0001_f0.png (BPoF), sample_0001_f1.png (+offset), sample_0001_f2.png (-offset)
@@ -1077,10 +1108,7 @@ class MicroscopyService(QObject):
             
             # Normalizar uint16 a uint8 si es necesario
             if frame.dtype == np.uint16:
-                if frame.max() > 0:
-                    frame = (frame / frame.max() * 255).astype(np.uint8)
-                else:
-                    frame = frame.astype(np.uint8)
+                frame = frame_to_uint8(frame)
             
             # Obtener configuración
             save_folder = self._microscopy_config.get('save_folder', '.')
@@ -1126,10 +1154,7 @@ class MicroscopyService(QObject):
                 
                 # Normalizar uint16 a uint8 si es necesario
                 if frame_copy.dtype == np.uint16:
-                    if frame_copy.max() > 0:
-                        frame_copy = (frame_copy / frame_copy.max() * 255).astype(np.uint8)
-                    else:
-                        frame_copy = frame_copy.astype(np.uint8)
+                    frame_copy = frame_to_uint8(frame_copy)
                 
                 # Generar nombre de archivo con sufijo de índice focal
                 # Ejemplo: sample_0001_f0.png, sample_0001_f1.png (BPoF), sample_0001_f2.png
@@ -1166,10 +1191,7 @@ class MicroscopyService(QObject):
             
             # Normalizar uint16 a uint8 si es necesario
             if frame.dtype == np.uint16:
-                if frame.max() > 0:
-                    frame = (frame / frame.max() * 255).astype(np.uint8)
-                else:
-                    frame = frame.astype(np.uint8)
+                frame = frame_to_uint8(frame)
             
             # Obtener configuración
             save_folder = self._microscopy_config.get('save_folder', '.')
@@ -9,6 +9,8 @@ REFACTORIZADO: 2025-12-17
 - Lógica de ejecución de trayectorias movida desde TestTab
 - Comunicación por señales PyQt
 - Calibración dinámica desde config/constants.py
+- Lazo de control en thread dedicado (ControlLoopThread) con periodo
+  fijo y estadísticas de jitter/overrun (CONTROL_LOOP_THREADED)
 
 Señales emitidas:
 - control_status_changed: Estado del control (activo/inactivo)
@@ -25,14 +27,17 @@ import time
 from typing import Callable, Optional, Dict, List, Tuple
 from dataclasses import dataclass
 
-from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
 
 from config.constants import (
-    CALIBRATION_X, CALIBRATION_Y,
     DEADZONE_ADC, POSITION_TOLERANCE_UM, SETTLING_CYCLES,
     MAX_ATTEMPTS_PER_POINT, FALLBACK_TOLERANCE_MULTIPLIER,
-    um_to_adc, adc_to_um
+    CONTROL_LOOP_THREADED, CONTROL_PERIOD_S, SENSOR_STALE_TIMEOUT_S,
+    ADAPTIVE_CONVERGENCE_ENABLED, CONVERGENCE_REGION_UM,
+    get_calibration_snapshot
 )
+from core.services.control_loop import ControlLoopThread
+from core.services.convergence_map import ConvergenceMap, PointPlan
 
 logger = logging.getLogger('MotorControl_L206')
 
@@ -74,6 +79,7 @@ class TestService(QObject):
     trajectory_stopped = pyqtSignal(int, int)  # current_point, total_points
     trajectory_completed = pyqtSignal(int)  # total_points
     trajectory_point_reached = pyqtSignal(int, float, float, str)  # index, x, y, status
+    trajectory_move_timed = pyqtSignal(int, float, float, float)  # index, dx_um, dy_um, duration_s
     trajectory_feedback = pyqtSignal(float, float, float, float, bool, bool, int)  # target_x, target_y, error_x, error_y, lock_x, lock_y, settling
     
     # === SEÑALES GENERALES ===
@@ -87,6 +93,9 @@ class TestService(QObject):
         self._send_command: Optional[Callable[[str], None]] = None
         self._get_sensor_value: Optional[Callable[[str], Optional[float]]] = None
         
+        # Calibración congelada al iniciar cada control/trayectoria
+        self._calibration = get_calibration_snapshot()
+        
         # Controladores
         self._controller_a: Optional[ControllerConfig] = None
         self._controller_b: Optional[ControllerConfig] = None
@@ -94,7 +103,7 @@ class TestService(QObject):
         # Estado de control dual
         self._dual_active = False
         self._dual_paused = False  # NUEVO: Para pausar control XY durante captura
-        self._dual_timer: Optional[QTimer] = None
+        self._dual_timer = None  # QTimer o ControlLoopThread
         self._dual_ref_a_um = 0.0
         self._dual_ref_b_um = 0.0
         self._dual_integral_a = 0.0
@@ -106,7 +115,7 @@ class TestService(QObject):
         
         # Estado de trayectoria
         self._trajectory_active = False
-        self._trajectory_timer: Optional[QTimer] = None
+        self._trajectory_timer = None  # QTimer o ControlLoopThread
         self._trajectory: Optional[List[Tuple[float, float]]] = None
         self._trajectory_index = 0
         self._trajectory_config = TrajectoryConfig()
@@ -114,6 +123,23 @@ class TestService(QObject):
         self._trajectory_waiting = False
         self._traj_settling_counter = 0
         self._traj_near_attempts = 0
+        self._move_start_time = 0.0  # Inicio del movimiento al punto actual (self._clock)
+        self._band_entry_time = None  # Primera entrada en la banda de fallback (self._clock)
+        
+        # Convergencia aprendida por región (tolerancia, intentos y PWM mínimo por punto)
+        self._convergence_map = ConvergenceMap(CONVERGENCE_REGION_UM)
+        self._adaptive_convergence = ADAPTIVE_CONVERGENCE_ENABLED
+        self._point_plan: Optional[PointPlan] = None
+        
+        # Estadísticas del último lazo de control detenido
+        self._last_loop_stats: Dict[str, float] = {}
+        
+        # Ciclos seguidos con datos de sensor vencidos (get_sensor_value → None)
+        self._stale_cycles = 0
+        
+        # Reloj para Ts y modo de pasos manuales (simulación)
+        self._clock: Callable[[], float] = time.monotonic
+        self._manual_stepping = False
         
         logger.info("TestService inicializado")
     
@@ -161,6 +187,116 @@ class TestService(QObject):
             self._controller_b.sensor_key = sensor_key
             self._controller_b.invert = invert
     
+    # =========================================================================
+    # LAZO DE CONTROL
+    # =========================================================================
+    
+    def _start_control_loop(self, step: Callable[[], None], name: str):
+        """
+        Arranca la ejecución periódica de un paso de control.
+        
+        Returns:
+            ControlLoopThread (CONTROL_LOOP_THREADED), QTimer en el thread de la
+            GUI, o None en modo de pasos manuales
+        """
+        if self._manual_stepping:
+            return None
+        if CONTROL_LOOP_THREADED:
+            # parent=self: el thread sigue vivo si se detiene desde su propio paso
+            loop = ControlLoopThread(step, CONTROL_PERIOD_S, name, parent=self)
+            loop.finished.connect(loop.deleteLater)
+            loop.start()
+            return loop
+        timer = QTimer()
+        timer.timeout.connect(step)
+        timer.start(int(CONTROL_PERIOD_S * 1000))
+        return timer
+    
+    def _stop_control_loop(self, loop):
+        """
+        Detiene un lazo creado por _start_control_loop y guarda sus estadísticas.
+        
+        El ControlLoopThread se destruye (deleteLater) al terminar: quien lo
+        detiene debe soltar su referencia (atributo a None) y crear uno nuevo
+        para volver a arrancar.
+        """
+        try:
+            loop.stop()
+            if isinstance(loop, ControlLoopThread):
+                self._last_loop_stats = loop.get_stats()
+        except RuntimeError as e:
+            # Objeto Qt ya destruido: el lazo ya estaba detenido
+            logger.debug(f"[TestService] Lazo ya destruido al detener: {e}")
+    
+    def _call_later(self, delay_s: float, callback: Callable[[], None]):
+        """Programa un callback en el mismo thread que el lazo de trayectoria."""
+        if isinstance(self._trajectory_timer, ControlLoopThread) and self._trajectory_timer.isRunning():
+            self._trajectory_timer.call_later(delay_s, callback)
+        else:
+            QTimer.singleShot(int(delay_s * 1000), callback)
+    
+    def _run_on_loop(self, callback: Callable[[], None]):
+        """
+        Ejecuta `callback` en el thread del lazo de trayectoria.
+        
+        El paso de trayectoria lee y modifica el índice, _point_accepted y
+        _trajectory_paused; los cambios pedidos desde otro thread (GUI,
+        MicroscopyService) se encolan en el lazo para que ocurran entre dos
+        pasos. Sin lazo en thread propio (QTimer o pasos manuales) se
+        ejecuta directamente.
+        """
+        loop = self._trajectory_timer
+        if isinstance(loop, ControlLoopThread) and loop.isRunning() \
+                and QThread.currentThread() is not loop:
+            loop.call_later(0.0, callback)
+        else:
+            callback()
+    
+    def set_time_source(self, clock: Callable[[], float], manual_stepping: bool = True):
+        """
+        Reemplaza el reloj usado para Ts (ej: tiempo de una planta simulada).
+        
+        Args:
+            clock: Función que retorna el tiempo actual en segundos
+            manual_stepping: No arrancar lazos periódicos; quien simula llama
+                a run_control_step() después de avanzar su reloj
+        """
+        self._clock = clock
+        self._manual_stepping = manual_stepping
+    
+    def run_control_step(self):
+        """Ejecuta un paso del lazo activo (modo de pasos manuales)."""
+        if self._trajectory_active:
+            self._execute_trajectory_step()
+        elif self._dual_active:
+            self._execute_dual_control_step()
+    
+    def get_control_loop_stats(self) -> Dict[str, float]:
+        """
+        Retorna jitter/overrun del lazo activo (o del último detenido).
+        
+        Vacío si el lazo corre con QTimer (CONTROL_LOOP_THREADED = False).
+        """
+        for loop in (self._trajectory_timer, self._dual_timer):
+            if loop is None or not isinstance(loop, ControlLoopThread):
+                continue
+            if loop.isRunning():
+                return loop.get_stats()
+        return dict(self._last_loop_stats)
+    
+    def set_adaptive_convergence(self, enabled: bool):
+        """
+        Activa el modo de convergencia aprendida: tolerancia, presupuesto de
+        intentos y PWM mínimo de cada punto según el historial de su región.
+        Las estadísticas se registran siempre.
+        """
+        self._adaptive_convergence = enabled
+        logger.info(f"TestService: Convergencia adaptativa {'ACTIVADA' if enabled else 'DESACTIVADA'}")
+    
+    def get_convergence_stats(self) -> Dict:
+        """Estadísticas de convergencia por región (ver ConvergenceMap.get_stats)."""
+        return self._convergence_map.get_stats()
+    
     # =========================================================================
     # CONTROL DUAL
     # =========================================================================
@@ -191,7 +327,8 @@ class TestService(QObject):
             logger.error("TestService: No hay controladores")
             return False
         
-        # Guardar referencias
+        # Guardar referencias (con calibración fija durante el control)
+        self._calibration = get_calibration_snapshot()
         self._dual_ref_a_um = ref_a_um
         self._dual_ref_b_um = ref_b_um
         
@@ -201,7 +338,7 @@ class TestService(QObject):
         # Resetear variables
         self._dual_integral_a = 0.0
         self._dual_integral_b = 0.0
-        self._dual_last_time = time.time()
+        self._dual_last_time = self._clock()
         self._dual_position_reached = False
         self._dual_settling_counter = 0
         self._dual_log_counter = 0
@@ -209,10 +346,8 @@ class TestService(QObject):
         # Activar control
         self._dual_active = True
         
-        # Crear timer
-        self._dual_timer = QTimer()
-        self._dual_timer.timeout.connect(self._execute_dual_control_step)
-        self._dual_timer.start(10)  # 100Hz
+        # Crear lazo de control (100Hz)
+        self._dual_timer = self._start_control_loop(self._execute_dual_control_step, "dual")
         
         self.dual_control_started.emit()
         self.log_message.emit("🎮 Control Dual ACTIVO")
@@ -224,9 +359,9 @@ class TestService(QObject):
         """Detiene el control dual con freno activo."""
         logger.info("=== TestService: DETENIENDO CONTROL DUAL ===")
         
-        # Detener timer
+        # Detener lazo
         if self._dual_timer:
-            self._dual_timer.stop()
+            self._stop_control_loop(self._dual_timer)
             self._dual_timer = None
         
         # Freno activo
@@ -237,11 +372,45 @@ class TestService(QObject):
             self._send_command('M')
         
         self._dual_active = False
+        self._dual_paused = False
         
         self.dual_control_stopped.emit()
         self.log_message.emit("⏹️ Control Dual DETENIDO (Freno Activo)")
         logger.info("TestService: Control dual detenido")
     
+    def _read_sensors(self) -> Tuple[Optional[float], Optional[float], bool]:
+        """
+        Lee los sensores de los ejes con controlador configurado.
+        
+        get_sensor_value retorna None sin datos o con una muestra de más de
+        SENSOR_STALE_TIMEOUT_S. Eso es una falla, no un error cero: se
+        detienen los motores (_on_stale_sensors) y el llamador omite el
+        ciclo (sin integrar, sin contar settling, intentos ni aceptaciones).
+        
+        Returns:
+            tuple: (adc_a, adc_b, stale)
+        """
+        sensor_a = self._get_sensor_value(self._controller_a.sensor_key) if self._controller_a else None
+        sensor_b = self._get_sensor_value(self._controller_b.sensor_key) if self._controller_b else None
+        stale = ((self._controller_a is not None and sensor_a is None) or
+                 (self._controller_b is not None and sensor_b is None))
+        if stale:
+            self._on_stale_sensors()
+        elif self._stale_cycles:
+            logger.info(f"[TestService] Datos de sensor recuperados tras {self._stale_cycles} ciclos")
+            self._stale_cycles = 0
+        return sensor_a, sensor_b, stale
+    
+    def _on_stale_sensors(self):
+        """Datos de sensor vencidos: PWM a 0 y aviso (una vez por episodio)."""
+        self._send_command('A,0,0')
+        self._stale_cycles += 1
+        if self._stale_cycles == 1:
+            message = (f"⚠️ Sensores sin datos recientes (> {SENSOR_STALE_TIMEOUT_S * 1000:.0f} ms): "
+                       f"motores detenidos hasta recibir telemetría")
+            logger.warning(f"[TestService] {message}")
+            self.log_message.emit(message)
+    
     def _execute_dual_control_step(self):
         """Ejecuta un paso del control dual."""
         try:
@@ -253,10 +422,16 @@ class TestService(QObject):
                 # NO hacer logging aquí porque se llama 100 veces por segundo
                 return
             
-            current_time = time.time()
+            current_time = self._clock()
             Ts = current_time - self._dual_last_time
             self._dual_last_time = current_time
             
+            sensor_a, sensor_b, stale = self._read_sensors()
+            if stale:
+                # Falla de datos: sin integrar ni contar ciclos de settling
+                self._dual_settling_counter = 0
+                return
+            
             pwm_a = 0
             pwm_b = 0
             error_a_um = 0.0
@@ -264,12 +439,12 @@ class TestService(QObject):
             
             # Control Motor A (eje X)
             if self._controller_a:
-                sensor_adc = self._get_sensor_value(self._controller_a.sensor_key)
+                sensor_adc = sensor_a
                 
                 if sensor_adc is not None:
-                    ref_adc = um_to_adc(self._dual_ref_a_um, axis='x')
+                    ref_adc = self._calibration.um_to_adc(self._dual_ref_a_um, 'x')
                     error_adc = ref_adc - sensor_adc
-                    error_a_um = error_adc * CALIBRATION_X['slope']
+                    error_a_um = error_adc * self._calibration.x_slope
                     
                     if abs(error_adc) > DEADZONE_ADC:
                         self._dual_integral_a += error_adc * Ts
@@ -289,12 +464,12 @@ class TestService(QObject):
             
             # Control Motor B (eje Y)
             if self._controller_b:
-                sensor_adc = self._get_sensor_value(self._controller_b.sensor_key)
+                sensor_adc = sensor_b
                 
                 if sensor_adc is not None:
-                    ref_adc = um_to_adc(self._dual_ref_b_um, axis='y')
+                    ref_adc = self._calibration.um_to_adc(self._dual_ref_b_um, 'y')
                     error_adc = ref_adc - sensor_adc
-                    error_b_um = error_adc * CALIBRATION_Y['slope']
+                    error_b_um = error_adc * self._calibration.y_slope
                     
                     if abs(error_adc) > DEADZONE_ADC:
                         self._dual_integral_b += error_adc * Ts
@@ -413,6 +588,9 @@ class TestService(QObject):
         
         # Guardar configuración
         self._trajectory = list(trajectory)
+        # Calibración fija para toda la trayectoria y referencias ADC precalculadas
+        self._calibration = get_calibration_snapshot()
+        self._trajectory_adc = self._calibration.um_to_adc_xy(self._trajectory).tolist()
         self._trajectory_config.tolerance_um = tolerance_um
         self._trajectory_config.pause_s = pause_s
         self._trajectory_auto_advance = auto_advance  # NUEVO: modo auto-advance
@@ -438,17 +616,16 @@ class TestService(QObject):
         # Resetear integrales y contadores
         self._dual_integral_a = 0.0
         self._dual_integral_b = 0.0
-        self._dual_last_time = time.time()
+        self._dual_last_time = self._clock()
         self._traj_settling_counter = 0
         self._traj_near_attempts = 0
+        self._begin_trajectory_point()
         
         # Activar modo automático
         self._send_command('A,0,0')
         
-        # Crear timer
-        self._trajectory_timer = QTimer()
-        self._trajectory_timer.timeout.connect(self._execute_trajectory_step)
-        self._trajectory_timer.start(10)  # 100Hz
+        # Crear lazo de control (100Hz)
+        self._trajectory_timer = self._start_control_loop(self._execute_trajectory_step, "trayectoria")
         
         self.trajectory_started.emit(len(trajectory))
         self.log_message.emit(f"🚀 Ejecutando trayectoria: {len(trajectory)} puntos")
@@ -462,9 +639,9 @@ class TestService(QObject):
         
         self._trajectory_active = False
         
-        # Detener timer
+        # Detener lazo
         if self._trajectory_timer:
-            self._trajectory_timer.stop()
+            self._stop_control_loop(self._trajectory_timer)
             self._trajectory_timer = None
         
         # Freno activo
@@ -486,8 +663,11 @@ class TestService(QObject):
         if not self._trajectory_active:
             return
         
-        self._trajectory_paused = True
-        logger.info("[TestService] Trayectoria pausada - manteniendo posición")
+        def apply():
+            self._trajectory_paused = True
+            logger.info("[TestService] Trayectoria pausada - manteniendo posición")
+        
+        self._run_on_loop(apply)
     
     def pause_dual_control(self):
         """
@@ -507,7 +687,8 @@ class TestService(QObject):
         
         # CRÍTICO: DETENER el timer para que NO se ejecuten comandos XY
         if self._dual_timer:
-            self._dual_timer.stop()
+            self._stop_control_loop(self._dual_timer)
+            self._dual_timer = None  # El thread se destruye al terminar; resume crea uno nuevo
             logger.info("[TestService] 🛑 Timer del control dual XY DETENIDO")
         
         # Activar BRAKE para mantener posición
@@ -526,6 +707,10 @@ class TestService(QObject):
         """
         if self._dual_active and self._dual_paused:
             self._dual_paused = False
+            # Ts medido desde la reanudación (no desde la pausa)
+            self._dual_last_time = self._clock()
+            if self._dual_timer is None:
+                self._dual_timer = self._start_control_loop(self._execute_dual_control_step, "dual")
             logger.info("[TestService] ▶️  Control dual XY REANUDADO")
     
     def resume_trajectory(self, advance_to_next: bool = True):
@@ -536,8 +721,13 @@ class TestService(QObject):
             advance_to_next: Si True, avanza al siguiente punto (después de captura).
                            Si False, reanuda en el punto actual (pausa manual).
         
-        Este método es llamado explícitamente por MicroscopyService.
+        Este método es llamado explícitamente por MicroscopyService. El cambio
+        de estado se aplica en el thread del lazo de control (_run_on_loop).
         """
+        self._run_on_loop(lambda: self._apply_resume_trajectory(advance_to_next))
+    
+    def _apply_resume_trajectory(self, advance_to_next: bool):
+        """Aplica resume_trajectory (en el thread del lazo)."""
         if not self._trajectory_active:
             logger.warning("[TestService] Intento de reanudar trayectoria inactiva.")
             return
@@ -554,24 +744,13 @@ class TestService(QObject):
             # DEBUG: Estado ANTES de cambios
             logger.info(f"[DEBUG-RESUME] ANTES: índice={self._trajectory_index}, _point_accepted={self._point_accepted}, paused={self._trajectory_paused}, advance={advance_to_next}")
             
-            # PRIMERO: Actualizar todas las variables de estado
-            self._trajectory_paused = False
-            
             if advance_to_next:
                 # Avanzar al siguiente punto (después de captura completada)
-                self._trajectory_index += 1
-                
-                # CRÍTICO: Resetear flag de punto aceptado para el nuevo punto
-                # Sin esto, _accept_trajectory_point() detecta que el punto ya fue aceptado
-                # y el sistema queda atascado indefinidamente
-                self._point_accepted = False
-
-                # Resetear integrales al reanudar para evitar wind-up
-                self._dual_integral_a = 0.0
-                self._dual_integral_b = 0.0
+                self._advance_to_next_point()
             else:
                 # Pausa manual: NO avanzar, solo reanudar en punto actual
                 # NO resetear _point_accepted porque el punto ya fue alcanzado
+                self._trajectory_paused = False
                 logger.info("[TestService] Reanudando en punto actual sin avanzar")
             
             # DEBUG: Estado DESPUÉS de cambios
@@ -587,8 +766,13 @@ class TestService(QObject):
         
         logger.info("[TestService] ▶️  Auto-avanzando al siguiente punto (delay 100ms)")
         
-        # Delay pequeño de 100ms antes de avanzar
-        time.sleep(0.1)
+        # Delay pequeño de 100ms antes de avanzar (programado: no bloquea el lazo)
+        self._call_later(0.1, self._advance_to_next_point)
+    
+    def _advance_to_next_point(self):
+        """Pasa al siguiente punto y reanuda (en el thread del lazo)."""
+        if not self._trajectory_active:
+            return
         
         # Avanzar al siguiente punto
         self._trajectory_index += 1
@@ -600,16 +784,33 @@ class TestService(QObject):
         else:
             logger.info(f"[DEBUG] Nuevo índice: {self._trajectory_index} >= {len(self._trajectory)} (trayectoria completada)")
         
-        # Resetear flag de punto aceptado para el nuevo punto
+        # CRÍTICO: Resetear flag de punto aceptado para el nuevo punto
+        # Sin esto, _accept_trajectory_point() detecta que el punto ya fue aceptado
+        # y el sistema queda atascado indefinidamente
         self._point_accepted = False
+        self._begin_trajectory_point()
         
         # Reanudar trayectoria (desactivar pausa)
         self._trajectory_paused = False
         
-        # Resetear integrales
+        # Resetear integrales para evitar wind-up
         self._dual_integral_a = 0.0
         self._dual_integral_b = 0.0
     
+    def _begin_trajectory_point(self):
+        """Marca el inicio del movimiento al punto actual y elige su plan de convergencia."""
+        self._move_start_time = self._clock()
+        self._band_entry_time = None
+        self._point_plan = None
+        if self._adaptive_convergence and self._trajectory_index < len(self._trajectory):
+            target_x, target_y = self._trajectory[self._trajectory_index][:2]
+            tolerance = self._trajectory_config.tolerance_um
+            self._point_plan = self._convergence_map.plan(
+                target_x, target_y, tolerance,
+                tolerance * FALLBACK_TOLERANCE_MULTIPLIER, MAX_ATTEMPTS_PER_POINT)
+            if self._point_plan.learned:
+                logger.debug(f"[TestService] Plan punto {self._trajectory_index + 1}: {self._point_plan}")
+    
     def _get_adaptive_pwm_limit(self, axis: str, error_um: float) -> float:
         """Calcula PWM adaptativo según error, manteniendo mínimo de 80.
         
@@ -619,8 +820,14 @@ class TestService(QObject):
         
         - Modo MANUAL: PWM completo siempre
         - Modo AUTO: PWM adaptativo según error
+        
+        Con convergencia adaptativa el mínimo de 80 se reemplaza por el
+        aprendido para la región del punto (acotado por U_max).
         """
         base_umax = self._controller_a.U_max if axis == 'x' else self._controller_b.U_max
+        min_pwm = 80
+        if self._point_plan is not None:
+            min_pwm = max(80, min(base_umax, self._point_plan.min_pwm))
         
         # Desactivar PWM adaptativo en modo MANUAL
         # En ImgRecTab, sistema se detiene completamente → necesita PWM completo
@@ -634,10 +841,24 @@ class TestService(QObject):
             return base_umax
         elif abs(error_um) > 150:
             # Error medio: 70% de PWM (pero mínimo 80)
-            return max(80, base_umax * 0.7)
+            return max(min_pwm, base_umax * 0.7)
         else:
             # Aproximación final: PWM mínimo (80)
-            return 80
+            return min_pwm
+    
+    def _apply_breakaway(self, axis: str, pwm: int, error_um: float, tolerance: float) -> int:
+        """Eleva |pwm| al mínimo aprendido de la región si el eje sigue fuera de tolerancia.
+        
+        El mínimo aprendido se acota por U_max del eje (igual que min_pwm en
+        _get_adaptive_pwm_limit): nunca supera la saturación del controlador.
+        """
+        if self._point_plan is None or pwm == 0 or abs(error_um) < tolerance:
+            return pwm
+        base_umax = self._controller_a.U_max if axis == 'x' else self._controller_b.U_max
+        breakaway = int(min(base_umax, self._point_plan.breakaway_pwm))
+        if abs(pwm) >= breakaway:
+            return pwm
+        return breakaway if pwm > 0 else -breakaway
     
     def _detect_axis_lock(self, current_idx: int) -> Tuple[bool, bool]:
         """Detecta si algún eje debe bloquearse."""
@@ -669,8 +890,8 @@ class TestService(QObject):
                 return
             
             # Calcular Ts
-            Ts = time.time() - self._dual_last_time
-            self._dual_last_time = time.time()
+            Ts = self._clock() - self._dual_last_time
+            self._dual_last_time = self._clock()
             
             # Verificar si completamos
             if self._trajectory_index >= len(self._trajectory):
@@ -692,22 +913,35 @@ class TestService(QObject):
             # Detectar bloqueo de ejes
             lock_x, lock_y = self._detect_axis_lock(self._trajectory_index)
             
-            # Conversión a ADC
-            ref_adc_x = um_to_adc(target_x, axis='x')
-            ref_adc_y = um_to_adc(target_y, axis='y')
+            # Referencias ADC (precalculadas en start_trajectory)
+            ref_adc_x, ref_adc_y = self._trajectory_adc[self._trajectory_index]
+            
+            sensor_a, sensor_b, stale = self._read_sensors()
+            if stale:
+                # Falla de datos: sin integrar, sin settling, intentos ni aceptación
+                self._traj_settling_counter = 0
+                return
             
             pwm_a = 0
             pwm_b = 0
             error_x_um = 0.0
             error_y_um = 0.0
             
+            # Calcular tolerancias (y presupuesto de intentos)
+            tolerance = self._trajectory_config.tolerance_um
+            fallback_tolerance = tolerance * FALLBACK_TOLERANCE_MULTIPLIER
+            max_attempts = MAX_ATTEMPTS_PER_POINT
+            if self._point_plan is not None:
+                tolerance = self._point_plan.tolerance_um
+                max_attempts = self._point_plan.attempt_budget
+            
             # Control Motor A (eje X)
             if self._controller_a and not lock_x:
-                sensor_adc = self._get_sensor_value(self._controller_a.sensor_key)
+                sensor_adc = sensor_a
                 
                 if sensor_adc is not None:
                     error_adc = ref_adc_x - sensor_adc
-                    error_x_um = error_adc * CALIBRATION_X['slope']
+                    error_x_um = error_adc * self._calibration.x_slope
                     
                     if abs(error_adc) > DEADZONE_ADC:
                         self._dual_integral_a += error_adc * Ts
@@ -724,20 +958,21 @@ class TestService(QObject):
                         if abs(pwm_a) > U_max:
                             self._dual_integral_a -= error_adc * Ts
                             pwm_a = max(-U_max, min(U_max, pwm_a))
+                        pwm_a = self._apply_breakaway('x', pwm_a, error_x_um, tolerance)
             elif lock_x and self._controller_a:
-                sensor_adc = self._get_sensor_value(self._controller_a.sensor_key)
+                sensor_adc = sensor_a
                 if sensor_adc is not None:
                     error_adc = ref_adc_x - sensor_adc
-                    error_x_um = error_adc * CALIBRATION_X['slope']
+                    error_x_um = error_adc * self._calibration.x_slope
                 pwm_a = 0
             
             # Control Motor B (eje Y)
             if self._controller_b and not lock_y:
-                sensor_adc = self._get_sensor_value(self._controller_b.sensor_key)
+                sensor_adc = sensor_b
                 
                 if sensor_adc is not None:
                     error_adc = ref_adc_y - sensor_adc
-                    error_y_um = error_adc * CALIBRATION_Y['slope']
+                    error_y_um = error_adc * self._calibration.y_slope
                     
                     if abs(error_adc) > DEADZONE_ADC:
                         self._dual_integral_b += error_adc * Ts
@@ -754,17 +989,14 @@ class TestService(QObject):
                         if abs(pwm_b) > U_max:
                             self._dual_integral_b -= error_adc * Ts
                             pwm_b = max(-U_max, min(U_max, pwm_b))
+                        pwm_b = self._apply_breakaway('y', pwm_b, error_y_um, tolerance)
             elif lock_y and self._controller_b:
-                sensor_adc = self._get_sensor_value(self._controller_b.sensor_key)
+                sensor_adc = sensor_b
                 if sensor_adc is not None:
                     error_adc = ref_adc_y - sensor_adc
-                    error_y_um = error_adc * CALIBRATION_Y['slope']
+                    error_y_um = error_adc * self._calibration.y_slope
                 pwm_b = 0
             
-            # Calcular tolerancias
-            tolerance = self._trajectory_config.tolerance_um
-            fallback_tolerance = tolerance * FALLBACK_TOLERANCE_MULTIPLIER
-            
             # Determinar at_target considerando bloqueos
             if lock_x and lock_y:
                 at_target = True
@@ -779,6 +1011,11 @@ class TestService(QObject):
                 at_target = abs(error_x_um) < tolerance and abs(error_y_um) < tolerance
                 at_fallback_target = abs(error_x_um) < fallback_tolerance and abs(error_y_um) < fallback_tolerance
             
+            # Tiempo "pegajoso" del mapa de convergencia: desde la primera
+            # entrada en la banda de fallback, sin el recorrido previo
+            if at_fallback_target and self._band_entry_time is None:
+                self._band_entry_time = self._clock()
+            
             # Lógica de settling
             if at_target:
                 self._traj_settling_counter += 1
@@ -791,7 +1028,17 @@ class TestService(QObject):
                     
                     # Verificar flag ANTES de aceptar para prevenir llamadas duplicadas
                     if not self._point_accepted:
-                        self._accept_trajectory_point(target_x, target_y, error_x_um, error_y_um, "✅ Estable")
+                        requested = self._trajectory_config.tolerance_um
+                        errors = [abs(e) for e, locked in ((error_x_um, lock_x), (error_y_um, lock_y))
+                                  if not locked]
+                        if tolerance > requested and errors and max(errors) >= requested:
+                            # Solo dentro de la tolerancia relajada aprendida para la región
+                            self._accept_trajectory_point(target_x, target_y, error_x_um, error_y_um,
+                                                          f"⚠️ Tolerancia relajada ({tolerance:.1f}µm)")
+                            logger.warning(f"⚠️ Punto {self._trajectory_index + 1} aceptado con tolerancia "
+                                           f"relajada de la región ({tolerance:.1f}µm > {requested:.1f}µm)")
+                        else:
+                            self._accept_trajectory_point(target_x, target_y, error_x_um, error_y_um, "✅ Estable")
                 else:
                     self._send_command(f"A,{pwm_a},{pwm_b}")
                     
@@ -799,7 +1046,7 @@ class TestService(QObject):
                 self._traj_settling_counter = 0
                 self._traj_near_attempts += 1
                 
-                if self._traj_near_attempts >= MAX_ATTEMPTS_PER_POINT:
+                if self._traj_near_attempts >= max_attempts:
                     # CRÍTICO: Verificar flag ANTES de aceptar para prevenir llamadas duplicadas
                     if not self._point_accepted:
                         self._accept_trajectory_point(target_x, target_y, error_x_um, error_y_um,
@@ -833,16 +1080,19 @@ class TestService(QObject):
         target = self._trajectory[self._trajectory_index]
         target_x, target_y = target[0], target[1]
         
-        # Calcular referencias en ADC
-        ref_adc_x = um_to_adc(target_x, axis='x')
-        ref_adc_y = um_to_adc(target_y, axis='y')
+        # Referencias en ADC (precalculadas en start_trajectory)
+        ref_adc_x, ref_adc_y = self._trajectory_adc[self._trajectory_index]
+        
+        sensor_a, sensor_b, stale = self._read_sensors()
+        if stale:
+            return
         
         pwm_a = 0
         pwm_b = 0
         
         # Control correctivo suave para eje A (solo proporcional)
         if self._controller_a:
-            sensor_adc = self._get_sensor_value(self._controller_a.sensor_key)
+            sensor_adc = sensor_a
             if sensor_adc is not None:
                 error_adc = ref_adc_x - sensor_adc
                 if abs(error_adc) > DEADZONE_ADC:
@@ -855,7 +1105,7 @@ class TestService(QObject):
         
         # Control correctivo suave para eje B (solo proporcional)
         if self._controller_b:
-            sensor_adc = self._get_sensor_value(self._controller_b.sensor_key)
+            sensor_adc = sensor_b
             if sensor_adc is not None:
                 error_adc = ref_adc_y - sensor_adc
                 if abs(error_adc) > DEADZONE_ADC:
@@ -870,6 +1120,23 @@ class TestService(QObject):
         if pwm_a != 0 or pwm_b != 0:
             self._send_command(f"A,{pwm_a},{pwm_b}")
     
+    def _record_convergence(self, target_x: float, target_y: float, error_x: float,
+                            error_y: float, status: str):
+        """Registra en el mapa de convergencia cómo se alcanzó el punto actual."""
+        lock_x, lock_y = self._detect_axis_lock(self._trajectory_index)
+        errors = [abs(e) for e, locked in ((error_x, lock_x), (error_y, lock_y)) if not locked]
+        band_time = 0.0
+        if self._band_entry_time is not None:
+            band_time = self._clock() - self._band_entry_time
+        self._convergence_map.record(
+            target_x, target_y,
+            attempts=self._traj_near_attempts,
+            settle_s=band_time,
+            fallback='Fallback' in status,
+            error_um=max(errors) if errors else 0.0,
+            lock_events=int(lock_x) + int(lock_y),
+            relaxed='relajada' in status)
+    
     def _accept_trajectory_point(self, target_x: float, target_y: float, 
                                   error_x: float, error_y: float, status: str):
         """Acepta el punto actual y PAUSA o AVANZA según modo.
@@ -884,6 +1151,8 @@ class TestService(QObject):
         
         # Marcar punto como aceptado
         self._point_accepted = True
+        move_duration = self._clock() - self._move_start_time
+        self._record_convergence(target_x, target_y, error_x, error_y, status)
         
         # Freno activo
         self._send_command('B')
@@ -901,6 +1170,11 @@ class TestService(QObject):
         # Emitir señales
         total = len(self._trajectory) if self._trajectory else 0
         self.trajectory_point_reached.emit(self._trajectory_index, target_x, target_y, status)
+        if self._trajectory_index > 0:
+            # Duración del movimiento desde el punto anterior (para MoveTimeEstimator)
+            prev_x, prev_y = self._trajectory[self._trajectory_index - 1]
+            self.trajectory_move_timed.emit(self._trajectory_index, target_x - prev_x,
+                                            target_y - prev_y, move_duration)
         
         if self._trajectory_auto_advance:
             # MODO AUTO-ADVANCE (TestTab): Pausa temporal y avanza automáticamente
@@ -916,8 +1190,7 @@ class TestService(QObject):
             logger.info(f"{status} Punto {self._trajectory_index + 1} - Pausa {self._trajectory_config.pause_s}s antes de avanzar")
             
             # Programar avance automático después de pausa
-            pause_ms = int(self._trajectory_config.pause_s * 1000)
-            QTimer.singleShot(pause_ms, self._auto_advance_to_next_point)
+            self._call_later(self._trajectory_config.pause_s, self._auto_advance_to_next_point)
         else:
             # MODO MANUAL (MicroscopyService): Pausa indefinida esperando comando
             self._trajectory_paused = True
@@ -944,14 +1217,14 @@ class TestService(QObject):
         if self._controller_a:
             sensor_adc = self._get_sensor_value(self._controller_a.sensor_key)
             if sensor_adc is not None:
-                ref_adc_x = um_to_adc(target_x, axis='x')
-                error_x_um = (ref_adc_x - sensor_adc) * CALIBRATION_X['slope']
+                ref_adc_x = self._calibration.um_to_adc(target_x, 'x')
+                error_x_um = (ref_adc_x - sensor_adc) * self._calibration.x_slope
         
         if self._controller_b:
             sensor_adc = self._get_sensor_value(self._controller_b.sensor_key)
             if sensor_adc is not None:
-                ref_adc_y = um_to_adc(target_y, axis='y')
-                error_y_um = (ref_adc_y - sensor_adc) * CALIBRATION_Y['slope']
+                ref_adc_y = self._calibration.um_to_adc(target_y, 'y')
+                error_y_um = (ref_adc_y - sensor_adc) * self._calibration.y_slope
         
         # Aceptar punto con status de corrección
         self._accept_trajectory_point(target_x, target_y, error_x_um, error_y_um, "✅ Estable (corregido)")
@@ -986,22 +1259,26 @@ class TestService(QObject):
         Solo mueve el motor del eje bloqueado hasta que el error sea < 25µm.
         """
         try:
-            current_time = time.time()
+            current_time = self._clock()
             Ts = current_time - self._dual_last_time
             self._dual_last_time = current_time
             
+            sensor_a, sensor_b, stale = self._read_sensors()
+            if stale:
+                return
+            
             axis = self._correction_axis
             target_um = self._correction_target_um
             tolerance = self._trajectory_config.tolerance_um
             
             if axis == 'x' and self._controller_a:
                 # Corregir eje X (Motor A)
-                ref_adc = um_to_adc(target_um, axis='x')
-                sensor_adc = self._get_sensor_value(self._controller_a.sensor_key)
+                ref_adc = self._calibration.um_to_adc(target_um, 'x')
+                sensor_adc = sensor_a
                 
                 if sensor_adc is not None:
                     error_adc = ref_adc - sensor_adc
-                    error_um = error_adc * CALIBRATION_X['slope']
+                    error_um = error_adc * self._calibration.x_slope
                     
                     # Verificar si ya corregimos
                     if abs(error_um) < tolerance:
@@ -1037,12 +1314,12 @@ class TestService(QObject):
                         
             elif axis == 'y' and self._controller_b:
                 # Corregir eje Y (Motor B)
-                ref_adc = um_to_adc(target_um, axis='y')
-                sensor_adc = self._get_sensor_value(self._controller_b.sensor_key)
+                ref_adc = self._calibration.um_to_adc(target_um, 'y')
+                sensor_adc = sensor_b
                 
                 if sensor_adc is not None:
                     error_adc = ref_adc - sensor_adc
-                    error_um = error_adc * CALIBRATION_Y['slope']
+                    error_um = error_adc * self._calibration.y_slope
                     
                     # Verificar si ya corregimos
                     if abs(error_um) < tolerance:
@@ -0,0 +1,144 @@
+"""
+Simulación de Trayectorias sin Hardware
+=======================================
+
+Ejecuta TestService contra la platina simulada (hardware.stage.SimulatedStage)
+con tiempo virtual: cada paso avanza la planta CONTROL_PERIOD_S y luego
+ejecuta un paso del lazo, sin esperar al reloj real. Sirve como regresión de
+tiempo de asentamiento y throughput (puntos/minuto) al cambiar ganancias,
+tolerancias o la lógica de TestService.
+
+Uso desde línea de comandos (en src/):
+    python -m core.services.trajectory_simulation
+
+Autor: Sistema de Control L206
+"""
+
+import sys
+import time
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from config.constants import CONTROL_PERIOD_S
+from core.services.test_service import TestService, ControllerConfig
+from hardware.stage import SimulatedStage
+
+logger = logging.getLogger('MotorControl_L206')
+
+
+def simulate_trajectory(trajectory: Sequence[Tuple[float, float]],
+                        controller_a: Optional[ControllerConfig],
+                        controller_b: Optional[ControllerConfig],
+                        stage: Optional[SimulatedStage] = None,
+                        tolerance_um: float = 25.0,
+                        pause_s: float = 0.0,
+                        max_time_s: float = 600.0,
+                        dt: float = CONTROL_PERIOD_S) -> Dict:
+    """
+    Ejecuta una trayectoria completa sobre la planta simulada.
+
+    Args:
+        trajectory: Puntos (x, y) en µm
+        controller_a: Controlador PI del Motor A (eje X, normalmente sensor_2)
+        controller_b: Controlador PI del Motor B (eje Y, normalmente sensor_1)
+        stage: Planta simulada (por defecto SimulatedStage.from_calibration())
+        tolerance_um: Tolerancia de posición
+        pause_s: Pausa simulada en cada punto (captura) antes de avanzar
+        max_time_s: Límite de tiempo simulado
+        dt: Paso de simulación = periodo del lazo de control
+
+    Returns:
+        dict con:
+            - completed: bool
+            - points: lista de dicts (index, target_um, status, settle_s, error_um)
+            - sim_time_s, wall_time_s, speedup
+            - throughput_ppm: puntos por minuto simulado
+            - settle_mean_s, settle_max_s, fallback_points, relaxed_points
+    """
+    stage = stage or SimulatedStage.from_calibration()
+    service = TestService()
+    service.set_hardware_callbacks(stage.send_command, stage.get_sensor_value)
+    service.set_controller_a(controller_a)
+    service.set_controller_b(controller_b)
+    service.set_time_source(lambda: stage.time_s, manual_stepping=True)
+
+    points: List[Dict] = []
+    state = {'completed': False, 'segment_start': 0.0}
+
+    def on_point(index, x, y, status):
+        true_x, true_y = stage.position_um
+        points.append({
+            'index': index,
+            'target_um': (x, y),
+            'status': status,
+            'settle_s': stage.time_s - state['segment_start'],
+            'error_um': (x - true_x, y - true_y),
+        })
+
+    def on_completed(_total):
+        state['completed'] = True
+
+    service.trajectory_point_reached.connect(on_point)
+    service.trajectory_completed.connect(on_completed)
+
+    wall_start = time.perf_counter()
+    if not service.start_trajectory(list(trajectory), tolerance_um=tolerance_um,
+                                    pause_s=pause_s, auto_advance=False):
+        return {'completed': False, 'points': [], 'sim_time_s': 0.0}
+
+    resume_at = None
+    handled = 0
+    while not state['completed'] and stage.time_s < max_time_s:
+        stage.advance(dt)
+        service.run_control_step()
+
+        if len(points) > handled:
+            # Punto aceptado: TestService queda en pausa esperando resume
+            handled = len(points)
+            resume_at = stage.time_s + pause_s
+        if resume_at is not None and stage.time_s >= resume_at:
+            resume_at = None
+            state['segment_start'] = stage.time_s
+            service.resume_trajectory(advance_to_next=True)
+
+    if not state['completed'] and service.is_trajectory_active:
+        service.stop_trajectory()
+
+    wall_time = time.perf_counter() - wall_start
+    settle = [p['settle_s'] for p in points]
+    sim_time = stage.time_s
+    return {
+        'completed': state['completed'],
+        'points': points,
+        'sim_time_s': sim_time,
+        'wall_time_s': wall_time,
+        'speedup': sim_time / wall_time if wall_time > 0 else float('inf'),
+        'throughput_ppm': len(points) / sim_time * 60.0 if sim_time > 0 else 0.0,
+        'settle_mean_s': sum(settle) / len(settle) if settle else 0.0,
+        'settle_max_s': max(settle) if settle else 0.0,
+        'fallback_points': sum(1 for p in points if 'Fallback' in p['status']),
+        'relaxed_points': sum(1 for p in points if 'relajada' in p['status']),
+    }
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING)
+    from PyQt5.QtCore import QCoreApplication
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    sim_stage = SimulatedStage.from_calibration()
+    x0, y0 = sim_stage.position_um
+    demo = [(x0 + dx, y0 + dy) for dx, dy in
+            ((500, 0), (500, 500), (0, 500), (-500, 500), (-500, 0), (0, 0))]
+    result = simulate_trajectory(
+        demo,
+        ControllerConfig(Kp=5.0, Ki=2.0, sensor_key='sensor_2'),
+        ControllerConfig(Kp=5.0, Ki=2.0, sensor_key='sensor_1'),
+        stage=sim_stage, pause_s=0.5)
+    for p in result['points']:
+        print(f"Punto {p['index'] + 1}: {p['status']} en {p['settle_s']:.2f}s, "
+              f"error=({p['error_um'][0]:.1f}, {p['error_um'][1]:.1f})µm")
+    print(f"Completada={result['completed']} t_sim={result['sim_time_s']:.1f}s "
+          f"t_real={result['wall_time_s']:.1f}s (x{result['speedup']:.0f}) "
+          f"throughput={result['throughput_ppm']:.1f} pts/min")
+    sys.exit(0 if result['completed'] else 1)
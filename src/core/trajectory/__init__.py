@@ -1,10 +1,13 @@
 """
 Módulo de generación de trayectorias.
 
-Contiene generadores de trayectorias zig-zag y herramientas de interpolación
-para control de motores.
+Contiene generadores de trayectorias zig-zag, el optimizador del orden de
+visita, el estimador aprendido de tiempo de movimiento y herramientas de interpolación para control de motores.
 """
 
-from .trajectory_generator import TrajectoryGenerator
+from .trajectory_generator import TrajectoryGenerator, zigzag_grid
+from .trajectory_optimizer import TrajectoryOptimizer, MoveCostModel
+from .move_time_estimator import MoveTimeEstimator
 
-__all__ = ['TrajectoryGenerator']
+__all__ = ['TrajectoryGenerator', 'zigzag_grid', 'TrajectoryOptimizer', 'MoveCostModel',
+           'MoveTimeEstimator']
@@ -0,0 +1,238 @@
+"""
+Estimador Aprendido de Tiempo de Movimiento
+===========================================
+
+Aprende la duración de cada movimiento punto→punto a partir de los tiempos
+reales medidos por TestService (señal trajectory_move_timed) y predice el
+tiempo total de una trayectoria con desglose por punto.
+
+Modelo por eje, ajustado por mínimos cuadrados sobre movimientos de un solo
+eje (el otro queda bajo lock_threshold_um, igual que _detect_axis_lock):
+
+    t_eje(d) = a + b·|d|        a: aceleración + asentamiento [s]
+                                b: inversa de la velocidad media [s/µm]
+
+Los movimientos de dos ejes se predicen como max(t_x, t_y) + c, donde c es
+el sobrecosto medio observado al mover ambos ejes a la vez. Mientras no hay
+suficientes muestras se usan los valores de MoveCostModel.
+
+Autor: Sistema de Control L206
+"""
+
+import json
+import logging
+from collections import deque
+from typing import Dict, Optional
+
+import numpy as np
+
+from core.trajectory.trajectory_optimizer import MoveCostModel
+
+logger = logging.getLogger(__name__)
+
+# Muestras mínimas por eje para reemplazar el modelo por defecto
+MIN_AXIS_SAMPLES = 3
+# Historial máximo (los movimientos más antiguos se descartan: sigue la deriva mecánica)
+MAX_HISTORY = 2000
+
+
+class MoveTimeEstimator:
+    """Modelo de duración de movimiento por eje aprendido del historial."""
+
+    def __init__(self, default_model: Optional[MoveCostModel] = None,
+                 max_history: int = MAX_HISTORY):
+        """
+        Args:
+            default_model: Modelo usado mientras no hay datos suficientes
+            max_history: Número máximo de movimientos recordados
+        """
+        self.default_model = default_model or MoveCostModel()
+        self._history = deque(maxlen=max_history)  # (dx_um, dy_um, duration_s)
+        self._fit = None
+
+    # ------------------------------------------------------------------
+    # Historial
+    # ------------------------------------------------------------------
+
+    def record(self, dx_um: float, dy_um: float, duration_s: float):
+        """Registra un movimiento medido (desplazamiento por eje y duración)."""
+        if not np.isfinite(duration_s) or duration_s <= 0:
+            return
+        self._history.append((float(dx_um), float(dy_um), float(duration_s)))
+        self._fit = None
+
+    def on_move_timed(self, index: int, dx_um: float, dy_um: float, duration_s: float):
+        """Slot para TestService.trajectory_move_timed."""
+        self.record(dx_um, dy_um, duration_s)
+
+    def clear(self):
+        """Olvida el historial y vuelve al modelo por defecto."""
+        self._history.clear()
+        self._fit = None
+
+    @property
+    def n_samples(self) -> int:
+        return len(self._history)
+
+    # ------------------------------------------------------------------
+    # Ajuste
+    # ------------------------------------------------------------------
+
+    def _default_axis(self, speed_um_s: float):
+        m = self.default_model
+        return m.axis_overhead_s + m.settle_s, 1.0 / speed_um_s
+
+    @staticmethod
+    def _fit_line(d, t):
+        """Ajuste t = a + b·d con a, b ≥ 0. Retorna (a, b) o None."""
+        if len(d) < MIN_AXIS_SAMPLES or np.ptp(d) <= 0:
+            return None
+        b, a = np.polyfit(d, t, 1)
+        if b <= 0:
+            # Sin dependencia con la distancia: solo tiempo fijo
+            return float(np.mean(t)), 0.0
+        if a < 0:
+            return 0.0, float(np.dot(d, t) / np.dot(d, d))
+        return float(a), float(b)
+
+    def _get_fit(self) -> Dict:
+        if self._fit is not None:
+            return self._fit
+        m = self.default_model
+        fit = {
+            'x': self._default_axis(m.speed_x_um_s), 'x_learned': False,
+            'y': self._default_axis(m.speed_y_um_s), 'y_learned': False,
+            'both_offset_s': 0.0, 'none_s': m.settle_s,
+        }
+        if self._history:
+            h = np.asarray(self._history, dtype=np.float64)
+            ax, ay, t = np.abs(h[:, 0]), np.abs(h[:, 1]), h[:, 2]
+            mx = ax >= m.lock_threshold_um
+            my = ay >= m.lock_threshold_um
+
+            for axis, d, sel in (('x', ax, mx & ~my), ('y', ay, my & ~mx)):
+                line = self._fit_line(d[sel], t[sel])
+                if line is not None:
+                    fit[axis] = line
+                    fit[f'{axis}_learned'] = True
+
+            both = mx & my
+            if both.any():
+                base = np.maximum(fit['x'][0] + fit['x'][1] * ax[both],
+                                  fit['y'][0] + fit['y'][1] * ay[both])
+                fit['both_offset_s'] = float(np.mean(t[both] - base))
+            none = ~(mx | my)
+            if none.any():
+                fit['none_s'] = float(np.median(t[none]))
+        self._fit = fit
+        return fit
+
+    def get_model(self) -> Dict:
+        """
+        Parámetros ajustados.
+
+        Returns:
+            dict con x_fixed_s, x_s_per_um, y_fixed_s, y_s_per_um,
+            both_offset_s, x_learned, y_learned, n_samples
+        """
+        fit = self._get_fit()
+        return {
+            'x_fixed_s': fit['x'][0], 'x_s_per_um': fit['x'][1],
+            'y_fixed_s': fit['y'][0], 'y_s_per_um': fit['y'][1],
+            'both_offset_s': fit['both_offset_s'],
+            'x_learned': fit['x_learned'], 'y_learned': fit['y_learned'],
+            'n_samples': self.n_samples,
+        }
+
+    def to_cost_model(self) -> MoveCostModel:
+        """MoveCostModel equivalente al ajuste (para TrajectoryOptimizer)."""
+        fit = self._get_fit()
+        m = self.default_model
+        (ax, bx), (ay, by) = fit['x'], fit['y']
+        fixed = min(ax, ay)
+        return MoveCostModel(
+            speed_x_um_s=1.0 / bx if bx > 0 else m.speed_x_um_s,
+            speed_y_um_s=1.0 / by if by > 0 else m.speed_y_um_s,
+            axis_overhead_s=max(0.0, fixed - m.settle_s),
+            reversal_penalty_s=m.reversal_penalty_s,
+            settle_s=min(m.settle_s, fixed),
+            lock_threshold_um=m.lock_threshold_um,
+        )
+
+    # ------------------------------------------------------------------
+    # Predicción
+    # ------------------------------------------------------------------
+
+    def predict_moves(self, dx_um, dy_um) -> np.ndarray:
+        """Duración predicha (s) de movimientos (dx, dy) (escalares o arrays)."""
+        fit = self._get_fit()
+        lock = self.default_model.lock_threshold_um
+        ax, ay = np.abs(np.asarray(dx_um, dtype=np.float64)), np.abs(np.asarray(dy_um, dtype=np.float64))
+        mx, my = ax >= lock, ay >= lock
+        tx = np.where(mx, fit['x'][0] + fit['x'][1] * ax, 0.0)
+        ty = np.where(my, fit['y'][0] + fit['y'][1] * ay, 0.0)
+        t = np.maximum(tx, ty) + np.where(mx & my, fit['both_offset_s'], 0.0)
+        return np.maximum(np.where(mx | my, t, fit['none_s']), 0.0)
+
+    def predict_trajectory(self, points, start_um=None, per_point_overhead_s: float = 0.0) -> Dict:
+        """
+        Predice el tiempo de ejecución de una trayectoria.
+
+        Args:
+            points: Array (N, 2) en µm (o lista de (x, y))
+            start_um: Posición inicial (x, y); si es None no se cuenta el
+                movimiento al primer punto
+            per_point_overhead_s: Tiempo fijo por punto (delays, autofoco, captura)
+
+        Returns:
+            dict con:
+                - n_points: int
+                - move_s: ndarray (N,) duración del movimiento hacia cada punto
+                - overhead_s: float por punto
+                - cumulative_s: ndarray (N,) instante estimado de fin de cada punto
+                - total_move_s, total_s: float
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        n = len(points)
+        if n == 0:
+            empty = np.zeros(0)
+            return {'n_points': 0, 'move_s': empty, 'overhead_s': per_point_overhead_s,
+                    'cumulative_s': empty, 'total_move_s': 0.0, 'total_s': 0.0}
+        prev = np.vstack([points[:1] if start_um is None else np.asarray(start_um, dtype=np.float64).reshape(1, 2),
+                          points[:-1]])
+        d = points - prev
+        move = self.predict_moves(d[:, 0], d[:, 1])
+        if start_um is None:
+            move[0] = 0.0
+        cumulative = np.cumsum(move + per_point_overhead_s)
+        return {
+            'n_points': n,
+            'move_s': move,
+            'overhead_s': per_point_overhead_s,
+            'cumulative_s': cumulative,
+            'total_move_s': float(move.sum()),
+            'total_s': float(cumulative[-1]),
+        }
+
+    # ------------------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------------------
+
+    def save(self, path: str):
+        """Guarda el historial de movimientos en JSON."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'moves': list(self._history)}, f)
+        logger.info(f"Historial de movimientos guardado: {path} ({self.n_samples} muestras)")
+
+    def load(self, path: str) -> bool:
+        """Carga un historial guardado con save(). Retorna True si tuvo éxito."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                moves = json.load(f).get('moves', [])
+        except (OSError, ValueError) as e:
+            logger.warning(f"No se pudo cargar historial de movimientos {path}: {e}")
+            return False
+        self.clear()
+        for dx, dy, dur in moves:
+            self.record(dx, dy, dur)
+        return True
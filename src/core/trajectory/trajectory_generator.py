@@ -3,15 +3,52 @@ Generador de trayectorias para control de motores.
 
 Este módulo genera trayectorias zig-zag y otros patrones para
 pruebas de controladores.
+
+La grilla zig-zag se construye con numpy (zigzag_grid) y la figura de
+preview se crea solo si se pide, para que escaneos de 100k+ puntos no
+paguen el costo de matplotlib antes de comenzar el movimiento.
 """
 
 import logging
 import numpy as np
 import pandas as pd
-from matplotlib.figure import Figure
 
 logger = logging.getLogger(__name__)
 
+# Máximo de puntos aceptado por generate_zigzag_by_points
+MAX_TRAJECTORY_POINTS = 1_000_000
+
+
+def zigzag_grid(n_points, x_min, x_max, y_min, y_max):
+    """
+    Genera una grilla zig-zag (boustrophedon) como array (N, 2).
+    
+    Filas de Y crecientes; las filas pares recorren X de x_min a x_max y
+    las impares en sentido inverso. Se recorta a n_points.
+    
+    Args:
+        n_points: Número total de puntos
+        x_min, x_max: Límites en X (µm)
+        y_min, y_max: Límites en Y (µm)
+        
+    Returns:
+        tuple: (points ndarray (N, 2) float64, n_rows, n_cols)
+    """
+    n_rows = int(np.sqrt(n_points))
+    n_cols = int(np.ceil(n_points / n_rows))
+    
+    x_positions = np.linspace(x_min, x_max, n_cols)
+    y_positions = np.linspace(y_min, y_max, n_rows)
+    
+    # Matriz de X por fila, invirtiendo las filas impares
+    xs = np.tile(x_positions, (n_rows, 1))
+    xs[1::2] = xs[1::2, ::-1]
+    
+    points = np.empty((n_rows * n_cols, 2), dtype=np.float64)
+    points[:, 0] = xs.ravel()
+    points[:, 1] = np.repeat(y_positions, n_cols)
+    return points[:n_points], n_rows, n_cols
+
 
 class TrajectoryGenerator:
     """Generador de trayectorias para pruebas de control."""
@@ -22,23 +59,25 @@ class TrajectoryGenerator:
         logger.debug("TrajectoryGenerator inicializado")
     
     def generate_zigzag_by_points(self, n_points, x_min, x_max, y_min, y_max, 
-                                 step_delay, calibration=None):
+                                 step_delay, calibration=None, create_figure=False):
         """
         Genera una trayectoria en zig-zag con número específico de puntos.
         
         Args:
-            n_points: Número total de puntos
+            n_points: Número total de puntos (hasta MAX_TRAJECTORY_POINTS)
             x_min, x_max: Límites en X (µm)
             y_min, y_max: Límites en Y (µm)
             step_delay: Tiempo entre pasos (s)
             calibration: Dict con calibración (opcional)
+            create_figure: Construir la figura de preview ahora; si es False
+                usar create_preview_figure() cuando se necesite
             
         Returns:
             dict: Trayectoria generada con keys:
                 - success: bool
                 - message: str
-                - points: np.ndarray de (x, y)
-                - figure: matplotlib Figure
+                - points: np.ndarray (N, 2) de (x, y)
+                - figure: matplotlib Figure o None
                 - n_rows, n_cols: int
         """
         logger.info("=== Generando trayectoria por número de puntos ===")
@@ -46,10 +85,10 @@ class TrajectoryGenerator:
         
         try:
             # Validaciones
-            if n_points < 1 or n_points > 10000:
+            if n_points < 1 or n_points > MAX_TRAJECTORY_POINTS:
                 return {
                     'success': False,
-                    'message': "Número de puntos debe estar entre 1 y 10000"
+                    'message': f"Número de puntos debe estar entre 1 y {MAX_TRAJECTORY_POINTS}"
                 }
             
             if step_delay < 0.1:
@@ -58,44 +97,25 @@ class TrajectoryGenerator:
                     'message': "Tiempo entre pasos debe ser al menos 0.1s"
                 }
             
-            # Calcular número de filas para zig-zag
-            n_rows = int(np.sqrt(n_points))
-            n_cols = int(np.ceil(n_points / n_rows))
-            
-            # Generar grid homogéneo
-            x_positions = np.linspace(x_min, x_max, n_cols)
-            y_positions = np.linspace(y_min, y_max, n_rows)
-            
-            # Generar trayectoria en zig-zag
-            trajectory = []
-            for i, y in enumerate(y_positions):
-                if i % 2 == 0:
-                    # Fila par: inicio a fin
-                    for x in x_positions:
-                        trajectory.append([x, y])
-                else:
-                    # Fila impar: fin a inicio (zig-zag)
-                    for x in reversed(x_positions):
-                        trajectory.append([x, y])
+            # Generar grid homogéneo en zig-zag (vectorizado)
+            trajectory_array, n_rows, n_cols = zigzag_grid(n_points, x_min, x_max, y_min, y_max)
             
-            # Limitar al número de puntos solicitado
-            trajectory = trajectory[:n_points]
-            trajectory_array = np.array(trajectory)
+            logger.info(f"✅ Trayectoria generada: {len(trajectory_array)} puntos ({n_rows}x{n_cols})")
             
-            logger.info(f"✅ Trayectoria generada: {len(trajectory)} puntos ({n_rows}x{n_cols})")
-            
-            # Crear figura de preview
-            figure = self._create_trajectory_plot_array(trajectory_array, x_min, x_max, y_min, y_max)
+            # Figura de preview solo si se pide (costosa para trayectorias grandes)
+            figure = None
+            if create_figure:
+                figure = self._create_trajectory_plot_array(trajectory_array, x_min, x_max, y_min, y_max)
             
             # Guardar trayectoria actual
             self.current_trajectory = trajectory_array
             
             return {
                 'success': True,
-                'message': f'Trayectoria generada: {len(trajectory)} puntos',
+                'message': f'Trayectoria generada: {len(trajectory_array)} puntos',
                 'points': trajectory_array,
                 'figure': figure,
-                'n_points': len(trajectory),
+                'n_points': len(trajectory_array),
                 'n_rows': n_rows,
                 'n_cols': n_cols,
                 'step_delay': step_delay,
@@ -221,8 +241,29 @@ class TrajectoryGenerator:
         adc = (value_mm - intercepto) / pendiente if pendiente != 0 else 0
         return int(adc)
     
+    def create_preview_figure(self, trajectory_array=None):
+        """
+        Crea (bajo demanda) la figura de preview de una trayectoria (N, 2).
+        
+        Args:
+            trajectory_array: Puntos a graficar (usa current_trajectory si None)
+            
+        Returns:
+            matplotlib Figure o None si no hay trayectoria
+        """
+        if trajectory_array is None:
+            trajectory_array = self.current_trajectory
+        if trajectory_array is None or len(trajectory_array) == 0:
+            return None
+        trajectory_array = np.asarray(trajectory_array)
+        x_min, y_min = trajectory_array.min(axis=0)
+        x_max, y_max = trajectory_array.max(axis=0)
+        return self._create_trajectory_plot_array(trajectory_array, x_min, x_max, y_min, y_max)
+    
     def _create_trajectory_plot_array(self, trajectory_array, x_min, x_max, y_min, y_max):
         """Crea gráfico de visualización de la trayectoria desde numpy array."""
+        from matplotlib.figure import Figure
+        
         fig = Figure(figsize=(10, 8), facecolor='#2E2E2E')
         ax = fig.add_subplot(111)
         
@@ -230,8 +271,9 @@ class TrajectoryGenerator:
         x_coords = trajectory_array[:, 0]
         y_coords = trajectory_array[:, 1]
         
-        # Graficar trayectoria
-        ax.plot(x_coords, y_coords, 'o-', color='cyan', linewidth=2, 
+        # Graficar trayectoria (sin marcadores si hay demasiados puntos)
+        marker = 'o-' if len(trajectory_array) <= 5000 else '-'
+        ax.plot(x_coords, y_coords, marker, color='cyan', linewidth=2, 
                 markersize=4, label='Trayectoria')
         
         # Marcar inicio y fin
@@ -267,6 +309,8 @@ class TrajectoryGenerator:
     
     def _create_trajectory_plot(self, points, x_min, x_max, y_min, y_max):
         """Crea gráfico de visualización de la trayectoria."""
+        from matplotlib.figure import Figure
+        
         fig = Figure(figsize=(10, 8), facecolor='#2E2E2E')
         ax = fig.add_subplot(111)
         
@@ -0,0 +1,274 @@
+"""
+Optimizador del orden de visita de trayectorias.
+
+Reordena un conjunto arbitrario de puntos (generado o importado desde CSV)
+para minimizar el tiempo total estimado de movimiento de la platina:
+
+1. Construcción por vecino más cercano (según tiempo estimado, no distancia),
+   con candidatos de un KD-tree en coordenadas escaladas por velocidad.
+2. Mejora local 2-opt con ventana de vecinos.
+
+Ambas etapas comparten el presupuesto time_budget_s; si se agota durante la
+construcción NN ese candidato se descarta.
+3. Se conserva el mejor orden entre el original, el NN y el NN+2-opt según
+   el modelo completo (incluida la penalización por inversión de sentido).
+
+Modelo de costo por movimiento (MoveCostModel): ambos ejes se mueven en
+paralelo; un eje cuyo desplazamiento es menor que lock_threshold_um queda
+bloqueado (igual que TestService._detect_axis_lock) y no aporta tiempo.
+Cada eje que se mueve cuesta axis_overhead_s + d / velocidad, más
+reversal_penalty_s si invierte su sentido respecto del último movimiento
+(juego mecánico). Cada punto paga además settle_s de asentamiento.
+"""
+
+import time
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+logger = logging.getLogger(__name__)
+
+# Por encima de este tamaño no se ejecuta la construcción NN
+NN_MAX_POINTS = 10000
+# Vecinos pedidos al KD-tree en la primera consulta de cada paso NN
+NN_CANDIDATES = 16
+# Pasos NN entre verificaciones del presupuesto de tiempo
+NN_DEADLINE_CHECK = 64
+
+
+@dataclass(frozen=True)
+class MoveCostModel:
+    """Parámetros del modelo de tiempo de movimiento por eje."""
+    speed_x_um_s: float = 500.0       # Velocidad media eje X
+    speed_y_um_s: float = 500.0       # Velocidad media eje Y
+    axis_overhead_s: float = 0.3      # Aceleración + aproximación final por eje movido
+    reversal_penalty_s: float = 0.3   # Extra por invertir el sentido de un eje (backlash)
+    settle_s: float = 0.1             # Asentamiento por punto (SETTLING_CYCLES + freno)
+    lock_threshold_um: float = 1.0    # Umbral de eje bloqueado (TestService)
+
+    def axis_time(self, distance_um, speed_um_s):
+        """Tiempo de un eje para desplazamientos |d| (escalar o array)."""
+        d = np.abs(distance_um)
+        return np.where(d < self.lock_threshold_um, 0.0, self.axis_overhead_s + d / speed_um_s)
+
+    def base_cost(self, dx, dy):
+        """Costo simétrico (sin inversiones) de movimientos (dx, dy)."""
+        return np.maximum(self.axis_time(dx, self.speed_x_um_s),
+                          self.axis_time(dy, self.speed_y_um_s)) + self.settle_s
+
+    def _reversal_penalties(self, d):
+        """Penalización por movimiento cuando el eje invierte el sentido."""
+        penalty = np.zeros(len(d))
+        moving = np.flatnonzero(np.abs(d) >= self.lock_threshold_um)
+        if len(moving) > 1:
+            signs = np.sign(d[moving])
+            reversed_ = signs[1:] != signs[:-1]
+            penalty[moving[1:][reversed_]] = self.reversal_penalty_s
+        return penalty
+
+    def move_times(self, points):
+        """
+        Tiempo estimado de cada movimiento de una trayectoria.
+
+        Args:
+            points: Array (N, 2) en µm
+
+        Returns:
+            ndarray (N-1,) con el tiempo de ir del punto i al i+1
+        """
+        points = np.asarray(points, dtype=np.float64)
+        if len(points) < 2:
+            return np.zeros(0)
+        d = np.diff(points, axis=0)
+        tx = self.axis_time(d[:, 0], self.speed_x_um_s)
+        ty = self.axis_time(d[:, 1], self.speed_y_um_s)
+        tx = tx + np.where(tx > 0, self._reversal_penalties(d[:, 0]), 0.0)
+        ty = ty + np.where(ty > 0, self._reversal_penalties(d[:, 1]), 0.0)
+        return np.maximum(tx, ty) + self.settle_s
+
+    def total_time(self, points):
+        """Tiempo total estimado de movimiento de una trayectoria."""
+        return float(self.move_times(points).sum())
+
+
+class TrajectoryOptimizer:
+    """Reordena puntos de trayectoria para minimizar el tiempo de movimiento."""
+
+    def __init__(self, cost_model=None):
+        """
+        Args:
+            cost_model: MoveCostModel (por defecto valores típicos de la platina L206)
+        """
+        self.cost_model = cost_model or MoveCostModel()
+
+    def estimate_time(self, points):
+        """Tiempo total estimado (s) para recorrer los puntos en el orden dado."""
+        return self.cost_model.total_time(points)
+
+    def _nearest_neighbour(self, points, start=0, deadline=None):
+        """
+        Orden por vecino más cercano en tiempo, penalizando inversiones.
+
+        Los candidatos salen de un KD-tree con métrica de Chebyshev sobre
+        (x/vx, y/vy): sin penalización, el costo de un movimiento crece con
+        esa distancia. Se amplía la consulta hasta que ningún punto fuera de
+        ella pueda costar menos que el mejor candidato (resultado exacto).
+
+        Returns:
+            ndarray con el orden, o None si se agotó el presupuesto
+        """
+        m = self.cost_model
+        n = len(points)
+        speeds = np.array([m.speed_x_um_s, m.speed_y_um_s])
+        scaled = points / speeds
+        tree = cKDTree(scaled)
+        min_speed = float(speeds.min())
+        order = np.empty(n, dtype=np.int64)
+        visited = np.zeros(n, dtype=bool)
+        current = start
+        last_sign = np.zeros(2)
+        for k in range(n):
+            order[k] = current
+            visited[current] = True
+            if k == n - 1:
+                break
+            if deadline is not None and k % NN_DEADLINE_CHECK == 0 and time.perf_counter() > deadline:
+                return None
+            n_query = min(n, NN_CANDIDATES)
+            while True:
+                dist, idx = tree.query(scaled[current], k=n_query, p=np.inf)
+                dist, idx = np.atleast_1d(dist), np.atleast_1d(idx)
+                cand = idx[~visited[idx]]
+                if len(cand):
+                    d = points[cand] - points[current]
+                    tx = m.axis_time(d[:, 0], m.speed_x_um_s)
+                    ty = m.axis_time(d[:, 1], m.speed_y_um_s)
+                    # Inversión respecto del último sentido de cada eje
+                    tx = tx + np.where((tx > 0) & (np.sign(d[:, 0]) * last_sign[0] < 0), m.reversal_penalty_s, 0.0)
+                    ty = ty + np.where((ty > 0) & (np.sign(d[:, 1]) * last_sign[1] < 0), m.reversal_penalty_s, 0.0)
+                    cost = np.maximum(tx, ty)
+                    best = int(np.argmin(cost))
+                    if n_query >= n:
+                        break
+                    # Cota inferior del costo de cualquier punto fuera de la consulta
+                    d_out = float(dist[-1])
+                    bound = m.axis_overhead_s + d_out if d_out * min_speed >= m.lock_threshold_um else 0.0
+                    if cost[best] <= bound:
+                        break
+                elif n_query >= n:
+                    break
+                n_query = min(n, n_query * 4)
+            nxt = int(cand[best])
+            step = points[nxt] - points[current]
+            for axis in (0, 1):
+                if abs(step[axis]) >= m.lock_threshold_um:
+                    last_sign[axis] = np.sign(step[axis])
+            current = nxt
+        return order
+
+    def _two_opt(self, points, order, window, max_passes, deadline):
+        """Mejora 2-opt de camino abierto (inicio fijo) con ventana de vecinos."""
+        m = self.cost_model
+        order = order.copy()
+        p = points[order]
+        n = len(order)
+        for _ in range(max_passes):
+            improved = False
+            for i in range(n - 2):
+                if time.perf_counter() > deadline:
+                    return order, False
+                j = np.arange(i + 2, min(n, i + 2 + window))
+                a, b = p[i], p[i + 1]
+                c = p[j]
+                # Sucesor de j (el último punto no tiene sucesor: camino abierto)
+                has_next = j + 1 < n
+                d_ = p[np.minimum(j + 1, n - 1)]
+                old = m.base_cost(*(b - a)) + np.where(has_next, m.base_cost(*(d_ - c).T), 0.0)
+                new = m.base_cost(*(c - a).T) + np.where(has_next, m.base_cost(*(d_ - b).T), 0.0)
+                gain = old - new
+                k = int(np.argmax(gain))
+                if gain[k] > 1e-9:
+                    jj = j[k]
+                    order[i + 1:jj + 1] = order[i + 1:jj + 1][::-1]
+                    # Mantener p = points[order] sin reconstruirlo
+                    p[i + 1:jj + 1] = p[i + 1:jj + 1][::-1].copy()
+                    improved = True
+            if not improved:
+                break
+        return order, True
+
+    def optimize(self, points, keep_start=True, window=50, max_passes=5, time_budget_s=5.0):
+        """
+        Reordena los puntos para minimizar el tiempo total estimado.
+
+        Args:
+            points: Array (N, 2) en µm (o lista de (x, y))
+            keep_start: Mantener el primer punto como inicio
+            window: Vecinos considerados por 2-opt para cada posición
+            max_passes: Pasadas máximas de 2-opt
+            time_budget_s: Tiempo máximo de cómputo (construcción NN + 2-opt)
+
+        Returns:
+            dict: Resultado con keys:
+                - success: bool
+                - message: str
+                - points: ndarray (N, 2) reordenado
+                - order: índices del orden nuevo sobre la entrada
+                - original_time_s, optimized_time_s, time_saved_s
+                - improvement_pct: float
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        n = len(points)
+        original_time = self.estimate_time(points)
+        identity = np.arange(n)
+        if n < 3:
+            return self._result(points, identity, original_time, original_time)
+
+        t0 = time.perf_counter()
+        candidates = [identity]
+        start = 0 if keep_start else int(np.argmin(points.sum(axis=1)))
+        deadline = t0 + time_budget_s
+        nn_order = identity
+        if n <= NN_MAX_POINTS:
+            nn_order = self._nearest_neighbour(points, start, deadline)
+            if nn_order is None:
+                logger.info("Optimizador: presupuesto de tiempo agotado en la construcción NN")
+                nn_order = identity
+            else:
+                candidates.append(nn_order)
+        else:
+            logger.info(f"Optimizador: {n} puntos > {NN_MAX_POINTS}, solo 2-opt sobre el orden original")
+
+        opt_order, finished = self._two_opt(points, nn_order, window, max_passes, deadline)
+        candidates.append(opt_order)
+        if not finished:
+            logger.info("Optimizador: presupuesto de tiempo agotado en 2-opt")
+
+        times = [self.estimate_time(points[order]) for order in candidates]
+        best = int(np.argmin(times))
+        order = candidates[best]
+        logger.info(f"Optimizador: {n} puntos en {time.perf_counter() - t0:.2f}s, "
+                    f"{original_time:.1f}s → {times[best]:.1f}s")
+        return self._result(points[order], order, original_time, times[best])
+
+    @staticmethod
+    def _result(points, order, original_time, optimized_time):
+        saved = original_time - optimized_time
+        pct = 100.0 * saved / original_time if original_time > 0 else 0.0
+        if saved > 0:
+            message = (f"Orden optimizado: {original_time:.1f}s → {optimized_time:.1f}s "
+                       f"(ahorro {saved:.1f}s, {pct:.1f}%)")
+        else:
+            message = f"El orden actual ya es el mejor encontrado ({original_time:.1f}s estimados)"
+        return {
+            'success': True,
+            'message': message,
+            'points': points,
+            'order': order,
+            'original_time_s': original_time,
+            'optimized_time_s': optimized_time,
+            'time_saved_s': saved,
+            'improvement_pct': pct,
+        }
@@ -10,10 +10,14 @@ from .image_metrics import (
     preprocess_for_detection,
     normalize_image,
 )
+from .display_conversion import DisplayConverter, DISPLAY_MODES, frame_to_uint8
 
 __all__ = [
     'calculate_laplacian_variance',
     'calculate_brenner_gradient',
     'preprocess_for_detection',
     'normalize_image',
+    'DisplayConverter',
+    'DISPLAY_MODES',
+    'frame_to_uint8',
 ]
@@ -0,0 +1,191 @@
+"""
+Conversión uint16 → uint8 para visualización
+============================================
+
+La vista en vivo normalizaba cada frame con frame/frame.max()*255 en
+flotante: una división por píxel, arrays temporales del tamaño del frame y
+un brillo que cambia de un frame a otro según el píxel más brillante.
+
+DisplayConverter define el mapeo con una tabla de 65536 entradas
+(valor uint16 → uint8) que solo se recalcula cuando cambian los niveles:
+
+    - 'fixed':      niveles negro/blanco fijos (ej: 0..4095 para 12 bits)
+    - 'percentile': auto-contraste por percentiles de una submuestra del
+                    frame, recalculado cada N frames (brillo estable)
+    - 'max':        blanco = máximo de cada frame (comportamiento anterior)
+
+más una corrección gamma sobre el mapeo lineal (salida = t^(1/gamma);
+gamma > 1 aclara las sombras).
+
+Con gamma = 1 el mapeo es lineal y se aplica con OpenCV (resta y escala
+saturadas, vectorizadas) en lugar de la indexación en la tabla; la tabla se
+redondea igual que OpenCV, así que ambas rutas coinciden (salvo ±1 nivel en
+valores justo a mitad de escalón).
+"""
+
+import logging
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+import cv2
+
+logger = logging.getLogger(__name__)
+
+DISPLAY_MODES = ('fixed', 'percentile', 'max')
+
+_LUT_SIZE = 65536
+
+
+class DisplayConverter:
+    """Convierte frames uint16 a uint8 con una tabla de 65536 entradas."""
+
+    def __init__(self, mode: str = 'percentile', fixed_range: Tuple[int, int] = (0, 4095),
+                 percentiles: Tuple[float, float] = (0.5, 99.9), update_interval: int = 15,
+                 gamma: float = 1.0, sample_step: int = 4):
+        """
+        Args:
+            mode: 'fixed', 'percentile' o 'max'
+            fixed_range: Niveles (negro, blanco) del modo 'fixed'
+            percentiles: Percentiles (negro, blanco) del modo 'percentile'
+            update_interval: Frames entre recálculos del modo 'percentile'
+            gamma: Corrección gamma (1.0 = lineal)
+            sample_step: Paso de la submuestra usada para los percentiles
+        """
+        self._ramp = np.arange(_LUT_SIZE, dtype=np.float64)
+        self._work = np.empty(_LUT_SIZE, dtype=np.float64)
+        self.lut = np.zeros(_LUT_SIZE, dtype=np.uint8)
+        self._scratch = None  # uint16 para la ruta lineal
+        self.levels = (0, 1)
+        self.frames_since_update = 0
+        self.configure(mode=mode, fixed_range=fixed_range, percentiles=percentiles,
+                       update_interval=update_interval, gamma=gamma, sample_step=sample_step)
+
+    def configure(self, mode: Optional[str] = None, fixed_range: Optional[Tuple[int, int]] = None,
+                  percentiles: Optional[Tuple[float, float]] = None,
+                  update_interval: Optional[int] = None, gamma: Optional[float] = None,
+                  sample_step: Optional[int] = None):
+        """
+        Cambia los parámetros (los omitidos se conservan).
+
+        Raises:
+            ValueError: Si el modo o algún parámetro no es válido
+        """
+        if mode is not None:
+            if mode not in DISPLAY_MODES:
+                raise ValueError(f"Modo de visualización desconocido: {mode!r} (usar {DISPLAY_MODES})")
+            self.mode = mode
+        if fixed_range is not None:
+            black, white = int(fixed_range[0]), int(fixed_range[1])
+            if not 0 <= black < white < _LUT_SIZE:
+                raise ValueError(f"Rango fijo inválido: {fixed_range}")
+            self.fixed_range = (black, white)
+        if percentiles is not None:
+            low, high = float(percentiles[0]), float(percentiles[1])
+            if not 0.0 <= low < high <= 100.0:
+                raise ValueError(f"Percentiles inválidos: {percentiles}")
+            self.percentiles = (low, high)
+        if update_interval is not None:
+            self.update_interval = max(1, int(update_interval))
+        if gamma is not None:
+            if gamma <= 0:
+                raise ValueError(f"Gamma debe ser positivo: {gamma}")
+            self.gamma = float(gamma)
+        if sample_step is not None:
+            self.sample_step = max(1, int(sample_step))
+
+        self._needs_update = True
+        if self.mode == 'fixed':
+            self._set_levels(*self.fixed_range)
+
+    # ------------------------------------------------------------------
+    # Tabla
+    # ------------------------------------------------------------------
+
+    def _set_levels(self, black: int, white: int):
+        """Recalcula la tabla para los niveles dados."""
+        black = int(black)
+        white = max(int(white), black + 1)
+        self.levels = (black, white)
+        # t = (v - negro) / (blanco - negro) saturado a [0, 1]
+        w = self._work
+        np.subtract(self._ramp, black, out=w)
+        np.multiply(w, 1.0 / (white - black), out=w)
+        np.clip(w, 0.0, 1.0, out=w)
+        if self.gamma != 1.0:
+            np.power(w, 1.0 / self.gamma, out=w)
+        np.multiply(w, 255.0, out=w)
+        np.rint(w, out=w)
+        np.copyto(self.lut, w, casting='unsafe')
+        self._needs_update = False
+        self.frames_since_update = 0
+
+    def _update_levels(self, frame: np.ndarray):
+        if self.mode == 'max':
+            peak = int(frame.max())
+            if self._needs_update or peak != self.levels[1] or self.levels[0] != 0:
+                self._set_levels(0, peak)
+        elif self.mode == 'percentile':
+            if self._needs_update or self.frames_since_update >= self.update_interval:
+                sample = frame[::self.sample_step, ::self.sample_step]
+                low, high = np.percentile(sample, self.percentiles)
+                self._set_levels(int(low), int(np.ceil(high)))
+        elif self._needs_update:
+            self._set_levels(*self.fixed_range)
+        self.frames_since_update += 1
+
+    # ------------------------------------------------------------------
+    # Conversión
+    # ------------------------------------------------------------------
+
+    def convert(self, frame: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Convierte un frame a uint8 para visualización.
+
+        Args:
+            frame: Frame uint16 (uint8 se copia tal cual; otros tipos se
+                convierten a uint16 saturando)
+            out: Buffer uint8 de la misma forma (evita asignar)
+
+        Returns:
+            Frame uint8 (out si se pasó)
+        """
+        if frame.dtype == np.uint8:
+            if out is None:
+                return frame.copy()
+            np.copyto(out, frame)
+            return out
+        if frame.dtype != np.uint16:
+            frame = np.clip(frame, 0, _LUT_SIZE - 1).astype(np.uint16)
+        if out is None:
+            out = np.empty(frame.shape, dtype=np.uint8)
+
+        self._update_levels(frame)
+
+        if self.gamma == 1.0 and frame.ndim == 2 and frame.flags.c_contiguous:
+            # Mapeo lineal: resta saturada + escala con redondeo (igual que la tabla)
+            black, white = self.levels
+            if self._scratch is None or self._scratch.shape != frame.shape:
+                self._scratch = np.empty(frame.shape, dtype=np.uint16)
+            cv2.subtract(frame, black, dst=self._scratch)
+            cv2.convertScaleAbs(self._scratch, out, 255.0 / (white - black), 0.0)
+        else:
+            np.take(self.lut, frame, out=out, mode='clip')
+        return out
+
+
+# Conversor por thread para conversiones puntuales (captura, detección)
+_local = threading.local()
+
+
+def frame_to_uint8(frame: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Convierte un frame a uint8 escalando por su máximo (modo 'max').
+
+    Reemplaza las conversiones puntuales frame/frame.max()*255 de captura y
+    detección, sin arrays flotantes intermedios.
+    """
+    converter = getattr(_local, 'max_converter', None)
+    if converter is None:
+        converter = _local.max_converter = DisplayConverter(mode='max')
+    return converter.convert(frame, out=out)
@@ -262,41 +262,59 @@ class MicroscopyValidator:
         
         return errors, warnings
     
-    def estimate_time(self, config: MicroscopyConfig) -> dict:
+    def estimate_time(self, config: MicroscopyConfig, move_estimator=None,
+                      start_um: Optional[Tuple[float, float]] = None) -> dict:
         """
         Estima tiempo total de microscopía.
         
         Args:
             config: Configuración de microscopía
+            move_estimator: MoveTimeEstimator opcional; si se entrega, el tiempo
+                de movimiento se predice por punto según la distancia de cada
+                eje en lugar de usar ~1s fijo por punto
+            start_um: Posición XY actual (para el movimiento al primer punto)
         
         Returns:
-            dict con estimaciones de tiempo
+            dict con estimaciones de tiempo (per_point_s: instante estimado de
+            fin de cada punto, solo con move_estimator)
         """
         n_points = len(config.trajectory)
         
-        # Tiempo por punto
-        time_per_point = config.delay_before + config.delay_after
-        
-        # Agregar tiempo de movimiento (estimado)
-        time_per_point += 1.0  # ~1s por movimiento XY
+        # Tiempo fijo por punto (delays)
+        overhead = config.delay_before + config.delay_after
         
         # Agregar tiempo de autofoco si está habilitado
         if config.autofocus_enabled:
-            time_per_point += 5.0  # ~5s por autofoco (estimado)
+            overhead += 5.0  # ~5s por autofoco (estimado)
         
         # Agregar tiempo de captura
-        time_per_point += 0.5  # ~0.5s por captura
+        overhead += 0.5  # ~0.5s por captura
+        
+        per_point = None
+        if move_estimator is not None and n_points > 0:
+            # Movimiento XY aprendido del historial de TestService
+            prediction = move_estimator.predict_trajectory(
+                config.trajectory, start_um=start_um, per_point_overhead_s=overhead)
+            move_time_s = prediction['total_move_s']
+            total_time_s = prediction['total_s']
+            per_point = prediction['cumulative_s'].tolist()
+            time_per_point = total_time_s / n_points
+        else:
+            move_time_s = n_points * 1.0  # ~1s por movimiento XY
+            time_per_point = overhead + 1.0
+            total_time_s = n_points * time_per_point
         
-        total_time_s = n_points * time_per_point
         total_time_min = total_time_s / 60.0
         total_time_h = total_time_min / 60.0
         
         return {
             'n_points': n_points,
             'time_per_point_s': time_per_point,
+            'move_time_s': move_time_s,
             'total_time_s': total_time_s,
             'total_time_min': total_time_min,
             'total_time_h': total_time_h,
+            'per_point_s': per_point,
             'estimated_completion': self._format_time(total_time_s)
         }
     
@@ -4,6 +4,10 @@ Módulo de manejo de datos experimentales.
 Contiene clases para grabación, procesamiento y exportación de datos.
 """
 
-from .recorder import DataRecorder
+from .recorder import DataRecorder, RECORDING_BACKENDS
+from .columnar import (ColumnarWriter, load_columnar, load_recording,
+                       export_columnar_to_csv, is_columnar_file, COLUMNAR_EXTENSION)
 
-__all__ = ['DataRecorder']
+__all__ = ['DataRecorder', 'RECORDING_BACKENDS', 'ColumnarWriter', 'load_columnar',
+           'load_recording', 'export_columnar_to_csv', 'is_columnar_file',
+           'COLUMNAR_EXTENSION']
@@ -0,0 +1,231 @@
+"""
+Formato columnar binario para grabaciones largas (.l206).
+
+Alternativa a CSV para DataRecorder: las muestras se acumulan en bloques
+NumPy de tamaño fijo y cada bloque se agrega al archivo con sus columnas
+contiguas. Se lee solo con numpy (sin pandas ni HDF5) y la recarga de
+millones de muestras toma milisegundos.
+
+Estructura del archivo (little-endian):
+    MAGIC (8 bytes) | header_len (u32) | header JSON (utf-8)
+    bloque*: n_filas (u32) | columna_0 (n_filas * itemsize) | columna_1 | ...
+
+El header guarda los nombres/dtypes de columnas (los mismos nombres que el
+CSV) y el tamaño de bloque. Un bloque final truncado (corte de energía,
+crash) se ignora al leer.
+"""
+
+import os
+import csv
+import json
+import struct
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'L206COL1'
+COLUMNAR_EXTENSION = '.l206'
+DEFAULT_CHUNK_ROWS = 4096
+
+# Mismas columnas y orden que el CSV de DataRecorder
+COLUMNS = (
+    ('Timestamp_ms', '<f8'),
+    ('PotenciaA', '<i2'),
+    ('PotenciaB', '<i2'),
+    ('Sensor1', '<u2'),
+    ('Sensor2', '<u2'),
+)
+
+_U32 = struct.Struct('<I')
+
+
+class ColumnarWriter:
+    """Escritor por bloques del formato columnar."""
+
+    def __init__(self, filename, chunk_rows=DEFAULT_CHUNK_ROWS):
+        """
+        Crea el archivo y escribe el header.
+
+        Args:
+            filename: Ruta del archivo .l206
+            chunk_rows: Filas por bloque (memoria preasignada por columna)
+        """
+        self.filename = filename
+        self.chunk_rows = int(chunk_rows)
+        self.rows_written = 0
+        self._names = [name for name, _ in COLUMNS]
+        self._chunk = {name: np.empty(self.chunk_rows, dtype=dtype) for name, dtype in COLUMNS}
+        self._n = 0
+
+        header = json.dumps({
+            'columns': [[name, dtype] for name, dtype in COLUMNS],
+            'chunk_rows': self.chunk_rows,
+        }).encode('utf-8')
+        self._file = open(filename, 'wb')
+        self._file.write(MAGIC + _U32.pack(len(header)) + header)
+        logger.debug(f"ColumnarWriter creado: {filename} ({self.chunk_rows} filas/bloque)")
+
+    def append_row(self, time_ms, pot_a, pot_b, sens_1, sens_2):
+        """Agrega una muestra al bloque actual."""
+        i = self._n
+        chunk = self._chunk
+        chunk['Timestamp_ms'][i] = time_ms
+        chunk['PotenciaA'][i] = pot_a
+        chunk['PotenciaB'][i] = pot_b
+        chunk['Sensor1'][i] = sens_1
+        chunk['Sensor2'][i] = sens_2
+        self._n = i + 1
+        if self._n == self.chunk_rows:
+            self._write_chunk()
+
+    def append_columns(self, time_ms, pot_a, pot_b, sens_1, sens_2):
+        """Agrega un lote de muestras (arrays de igual longitud)."""
+        columns = dict(zip(self._names, (time_ms, pot_a, pot_b, sens_1, sens_2)))
+        total = len(time_ms)
+        start = 0
+        while start < total:
+            take = min(self.chunk_rows - self._n, total - start)
+            for name in self._names:
+                self._chunk[name][self._n:self._n + take] = columns[name][start:start + take]
+            self._n += take
+            start += take
+            if self._n == self.chunk_rows:
+                self._write_chunk()
+
+    def _write_chunk(self):
+        n = self._n
+        if n == 0:
+            return
+        parts = [_U32.pack(n)]
+        parts.extend(self._chunk[name][:n].tobytes() for name in self._names)
+        self._file.write(b''.join(parts))
+        self.rows_written += n
+        self._n = 0
+
+    def flush(self, write_partial=True):
+        """
+        Vacía los buffers del sistema.
+
+        Args:
+            write_partial: Escribir también el bloque incompleto en curso
+                (False mantiene bloques de tamaño fijo durante la grabación)
+        """
+        if write_partial:
+            self._write_chunk()
+        self._file.flush()
+
+    def close(self):
+        """Cierra el archivo escribiendo las muestras pendientes."""
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+        logger.info(f"Archivo columnar cerrado: {self.filename} ({self.rows_written} filas)")
+
+
+def is_columnar_file(filename):
+    """Retorna True si el archivo tiene el MAGIC del formato columnar."""
+    try:
+        with open(filename, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def read_header(buffer):
+    """
+    Lee el header de un archivo columnar ya cargado en memoria.
+
+    Returns:
+        tuple: (columns [(name, dtype)], chunk_rows, offset del primer bloque)
+    """
+    if bytes(buffer[:len(MAGIC)]) != MAGIC:
+        raise ValueError("No es un archivo columnar L206")
+    (header_len,) = _U32.unpack_from(buffer, len(MAGIC))
+    start = len(MAGIC) + _U32.size
+    header = json.loads(bytes(buffer[start:start + header_len]).decode('utf-8'))
+    columns = [(name, np.dtype(dtype)) for name, dtype in header['columns']]
+    return columns, header['chunk_rows'], start + header_len
+
+
+def load_columnar(filename, mmap=False):
+    """
+    Carga un archivo columnar completo.
+
+    Args:
+        filename: Ruta del archivo .l206
+        mmap: Mapear el archivo en memoria en lugar de leerlo
+
+    Returns:
+        dict: {nombre_columna: ndarray}
+    """
+    if mmap:
+        raw = np.memmap(filename, dtype=np.uint8, mode='r')
+    else:
+        raw = np.fromfile(filename, dtype=np.uint8)
+    columns, _, offset = read_header(raw)
+    row_bytes = sum(dtype.itemsize for _, dtype in columns)
+
+    pieces = {name: [] for name, _ in columns}
+    size = len(raw)
+    while offset + _U32.size <= size:
+        (n,) = _U32.unpack_from(raw, offset)
+        offset += _U32.size
+        if offset + n * row_bytes > size:
+            logger.warning(f"Bloque final truncado en {filename} ({n} filas ignoradas)")
+            break
+        for name, dtype in columns:
+            nbytes = n * dtype.itemsize
+            pieces[name].append(raw[offset:offset + nbytes].view(dtype))
+            offset += nbytes
+
+    return {
+        name: (np.concatenate(pieces[name]) if pieces[name] else np.empty(0, dtype=dtype))
+        for name, dtype in columns
+    }
+
+
+def export_columnar_to_csv(filename, csv_filename=None):
+    """
+    Exporta un archivo columnar al CSV clásico de DataRecorder.
+
+    Args:
+        filename: Ruta del archivo .l206
+        csv_filename: Destino (por defecto mismo nombre con .csv)
+
+    Returns:
+        str: Ruta del CSV generado
+    """
+    if csv_filename is None:
+        csv_filename = os.path.splitext(filename)[0] + '.csv'
+    data = load_columnar(filename)
+    names = [name for name, _ in COLUMNS]
+    times = data['Timestamp_ms']
+    # Mantener enteros cuando el tiempo proviene del reloj del host (ms)
+    if len(times) and np.all(times == np.round(times)):
+        times = times.astype(np.int64)
+    with open(csv_filename, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(names)
+        writer.writerows(zip(times.tolist(), *(data[name].tolist() for name in names[1:])))
+    logger.info(f"Exportado {len(times)} filas: {filename} → {csv_filename}")
+    return csv_filename
+
+
+def load_recording(filename):
+    """
+    Carga una grabación (CSV o columnar) como DataFrame de pandas.
+
+    Permite que los análisis existentes acepten ambos formatos.
+
+    Returns:
+        pandas.DataFrame: Columnas Timestamp_ms, PotenciaA, PotenciaB, Sensor1, Sensor2
+    """
+    import pandas as pd
+
+    if is_columnar_file(filename):
+        return pd.DataFrame(load_columnar(filename))
+    return pd.read_csv(filename)
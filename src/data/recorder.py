@@ -2,52 +2,117 @@
 Grabación de datos experimentales.
 
 Este módulo maneja la grabación de datos en archivos CSV para análisis posterior.
+
+Si el firmware envía su timestamp micros(), la columna Timestamp_ms se
+deriva del reloj del dispositivo (resolución de µs) en lugar del instante
+en que la GUI procesa la muestra.
+
+Backends:
+- 'csv': una fila csv.writer por muestra (formato histórico)
+- 'columnar': bloques NumPy en archivo binario .l206 (ver data.columnar)
+
+Modo con hilo escritor (threaded=True): el llamador (GUI) solo calcula el
+timestamp y encola la muestra en una cola acotada; un thread dedicado
+escribe por lotes y hace flush periódico. Si la cola se llena las
+muestras se descartan y se contabilizan (ver get_writer_stats()).
 """
 
 import csv
 import time
+import queue
 import logging
+import threading
+
+import numpy as np
+
+from .columnar import ColumnarWriter, COLUMNAR_EXTENSION
 
 logger = logging.getLogger(__name__)
 
+RECORDING_BACKENDS = ('csv', 'columnar')
+
+# Hilo escritor
+WRITER_QUEUE_SIZE = 20000        # Elementos (muestra o lote) en cola
+WRITER_FLUSH_INTERVAL_S = 0.5    # Flush periódico al disco
+WRITER_MAX_ITEMS_PER_WRITE = 2048
+
+_STOP = object()
+
 
 class DataRecorder:
-    """Maneja la grabación de datos experimentales en CSV."""
+    """Maneja la grabación de datos experimentales en CSV o formato columnar."""
     
-    def __init__(self):
-        """Inicializa el grabador de datos."""
+    def __init__(self, backend='csv', threaded=False, queue_size=WRITER_QUEUE_SIZE,
+                 flush_interval_s=WRITER_FLUSH_INTERVAL_S):
+        """
+        Inicializa el grabador de datos.
+        
+        Args:
+            backend: 'csv' o 'columnar' (por defecto para start_recording)
+            threaded: Escribir desde un thread dedicado con cola acotada
+            queue_size: Capacidad de la cola del hilo escritor
+            flush_interval_s: Periodo de flush del hilo escritor
+        """
+        if backend not in RECORDING_BACKENDS:
+            raise ValueError(f"Backend de grabación inválido: {backend}")
+        self.backend = backend
+        self.threaded = threaded
+        self.queue_size = queue_size
+        self.flush_interval_s = flush_interval_s
+        self._queue = None
+        self._writer_thread = None
+        self._reset_writer_stats()
         self.is_recording = False
         self.csv_file = None
         self.csv_writer = None
+        self.columnar_writer = None
         self.start_time = None
+        # Primer timestamp del dispositivo de la grabación (µs desenvueltos)
+        self.device_t0_us = None
         logger.debug("DataRecorder inicializado")
     
-    def start_recording(self, filename):
+    def start_recording(self, filename, backend=None):
         """
-        Inicia la grabación en archivo CSV.
+        Inicia la grabación en archivo CSV o columnar.
         
         Args:
-            filename: Nombre del archivo CSV
+            filename: Nombre del archivo
+            backend: 'csv' o 'columnar' (None = self.backend)
             
         Returns:
             tuple: (success: bool, message: str)
         """
-        logger.info(f"Iniciando grabación en: {filename}")
+        backend = backend or self.backend
+        logger.info(f"Iniciando grabación ({backend}) en: {filename}")
         
-        # Asegurar extensión .csv
-        if not filename.endswith('.csv'):
-            filename += '.csv'
-            logger.debug(f"Extensión .csv agregada: {filename}")
+        # Asegurar extensión según backend
+        extension = COLUMNAR_EXTENSION if backend == 'columnar' else '.csv'
+        if backend == 'columnar' and filename.endswith('.csv'):
+            filename = filename[:-len('.csv')]
+        if not filename.endswith(extension):
+            filename += extension
+            logger.debug(f"Extensión {extension} agregada: {filename}")
         
         try:
-            self.csv_file = open(filename, 'w', newline='', encoding='utf-8')
-            self.csv_writer = csv.writer(self.csv_file)
-            self.csv_writer.writerow(["Timestamp_ms", "PotenciaA", "PotenciaB", "Sensor1", "Sensor2"])
-            logger.info(f"Archivo CSV creado exitosamente: {filename}")
+            if backend == 'columnar':
+                self.columnar_writer = ColumnarWriter(filename)
+                logger.info(f"Archivo columnar creado exitosamente: {filename}")
+            else:
+                self.csv_file = open(filename, 'w', newline='', encoding='utf-8')
+                self.csv_writer = csv.writer(self.csv_file)
+                self.csv_writer.writerow(["Timestamp_ms", "PotenciaA", "PotenciaB", "Sensor1", "Sensor2"])
+                logger.info(f"Archivo CSV creado exitosamente: {filename}")
             
             self.start_time = time.time()
+            self.device_t0_us = None
+            self._reset_writer_stats()
+            if self.threaded:
+                self._queue = queue.Queue(maxsize=self.queue_size)
+                self._writer_thread = threading.Thread(
+                    target=self._writer_loop, name="DataRecorderWriter", daemon=True)
+                self._writer_thread.start()
             self.is_recording = True
-            logger.info(f"Grabación iniciada en t={self.start_time}")
+            logger.info(f"Grabación iniciada en t={self.start_time} (hilo escritor={self.threaded})")
             
             return (True, f"Grabando en: {filename}")
             
@@ -68,35 +133,209 @@ class DataRecorder:
         logger.info("Deteniendo grabación")
         self.is_recording = False
         
-        if self.csv_file:
+        dropped = 0
+        if self._writer_thread is not None:
+            # El hilo escritor drena la cola antes de terminar
+            self._queue.put(_STOP)
+            self._writer_thread.join()
+            self._writer_thread = None
+            self._queue = None
+            stats = self.get_writer_stats()
+            logger.info(f"Hilo escritor finalizado: {stats}")
+            dropped = stats['dropped_samples']
+        dropped_msg = f"{dropped} descartadas" if dropped else ""
+        
+        if self.columnar_writer:
+            try:
+                self.columnar_writer.close()
+            except Exception as e:
+                logger.error(f"Error al cerrar archivo columnar: {e}")
+            rows = self.columnar_writer.rows_written
+            self.columnar_writer = None
+            return f"Estado: Detenido ({rows} muestras{', ' + dropped_msg if dropped else ''})"
+        elif self.csv_file:
             self.csv_file.close()
             logger.info("Archivo CSV cerrado correctamente")
             self.csv_file = None
             self.csv_writer = None
-            return "Estado: Detenido"
+            return f"Estado: Detenido ({dropped_msg})" if dropped else "Estado: Detenido"
         else:
             logger.warning("stop_recording llamado pero no había archivo abierto")
             return "Estado: No había grabación activa"
     
-    def write_data_point(self, pot_a, pot_b, sens_1, sens_2):
+    def write_data_point(self, pot_a, pot_b, sens_1, sens_2, device_time_us=None):
         """
-        Escribe un punto de datos al archivo CSV.
+        Escribe un punto de datos al archivo (CSV o columnar).
+        
+        En modo threaded solo se calcula el timestamp y se encola.
         
         Args:
             pot_a: Potencia motor A
             pot_b: Potencia motor B
             sens_1: Valor sensor 1
             sens_2: Valor sensor 2
+            device_time_us: Timestamp desenvuelto del firmware (opcional)
         """
-        if self.is_recording and self.csv_writer and self.start_time:
+        if self.is_recording and (self.csv_writer or self.columnar_writer) and self.start_time:
             try:
-                current_time_ms = int((time.time() - self.start_time) * 1000)
-                self.csv_writer.writerow([current_time_ms, pot_a, pot_b, sens_1, sens_2])
+                if device_time_us is not None:
+                    if self.device_t0_us is None:
+                        self.device_t0_us = device_time_us
+                    current_time_ms = round((device_time_us - self.device_t0_us) / 1000.0, 3)
+                else:
+                    current_time_ms = int((time.time() - self.start_time) * 1000)
+                row = (current_time_ms, pot_a, pot_b, sens_1, sens_2)
+                if self._queue is not None:
+                    self._enqueue(('row', row), 1)
+                else:
+                    self._write_rows([row])
             except Exception as e:
                 logger.error(f"Error al escribir datos: {e}")
     
+    def write_data_batch(self, samples):
+        """
+        Escribe un lote de muestras al archivo (CSV o columnar).
+        
+        Usa el timestamp del dispositivo (campo t_dev) cuando está presente
+        y, si no, el instante de decodificación de cada muestra (t_host) en
+        lugar del instante de escritura.
+        
+        Args:
+            samples: ndarray con SAMPLE_DTYPE (ver core.communication.protocol)
+        """
+        if self.is_recording and (self.csv_writer or self.columnar_writer) and self.start_time:
+            try:
+                t_dev = samples['t_dev']
+                if not np.isnan(t_dev).any():
+                    if self.device_t0_us is None:
+                        self.device_t0_us = t_dev[0]
+                    times_ms = np.round((t_dev - self.device_t0_us) / 1000.0, 3)
+                else:
+                    times_ms = ((samples['t_host'] - self.start_time) * 1000).astype(int)
+                columns = (times_ms, samples['pot_a'], samples['pot_b'],
+                           samples['sens_1'], samples['sens_2'])
+                if self._queue is not None:
+                    self._enqueue(('columns', columns), len(samples))
+                else:
+                    self._write_columns(columns)
+            except Exception as e:
+                logger.error(f"Error al escribir lote de datos: {e}")
+    
+    # --- Escritura (en el llamador o en el hilo escritor) ---
+    
+    def _write_rows(self, rows):
+        if self.columnar_writer:
+            for row in rows:
+                self.columnar_writer.append_row(*row)
+        else:
+            self.csv_writer.writerows(rows)
+        self._written += len(rows)
+    
+    def _write_columns(self, columns):
+        if self.columnar_writer:
+            self.columnar_writer.append_columns(*columns)
+        else:
+            self.csv_writer.writerows(zip(*(col.tolist() for col in columns)))
+        self._written += len(columns[0])
+    
+    def _flush(self):
+        t0 = time.perf_counter()
+        if self.columnar_writer:
+            self.columnar_writer.flush(write_partial=False)
+        elif self.csv_file:
+            self.csv_file.flush()
+        latency_ms = (time.perf_counter() - t0) * 1000
+        self._flushes += 1
+        self._flush_total_ms += latency_ms
+        self._flush_last_ms = latency_ms
+        self._flush_max_ms = max(self._flush_max_ms, latency_ms)
+    
+    # --- Hilo escritor ---
+    
+    def _enqueue(self, item, n_samples):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._dropped += n_samples
+            return
+        depth = self._queue.qsize()
+        if depth > self._max_queue_depth:
+            self._max_queue_depth = depth
+    
+    def _writer_loop(self):
+        """Drena la cola por lotes y hace flush periódico hasta recibir _STOP."""
+        last_flush = time.monotonic()
+        stop = False
+        while not stop:
+            try:
+                items = [self._queue.get(timeout=self.flush_interval_s)]
+            except queue.Empty:
+                items = []
+            while len(items) < WRITER_MAX_ITEMS_PER_WRITE:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            rows = []
+            try:
+                for item in items:
+                    if item is _STOP:
+                        stop = True
+                        continue
+                    kind, payload = item
+                    if kind == 'row':
+                        rows.append(payload)
+                    else:
+                        if rows:
+                            self._write_rows(rows)
+                            rows = []
+                        self._write_columns(payload)
+                if rows:
+                    self._write_rows(rows)
+                
+                now = time.monotonic()
+                if stop or now - last_flush >= self.flush_interval_s:
+                    self._flush()
+                    last_flush = now
+            except Exception as e:
+                logger.error(f"Error en hilo escritor: {e}")
+    
+    def _reset_writer_stats(self):
+        self._written = 0
+        self._dropped = 0
+        self._max_queue_depth = 0
+        self._flushes = 0
+        self._flush_total_ms = 0.0
+        self._flush_last_ms = 0.0
+        self._flush_max_ms = 0.0
+    
+    def get_writer_stats(self):
+        """
+        Retorna contadores del grabador.
+        
+        Returns:
+            dict: queue_depth, max_queue_depth, written_samples, dropped_samples,
+            flushes, flush_last_ms, flush_max_ms, flush_mean_ms
+        """
+        return {
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'max_queue_depth': self._max_queue_depth,
+            'written_samples': self._written,
+            'dropped_samples': self._dropped,
+            'flushes': self._flushes,
+            'flush_last_ms': self._flush_last_ms,
+            'flush_max_ms': self._flush_max_ms,
+            'flush_mean_ms': self._flush_total_ms / self._flushes if self._flushes else 0.0,
+        }
+    
     def __del__(self):
         """Destructor - asegura que el archivo se cierre."""
+        if self.columnar_writer:
+            try:
+                self.columnar_writer.close()
+            except:
+                pass
         if self.csv_file:
             try:
                 self.csv_file.close()
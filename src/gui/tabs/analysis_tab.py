@@ -14,6 +14,8 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QGridLayout, QHBoxLayout,
                              QTextEdit, QCheckBox, QFileDialog)
 from PyQt5.QtCore import pyqtSignal
 
+from data.columnar import load_recording
+
 logger = logging.getLogger('MotorControl_L206')
 
 
@@ -176,7 +178,7 @@ class AnalysisTab(QWidget):
         """Abre diálogo para seleccionar archivo CSV."""
         logger.info("=== BOTÓN: Examinar archivo presionado ===")
         filename, _ = QFileDialog.getOpenFileName(
-            self, "Seleccionar archivo CSV", "", "CSV Files (*.csv);;All Files (*)"
+            self, "Seleccionar archivo CSV", "", "Grabaciones (*.csv *.l206);;CSV Files (*.csv);;All Files (*)"
         )
         if filename:
             self.filename_input.setText(filename)
@@ -188,8 +190,8 @@ class AnalysisTab(QWidget):
         filename = self.filename_input.text()
         
         try:
-            df = pd.read_csv(filename)
-            logger.info(f"CSV cargado: {len(df)} filas")
+            df = load_recording(filename)
+            logger.info(f"Grabación cargada: {len(df)} filas")
             df['Tiempo_s'] = (df['Timestamp_ms'] - df['Timestamp_ms'].iloc[0]) / 1000.0
             
             # Crear figura
@@ -427,6 +427,12 @@ class CameraTab(QWidget):
         
         if self.camera_view_window is None:
             self.camera_view_window = CameraViewWindow(self.parent_gui)
+            # Stream de display reducido al tamaño del área de video (en el worker)
+            self.camera_view_window.display_size_changed.connect(
+                self.camera_service.set_display_size
+            )
+            # Detección sobre una copia tomada con la ranura del pool retenida
+            self.camera_view_window.set_frame_source(self.camera_service.snapshot_frame)
             
             # Configurar SmartFocusScorer desde orchestrator
             if self.orchestrator and self.orchestrator.scorer:
@@ -609,7 +615,7 @@ class CameraTab(QWidget):
         
         # Crear servicio de volumetría
         volumetry_service = VolumetryService(
-            get_current_frame=lambda: self.camera_service.current_frame if self.camera_service else None,
+            get_current_frame=lambda: self.camera_service.snapshot_frame() if self.camera_service else None,
             smart_focus_scorer=self.orchestrator.scorer if self.orchestrator else None,
             move_z=self._volumetry_move_z,
             get_z_position=self._volumetry_get_z,
@@ -654,7 +660,10 @@ class CameraTab(QWidget):
         
         try:
             # Obtener frame actual - COPIA
-            frame = self.camera_service.worker.current_frame.copy()
+            frame = self.camera_service.snapshot_frame()
+            if frame is None:
+                logger.error("[CameraTab] current_frame es None")
+                return False
             img_format = config.get('img_format', 'png')
             
             # EXACTAMENTE la misma lógica de CameraService.capture_image
@@ -1141,9 +1150,9 @@ class CameraTab(QWidget):
         # Obtener frame actual
         current_frame = None
         if self.camera_service and self.camera_service.current_frame is not None:
-            current_frame = self.camera_service.current_frame
+            current_frame = self.camera_service.snapshot_frame()
         elif self.camera_worker and self.camera_worker.current_frame is not None:
-            current_frame = self.camera_worker.current_frame
+            current_frame = self.camera_worker.copy_current_frame()
         
         if current_frame is None:
             self.log_message("❌ No hay frame disponible")
@@ -2,14 +2,16 @@
 Pestaña de Grabación de Datos.
 
 Encapsula la UI y lógica de grabación de experimentos.
-Usa DataRecorder para la lógica de archivos CSV.
+Usa DataRecorder para la lógica de archivos CSV / columnar (.l206).
 """
 
 import logging
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QGridLayout, QGroupBox,
-                             QLabel, QLineEdit, QPushButton)
+                             QLabel, QLineEdit, QPushButton, QComboBox, QFileDialog)
 from PyQt5.QtCore import pyqtSignal
 
+from data.columnar import export_columnar_to_csv
+
 logger = logging.getLogger('MotorControl_L206')
 
 
@@ -54,6 +56,16 @@ class RecordingTab(QWidget):
         self.filename_input.setPlaceholderText("Nombre del archivo CSV...")
         grid_layout.addWidget(self.filename_input, 0, 1)
         
+        # Formato de grabación
+        grid_layout.addWidget(QLabel("Formato:"), 1, 0)
+        self.backend_combo = QComboBox()
+        self.backend_combo.addItem("CSV (texto)", 'csv')
+        self.backend_combo.addItem("Columnar binario (.l206)", 'columnar')
+        self.backend_combo.setToolTip("Columnar: escritura por bloques NumPy, menor tamaño y recarga rápida")
+        index = self.backend_combo.findData(self.data_recorder.backend)
+        self.backend_combo.setCurrentIndex(max(index, 0))
+        grid_layout.addWidget(self.backend_combo, 1, 1)
+        
         # Botón iniciar
         self.start_btn = QPushButton("▶️ Iniciar Grabación")
         self.start_btn.setStyleSheet("""
@@ -68,7 +80,7 @@ class RecordingTab(QWidget):
             QPushButton:disabled { background-color: #505050; color: #808080; }
         """)
         self.start_btn.clicked.connect(self.start_recording)
-        grid_layout.addWidget(self.start_btn, 1, 0)
+        grid_layout.addWidget(self.start_btn, 2, 0)
         
         # Botón detener
         self.stop_btn = QPushButton("⏹️ Detener Grabación")
@@ -85,12 +97,17 @@ class RecordingTab(QWidget):
         """)
         self.stop_btn.clicked.connect(self.stop_recording)
         self.stop_btn.setEnabled(False)
-        grid_layout.addWidget(self.stop_btn, 1, 1)
+        grid_layout.addWidget(self.stop_btn, 2, 1)
         
         # Estado
         self.status_label = QLabel("Estado: Detenido")
         self.status_label.setStyleSheet("color: #E67E22; font-weight: bold;")
-        grid_layout.addWidget(self.status_label, 2, 0, 1, 2)
+        grid_layout.addWidget(self.status_label, 3, 0, 1, 2)
+        
+        # Exportación de grabaciones columnares
+        self.export_btn = QPushButton("📄 Exportar .l206 → CSV")
+        self.export_btn.clicked.connect(self.export_to_csv)
+        grid_layout.addWidget(self.export_btn, 4, 0, 1, 2)
         
         group_box.setLayout(grid_layout)
         layout.addWidget(group_box)
@@ -100,8 +117,9 @@ class RecordingTab(QWidget):
         """Inicia la grabación de datos usando DataRecorder."""
         logger.info("=== BOTÓN: Iniciar Grabación presionado ===")
         filename = self.filename_input.text()
+        backend = self.backend_combo.currentData()
         
-        success, message = self.data_recorder.start_recording(filename)
+        success, message = self.data_recorder.start_recording(filename, backend=backend)
         
         if success:
             self.status_label.setText(message)
@@ -109,6 +127,7 @@ class RecordingTab(QWidget):
             self.start_btn.setEnabled(False)
             self.stop_btn.setEnabled(True)
             self.filename_input.setEnabled(False)
+            self.backend_combo.setEnabled(False)
             self.recording_started.emit(filename)
             logger.debug("Grabación iniciada exitosamente")
         else:
@@ -127,9 +146,27 @@ class RecordingTab(QWidget):
         self.start_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
         self.filename_input.setEnabled(True)
+        self.backend_combo.setEnabled(True)
         self.recording_stopped.emit()
         logger.debug("Grabación detenida")
     
+    def export_to_csv(self):
+        """Exporta una grabación columnar (.l206) al formato CSV clásico."""
+        logger.info("=== BOTÓN: Exportar .l206 → CSV presionado ===")
+        filename, _ = QFileDialog.getOpenFileName(
+            self, "Seleccionar grabación columnar", "", "Grabación columnar (*.l206);;All Files (*)"
+        )
+        if not filename:
+            return
+        try:
+            csv_filename = export_columnar_to_csv(filename)
+            self.status_label.setText(f"Exportado: {csv_filename}")
+            self.status_label.setStyleSheet("color: #2ECC71; font-weight: bold;")
+        except Exception as e:
+            logger.error(f"Error exportando {filename}: {e}")
+            self.status_label.setText(f"Error al exportar: {e}")
+            self.status_label.setStyleSheet("color: #E74C3C; font-weight: bold;")
+    
     def get_filename(self):
         """Retorna el nombre del archivo actual."""
         return self.filename_input.text()
@@ -22,12 +22,13 @@ import numpy as np
 
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QTextEdit, QScrollArea,
                              QMessageBox, QFileDialog)
-from PyQt5.QtCore import Qt, pyqtSignal, QTimer
+from PyQt5.QtCore import Qt, pyqtSignal, QTimer, QThread
 
 from config.constants import (
     POSITION_TOLERANCE_UM, SETTLING_CYCLES
 )
 from core.services.test_service import TestService, ControllerConfig
+from core.trajectory.trajectory_optimizer import TrajectoryOptimizer
 from gui.utils.trajectory_preview import show_trajectory_preview
 from gui.utils.csv_utils import export_trajectory_csv, import_trajectory_csv
 from gui.utils.test_tab_ui_builder import (
@@ -45,6 +46,25 @@ from utils.parameter_manager import get_parameter_manager
 logger = logging.getLogger('MotorControl_L206')
 
 
+class TrajectoryOptimizerWorker(QThread):
+    """Ejecuta TrajectoryOptimizer.optimize fuera del thread de la GUI."""
+    
+    # Emite: dict de resultado de optimize (o {'success': False, 'message': ...})
+    optimization_done = pyqtSignal(object)
+    
+    def __init__(self, points, parent=None):
+        super().__init__(parent)
+        self.points = np.array(points, dtype=np.float64)
+    
+    def run(self):
+        try:
+            result = TrajectoryOptimizer().optimize(self.points)
+        except Exception as e:
+            logger.error(f"Error optimizando trayectoria: {e}")
+            result = {'success': False, 'message': str(e)}
+        self.optimization_done.emit(result)
+
+
 class TestTab(QWidget):
     """
     Pestaña para prueba de controladores y ejecución de trayectorias.
@@ -105,6 +125,8 @@ class TestTab(QWidget):
         self.trajectory_active = False
         self.trajectory_tolerance = POSITION_TOLERANCE_UM
         self.trajectory_pause = 2.0
+        self._optimizer_worker = None
+        self._optimizer_source = None  # Trayectoria que se está optimizando
         
         # Calibración
         self.calibration_data = None
@@ -197,7 +219,8 @@ class TestTab(QWidget):
             self._generate_trajectory, 
             self._preview_trajectory,
             self._export_trajectory_csv,
-            self._import_trajectory_csv
+            self._import_trajectory_csv,
+            self._optimize_trajectory
         )
         layout.addWidget(trajectory_group)
         
@@ -416,6 +439,46 @@ class TestTab(QWidget):
             else:
                 self.results_text.append(f"❌ {message}")
     
+    def _optimize_trajectory(self):
+        """Reordena la trayectoria actual para minimizar el tiempo estimado de movimiento."""
+        if self.current_trajectory is None or len(self.current_trajectory) == 0:
+            self.results_text.append("❌ Error: Genera o importa una trayectoria primero")
+            return
+        
+        if self._optimizer_worker is not None:
+            return
+        
+        # O(N log N) + 2-opt con presupuesto de segundos: fuera del thread de la GUI
+        self._optimizer_source = self.current_trajectory
+        self._optimizer_worker = TrajectoryOptimizerWorker(self.current_trajectory, parent=self)
+        self._optimizer_worker.optimization_done.connect(self._on_optimization_done)
+        self._optimizer_worker.finished.connect(self._optimizer_worker.deleteLater)
+        if 'optimize_btn' in self._widgets:
+            self._widgets['optimize_btn'].setEnabled(False)
+        self.results_text.append(f"⏳ Optimizando orden de {len(self.current_trajectory)} puntos...")
+        self._optimizer_worker.start()
+    
+    def _on_optimization_done(self, result):
+        """Aplica el resultado del optimizador (thread de la GUI)."""
+        self._optimizer_worker = None
+        if 'optimize_btn' in self._widgets:
+            self._widgets['optimize_btn'].setEnabled(True)
+        source, self._optimizer_source = self._optimizer_source, None
+        if not result.get('success'):
+            self.results_text.append(f"❌ Error al optimizar: {result['message']}")
+            return
+        if self.current_trajectory is not source:
+            self.results_text.append("ℹ️ La trayectoria cambió durante la optimización: resultado descartado")
+            return
+        if result['time_saved_s'] > 0:
+            self.current_trajectory = result['points']
+            self.trajectory_index = 0
+            self.set_trajectory_status(True, len(self.current_trajectory))
+            self.results_text.append(f"⚡ {result['message']}")
+        else:
+            self.results_text.append(f"ℹ️ {result['message']}")
+        logger.info(result['message'])
+    
     def _preview_trajectory(self):
         """Muestra vista previa de la trayectoria generada con gráfico XY."""
         logger.info("=== BOTÓN: Vista Previa presionado ===")
@@ -275,7 +275,8 @@ def create_position_control_section(widgets: dict, start_callback, stop_callback
 
 
 def create_trajectory_section(widgets: dict, generate_callback, preview_callback, 
-                              export_callback, import_callback) -> QGroupBox:
+                              export_callback, import_callback,
+                              optimize_callback=None) -> QGroupBox:
     """
     Crea sección de generación de trayectorias.
     
@@ -285,6 +286,7 @@ def create_trajectory_section(widgets: dict, generate_callback, preview_callback
         preview_callback: Función para vista previa
         export_callback: Función para exportar CSV
         import_callback: Función para importar CSV
+        optimize_callback: Función para optimizar el orden de visita (opcional)
         
     Returns:
         QGroupBox configurado
@@ -347,6 +349,12 @@ def create_trajectory_section(widgets: dict, generate_callback, preview_callback
     import_btn.clicked.connect(import_callback)
     btn_layout.addWidget(import_btn)
     
+    if optimize_callback is not None:
+        widgets['optimize_btn'] = QPushButton("⚡ Optimizar Orden")
+        widgets['optimize_btn'].setToolTip("Reordena los puntos para minimizar el tiempo estimado de movimiento")
+        widgets['optimize_btn'].clicked.connect(optimize_callback)
+        btn_layout.addWidget(widgets['optimize_btn'])
+    
     layout.addLayout(btn_layout)
     
     group.setLayout(layout)
@@ -12,6 +12,10 @@ from PyQt5.QtCore import Qt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 
+# Límites de la vista previa para trayectorias grandes (100k+ puntos)
+PREVIEW_MAX_MARKERS = 5000
+PREVIEW_MAX_TABLE_ROWS = 2000
+
 
 def show_trajectory_preview(parent, trajectory: np.ndarray) -> bool:
     """
@@ -45,8 +49,10 @@ def show_trajectory_preview(parent, trajectory: np.ndarray) -> bool:
     # Trayectoria (línea azul)
     ax.plot(x_coords, y_coords, '-', color='#3498DB', linewidth=2, label='Trayectoria', zorder=1)
     
-    # Puntos a visitar (puntos rojos)
-    ax.scatter(x_coords, y_coords, c='red', s=50, zorder=2, label=f'Puntos ({len(x_coords)})')
+    # Puntos a visitar (puntos rojos, submuestreados si son demasiados)
+    stride = max(1, len(x_coords) // PREVIEW_MAX_MARKERS)
+    ax.scatter(x_coords[::stride], y_coords[::stride], c='red', s=50 if stride == 1 else 4,
+               zorder=2, label=f'Puntos ({len(x_coords)})')
     
     # Marcar inicio (verde) y fin (amarillo)
     ax.scatter(x_coords[0], y_coords[0], c='#2ECC71', s=150, marker='s', zorder=3, label='Inicio')
@@ -92,8 +98,9 @@ def show_trajectory_preview(parent, trajectory: np.ndarray) -> bool:
     title_label.setStyleSheet("font-size: 14px; font-weight: bold; padding: 5px;")
     right_layout.addWidget(title_label)
     
-    # Tabla de puntos
-    table = QTableWidget(len(trajectory), 3)
+    # Tabla de puntos (solo los primeros PREVIEW_MAX_TABLE_ROWS)
+    n_rows = min(len(trajectory), PREVIEW_MAX_TABLE_ROWS)
+    table = QTableWidget(n_rows, 3)
     table.setHorizontalHeaderLabels(["#", "X (µm)", "Y (µm)"])
     table.setStyleSheet("""
         QTableWidget {
@@ -112,7 +119,7 @@ def show_trajectory_preview(parent, trajectory: np.ndarray) -> bool:
     """)
     
     # Llenar tabla con coordenadas
-    for i, point in enumerate(trajectory):
+    for i, point in enumerate(trajectory[:n_rows]):
         x, y = point[0], point[1]
         
         # Número de punto
@@ -138,7 +145,8 @@ def show_trajectory_preview(parent, trajectory: np.ndarray) -> bool:
     right_layout.addWidget(table)
     
     # Info resumen
-    info_label = QLabel(f"Total: {len(trajectory)} puntos | "
+    shown = f" (tabla: primeros {n_rows})" if n_rows < len(trajectory) else ""
+    info_label = QLabel(f"Total: {len(trajectory)} puntos{shown} | "
                        f"X: [{x_min:.0f}, {x_max:.0f}] µm | "
                        f"Y: [{y_min:.0f}, {y_max:.0f}] µm")
     info_label.setStyleSheet("font-size: 11px; color: #888888; padding: 5px;")
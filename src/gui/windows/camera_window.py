@@ -8,7 +8,7 @@ import numpy as np
 import cv2
 import time
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QCheckBox, QListWidget, QListWidgetItem, QSplitter
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer
+from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer, QEvent
 from PyQt5.QtGui import QPixmap, QImage
 from gui.styles.dark_theme import DARK_STYLESHEET
 
@@ -99,6 +99,8 @@ class CameraViewWindow(QWidget):
     # Señales para comunicación con MicroscopyService
     skip_roi_requested = pyqtSignal()
     pause_toggled = pyqtSignal(bool)
+    # Tamaño del área de video (ancho, alto) para el stream de display reducido
+    display_size_changed = pyqtSignal(int, int)
     
     def __init__(self, parent=None):
         super().__init__(parent, Qt.Window)
@@ -182,6 +184,7 @@ class CameraViewWindow(QWidget):
         self.video_label.setAlignment(Qt.AlignCenter)
         self.video_label.setStyleSheet("background-color: #000; border: 2px solid #505050;")
         self.video_label.setMinimumSize(640, 480)
+        self.video_label.installEventFilter(self)
         splitter.addWidget(self.video_label)
         
         # Lista de objetos detectados
@@ -247,7 +250,8 @@ class CameraViewWindow(QWidget):
     
     def _setup_state(self):
         self.frame_count = 0
-        self.last_frame = None  # Último frame de cámara (uint16)
+        self.last_frame = None  # Copia del último frame (solo sin frame_source)
+        self._frame_source = None  # Callable → copia del frame actual (CameraService.snapshot_frame)
         self.detection_result = None  # {contours, boxes, frame_size, n_objects}
         
         # Worker para detección asíncrona
@@ -383,17 +387,24 @@ class CameraViewWindow(QWidget):
             self.frame_count += 1
             
             if raw_frame is not None:
-                self.last_frame = raw_frame
+                # raw_frame es una vista de una ranura del pool que se libera al
+                # volver de la señal: sin frame_source, copiar solo si se puede detectar
+                if self._frame_source is None and self.scorer is not None:
+                    self.last_frame = raw_frame.copy()
                 # Calcular score en tiempo real si hay scorer configurado
                 self._update_realtime_score(raw_frame)
             
             # SIEMPRE dibujar overlay (Z y Score siempre visibles)
             q_image = self._draw_overlay_on_qimage(q_image)
             
-            # Mostrar frame
+            # Mostrar frame (si el worker ya lo redujo al tamaño del video, sin reescalar)
             pixmap = QPixmap.fromImage(q_image)
-            scaled = pixmap.scaled(self.video_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            self.video_label.setPixmap(scaled)
+            target = self.video_label.size()
+            fits = (pixmap.width() <= target.width() and pixmap.height() <= target.height()
+                    and (target.width() - pixmap.width() <= 1 or target.height() - pixmap.height() <= 1))
+            if not fits:
+                pixmap = pixmap.scaled(target, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            self.video_label.setPixmap(pixmap)
             
             n_obj = self.detection_result.get('n_objects', 0) if self.detection_result else 0
             mode = "🔴 AF" if self.autofocus_active else "🎥"
@@ -438,6 +449,11 @@ class CameraViewWindow(QWidget):
         except Exception as e:
             logger.debug(f"Error calculando score en tiempo real: {e}")
     
+    def set_frame_source(self, snapshot_fn):
+        """Configura la fuente de frames para detección (copia con la ranura retenida)."""
+        self._frame_source = snapshot_fn
+        self.last_frame = None
+    
     def set_cfocus_controller(self, controller):
         """Configura el controlador C-Focus para lectura de Z en tiempo real."""
         self.cfocus_controller = controller
@@ -576,8 +592,11 @@ class CameraViewWindow(QWidget):
     
     def trigger_detection(self):
         """Dispara detección manualmente (llamado desde CameraTab)."""
-        if self.last_frame is not None and self.scorer is not None:
-            self.worker.detect(self.last_frame)
+        if self.scorer is None:
+            return
+        frame = self._frame_source() if self._frame_source is not None else self.last_frame
+        if frame is not None:
+            self.worker.detect(frame)
     
     def clear_detection(self):
         """Limpia resultado de detección."""
@@ -763,5 +782,18 @@ class CameraViewWindow(QWidget):
         """
         self.autofocus_status_msg = message[:30] if message else ""
     
+    def eventFilter(self, obj, event):
+        if obj is self.video_label and event.type() == QEvent.Resize:
+            size = event.size()
+            self.display_size_changed.emit(size.width(), size.height())
+        return super().eventFilter(obj, event)
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        size = self.video_label.size()
+        self.display_size_changed.emit(size.width(), size.height())
+    
     def closeEvent(self, event):
+        # Sin ventana no hay display reducido: volver a resolución completa
+        self.display_size_changed.emit(0, 0)
         super().closeEvent(event)
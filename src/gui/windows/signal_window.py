@@ -3,28 +3,70 @@ Ventana para gráficos de señales en tiempo real.
 
 Esta ventana muestra las señales de control (potencias y sensores) en tiempo real
 utilizando PyQtGraph para un rendimiento óptimo.
+
+Con render_fps > 0 las muestras solo se escriben en el buffer circular y un
+QTimer redibuja las curvas una vez por frame; así el costo de repintado
+depende de la tasa de refresco y no de la tasa de telemetría. El historial
+puede ser mucho mayor que PLOT_LENGTH: al dibujar se reduce con decimación
+min/max (se conservan picos) a SIGNAL_MAX_DISPLAY_POINTS puntos.
 """
 
 import logging
 import numpy as np
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QCheckBox
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QCheckBox, QComboBox, QLabel
+from PyQt5.QtCore import Qt, QTimer
 import pyqtgraph as pg
-from config.constants import PLOT_LENGTH
+from config.constants import (PLOT_LENGTH, SIGNAL_HISTORY_LENGTH, SIGNAL_RENDER_FPS,
+                              SIGNAL_MAX_DISPLAY_POINTS)
 from gui.styles.dark_theme import DARK_STYLESHEET
 
 logger = logging.getLogger(__name__)
 
 
+def minmax_decimate(y, max_points):
+    """
+    Reduce una serie a ~max_points puntos conservando mínimos y máximos.
+    
+    Cada bin aporta su mínimo y su máximo (en ese orden), de modo que los
+    picos siguen visibles aunque se dibujen muchos menos puntos.
+    
+    Args:
+        y: Serie 1D
+        max_points: Número máximo aproximado de puntos a dibujar
+        
+    Returns:
+        tuple: (x, y_decimada) con x en índices de muestra de la serie original
+    """
+    n = len(y)
+    n_bins = max_points // 2
+    if n <= max_points or n_bins < 1:
+        return np.arange(n), y
+    bin_size = n // n_bins
+    usable = n_bins * bin_size
+    offset = n - usable  # Descartar las muestras más antiguas sobrantes
+    blocks = y[offset:].reshape(n_bins, bin_size)
+    out = np.empty(2 * n_bins, dtype=y.dtype)
+    out[0::2] = blocks.min(axis=1)
+    out[1::2] = blocks.max(axis=1)
+    x = offset + np.repeat(np.arange(n_bins) * bin_size, 2) + np.tile([0, bin_size - 1], n_bins)
+    return x, out
+
+
 class SignalWindow(QWidget):
     """Ventana independiente para visualizar señales en tiempo real."""
     
-    def __init__(self, parent=None):
+    # Opciones de historial (muestras) ofrecidas en la UI
+    HISTORY_OPTIONS = (PLOT_LENGTH, 1000, 10000, 60000, 300000)
+    
+    def __init__(self, parent=None, history_length=SIGNAL_HISTORY_LENGTH,
+                 render_fps=SIGNAL_RENDER_FPS):
         """
         Inicializa la ventana de señales.
         
         Args:
             parent: Widget padre (opcional)
+            history_length: Muestras retenidas en el buffer circular
+            render_fps: Frecuencia de redibujado (0 = redibujar en cada muestra)
         """
         super().__init__(parent, Qt.Window)  # Especificar que es una ventana independiente
         self.setWindowTitle('Señales de Control - Tiempo Real')
@@ -71,19 +113,31 @@ class SignalWindow(QWidget):
             self.checkboxes[key] = cb
             checkbox_layout.addWidget(cb)
         
+        # Selector de historial
+        checkbox_layout.addStretch()
+        checkbox_layout.addWidget(QLabel("Historial:"))
+        self.history_combo = QComboBox()
+        options = sorted(set(self.HISTORY_OPTIONS) | {int(history_length)})
+        for n in options:
+            self.history_combo.addItem(f"{n} muestras", n)
+        self.history_combo.setCurrentIndex(options.index(int(history_length)))
+        self.history_combo.currentIndexChanged.connect(
+            lambda: self.set_history_length(self.history_combo.currentData()))
+        checkbox_layout.addWidget(self.history_combo)
+        
         layout.addLayout(checkbox_layout)
         
-        # Buffer circular MÍNIMO con NumPy
-        self.buffer_size = PLOT_LENGTH
-        self.index = 0
+        # Buffer circular con NumPy (arrays pre-asignados, int16)
+        self.max_display_points = SIGNAL_MAX_DISPLAY_POINTS
+        self._allocate_buffers(int(history_length))
         
-        # Arrays pre-asignados contiguos en memoria (MÁXIMA velocidad)
-        self.data = {
-            'power_a': np.zeros(PLOT_LENGTH, dtype=np.int16),  # int16 más rápido que float32
-            'power_b': np.zeros(PLOT_LENGTH, dtype=np.int16),
-            'sensor_1': np.zeros(PLOT_LENGTH, dtype=np.int16),
-            'sensor_2': np.zeros(PLOT_LENGTH, dtype=np.int16),
-        }
+        # Redibujado coalescido por frame
+        self.render_fps = render_fps
+        self._dirty = False
+        self.render_timer = QTimer(self)
+        self.render_timer.timeout.connect(self._render)
+        if render_fps > 0:
+            self.render_timer.setInterval(int(1000 / render_fps))
         
         # LÍNEAS ULTRA-RÁPIDAS - configuración mínima
         # Pens pre-creados (no crear en cada frame)
@@ -101,6 +155,36 @@ class SignalWindow(QWidget):
         
         logger.debug("SignalWindow creada exitosamente")
     
+    def _allocate_buffers(self, history_length):
+        """(Re)asigna el buffer circular y descarta el historial previo."""
+        self.buffer_size = history_length
+        self.index = 0
+        self.count = 0
+        self.data = {
+            'power_a': np.zeros(history_length, dtype=np.int16),  # int16 más rápido que float32
+            'power_b': np.zeros(history_length, dtype=np.int16),
+            'sensor_1': np.zeros(history_length, dtype=np.int16),
+            'sensor_2': np.zeros(history_length, dtype=np.int16),
+        }
+    
+    def set_history_length(self, history_length):
+        """Cambia el largo del historial (reinicia el buffer)."""
+        if history_length and history_length != self.buffer_size:
+            self._allocate_buffers(int(history_length))
+            logger.info(f"SignalWindow: historial = {history_length} muestras")
+            self._dirty = True
+    
+    def showEvent(self, event):
+        """Arranca el timer de render al mostrarse la ventana."""
+        super().showEvent(event)
+        if self.render_fps > 0:
+            self.render_timer.start()
+    
+    def hideEvent(self, event):
+        """Detiene el timer de render al ocultarse la ventana."""
+        super().hideEvent(event)
+        self.render_timer.stop()
+    
     def update_plot_visibility(self):
         """Muestra u oculta las líneas del gráfico según los checkboxes."""
         for key, cb in self.checkboxes.items():
@@ -113,6 +197,8 @@ class SignalWindow(QWidget):
         """
         ACTUALIZACIÓN INSTANTÁNEA - SIN DELAYS, SOLO ESCRITURA DIRECTA.
         Esta función se llama a MÁXIMA VELOCIDAD del puerto serial.
+        
+        En modo coalescido (render_fps > 0) solo escribe en el buffer.
         """
         # Escribir directamente en buffer circular
         idx = self.index
@@ -123,6 +209,11 @@ class SignalWindow(QWidget):
         
         # Avanzar índice circular
         self.index = (self.index + 1) % self.buffer_size
+        self.count = min(self.count + 1, self.buffer_size)
+        
+        if self.render_fps > 0:
+            self._dirty = True
+            return
         
         # ACTUALIZAR GRÁFICOS INMEDIATAMENTE - sin validaciones
         # setData() es llamada TAN RÁPIDO como llegan los datos
@@ -130,3 +221,50 @@ class SignalWindow(QWidget):
         self.plot_lines['power_b'].setData(self.data['power_b'])
         self.plot_lines['sensor_1'].setData(self.data['sensor_1'])
         self.plot_lines['sensor_2'].setData(self.data['sensor_2'])
+    
+    def update_data_batch(self, samples):
+        """
+        Escribe un lote de muestras (ndarray con SAMPLE_DTYPE) en el buffer
+        circular y redibuja una sola vez por lote (o en el próximo frame).
+        """
+        n = len(samples)
+        if n == 0:
+            return
+        if n > self.buffer_size:
+            samples = samples[-self.buffer_size:]
+            n = self.buffer_size
+        
+        idx = (self.index + np.arange(n)) % self.buffer_size
+        self.data['power_a'][idx] = np.abs(samples['pot_a'])
+        self.data['power_b'][idx] = np.abs(samples['pot_b'])
+        self.data['sensor_1'][idx] = samples['sens_1']
+        self.data['sensor_2'][idx] = samples['sens_2']
+        self.index = (self.index + n) % self.buffer_size
+        self.count = min(self.count + n, self.buffer_size)
+        
+        if self.render_fps > 0:
+            self._dirty = True
+            return
+        
+        self.plot_lines['power_a'].setData(self.data['power_a'])
+        self.plot_lines['power_b'].setData(self.data['power_b'])
+        self.plot_lines['sensor_1'].setData(self.data['sensor_1'])
+        self.plot_lines['sensor_2'].setData(self.data['sensor_2'])
+    
+    def _chronological(self, key):
+        """Retorna las muestras válidas de una señal en orden temporal."""
+        buf = self.data[key]
+        if self.count < self.buffer_size:
+            return buf[:self.count]
+        return np.concatenate((buf[self.index:], buf[:self.index]))
+    
+    def _render(self):
+        """Redibuja las curvas visibles (una vez por frame, solo si hubo datos)."""
+        if not self._dirty:
+            return
+        self._dirty = False
+        for key, line in self.plot_lines.items():
+            if not self.checkboxes[key].isChecked():
+                continue
+            x, y = minmax_decimate(self._chronological(key), self.max_display_points)
+            line.setData(x, y)
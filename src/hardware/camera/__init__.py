@@ -1,9 +1,16 @@
 """
 Módulo de integración con cámaras Thorlabs.
 
-Contiene el worker para manejar la cámara en un thread separado.
+Contiene el worker para manejar la cámara en un thread separado, el pool
+de frames preasignados de la vista en vivo y una cámara simulada con la
+misma interfaz (sin pylablib ni hardware).
 """
 
 from .camera_worker import CameraWorker
+from .frame_pool import FramePool, FrameSlot
+from .simulated_camera import (SimulatedThorlabsCamera, SimulatedCameraConfig,
+                               SimulatedCameraTimeoutError, list_simulated_cameras)
 
-__all__ = ['CameraWorker']
+__all__ = ['CameraWorker', 'FramePool', 'FrameSlot',
+           'SimulatedThorlabsCamera', 'SimulatedCameraConfig',
+           'SimulatedCameraTimeoutError', 'list_simulated_cameras']
@@ -5,37 +5,164 @@ Este modulo maneja la adquisicion de frames de la camara Thorlabs en un thread
 independiente para no bloquear la interfaz grafica.
 """
 
-import gc
 import logging
 import time
 import traceback
+from typing import Optional
 
 import numpy as np
+import cv2
 
 from PyQt5.QtCore import QThread, pyqtSignal
-from PyQt5.QtGui import QImage
 
 logger = logging.getLogger(__name__)
 
 # Importar Thorlabs desde módulo centralizado
 from config.hardware_availability import THORLABS_AVAILABLE, Thorlabs
+from config.constants import (CAMERA_FRAME_POOL_SLOTS, CAMERA_DISPLAY_MODE,
+                              CAMERA_DISPLAY_FIXED_RANGE, CAMERA_DISPLAY_PERCENTILES,
+                              CAMERA_DISPLAY_UPDATE_FRAMES, CAMERA_DISPLAY_GAMMA)
+from core.utils.display_conversion import DisplayConverter
+from hardware.camera.frame_pool import FramePool, FrameSlot
 
 
 class CameraWorker(QThread):
     """Worker para manejar la camara Thorlabs en un thread separado."""
     status_update = pyqtSignal(str)
     connection_success = pyqtSignal(bool, str)  # success, camera_info
-    new_frame_ready = pyqtSignal(object, object)  # QImage, raw_frame (uint16)
+    new_frame_ready = pyqtSignal(object, object)  # QImage de display (reducida), FrameSlot retenida (el receptor la libera)
     
-    def __init__(self):
+    def __init__(self, camera_factory=None):
+        """
+        Args:
+            camera_factory: Callable que crea la cámara (por defecto
+                Thorlabs.ThorlabsTLCamera; ej: SimulatedThorlabsCamera)
+        """
         super().__init__()
+        self.camera_factory = camera_factory
         self.cam = None
         self.running = False
         self.exposure = 0.02
         self.fps = 30
         self.buffer_size = 1  # Buffer de 2: visualiza actual, guarda anterior
-        self.current_frame = None  # Para captura de imagen
         self.frame_count = 0  # Contador para limpieza periódica
+        self.frame_number = 0  # Número de frame entregado (no se reinicia por adquisición)
+        # Ranuras preasignadas para los frames en vivo (ver FramePool)
+        self.frame_pool = FramePool(CAMERA_FRAME_POOL_SLOTS)
+        self._current_slot: Optional[FrameSlot] = None
+        # Conversión uint16 → uint8 para display (tabla; niveles estables entre frames)
+        # Tamaño (ancho, alto) del widget de video; None = display a resolución completa
+        self.display_size = None
+        self._binned = None       # Scratch del binning por factor entero
+        self._display_raw = None  # Frame reducido al tamaño del display
+        self.display_converter = DisplayConverter(
+            mode=CAMERA_DISPLAY_MODE, fixed_range=CAMERA_DISPLAY_FIXED_RANGE,
+            percentiles=CAMERA_DISPLAY_PERCENTILES,
+            update_interval=CAMERA_DISPLAY_UPDATE_FRAMES, gamma=CAMERA_DISPLAY_GAMMA)
+    
+    @property
+    def current_frame(self):
+        """Último frame crudo (vista de la ranura actual; copiar si se retiene)."""
+        slot = self._current_slot
+        return slot.raw if slot is not None else None
+    
+    def acquire_current_frame(self) -> Optional[FrameSlot]:
+        """
+        Retiene la ranura del frame actual para usarla fuera del worker.
+        
+        Returns:
+            FrameSlot retenida (llamar release() o usar con 'with'), o None
+        """
+        slot = self._current_slot
+        if slot is None:
+            return None
+        try:
+            return slot.retain()
+        except RuntimeError:
+            # El worker la soltó entre la lectura y el retain
+            return None
+    
+    def copy_current_frame(self):
+        """Copia del frame actual (para consumidores que lo retienen o lo usan en otro thread)."""
+        slot = self.acquire_current_frame()
+        if slot is None:
+            return None
+        with slot:
+            return slot.raw.copy()
+    
+    def _fill_slot(self, frame) -> FrameSlot:
+        """Copia el frame a una ranura libre y genera su versión uint8 de display."""
+        self.frame_pool.ensure(frame.shape, frame.dtype)
+        slot = self.frame_pool.acquire()
+        np.copyto(slot.raw, frame)
+        self.frame_number += 1
+        slot.frame_number = self.frame_number
+        
+        dh, dw = self._display_shape(frame.shape[:2])
+        display = slot.ensure_display((dh, dw))
+        if (dh, dw) == frame.shape[:2]:
+            self.display_converter.convert(slot.raw, out=display)
+        else:
+            # Reducir en este thread y convertir solo lo que se muestra
+            self.display_converter.convert(self._downsample(slot.raw, dw, dh), out=display)
+        return slot
+    
+    def _downsample(self, raw, dw, dh):
+        """
+        Reduce el frame a (dw, dh) por promedio de área.
+        
+        INTER_AREA con factor fraccionario es lento; se agrupa primero por el
+        mayor factor entero (ruta rápida de OpenCV, recortando el sobrante del
+        borde) y el ajuste final, menor a 2x, se hace con INTER_LINEAR.
+        """
+        h, w = raw.shape
+        k = max(1, min(w // dw, h // dh))
+        if k > 1:
+            bh, bw = h // k, w // k
+            if self._binned is None or self._binned.shape != (bh, bw) or self._binned.dtype != raw.dtype:
+                self._binned = np.empty((bh, bw), dtype=raw.dtype)
+            cv2.resize(raw[:bh * k, :bw * k], (bw, bh), dst=self._binned, interpolation=cv2.INTER_AREA)
+            source = self._binned
+        else:
+            source = raw
+        if source.shape == (dh, dw):
+            return source
+        if self._display_raw is None or self._display_raw.shape != (dh, dw) \
+                or self._display_raw.dtype != raw.dtype:
+            self._display_raw = np.empty((dh, dw), dtype=raw.dtype)
+        cv2.resize(source, (dw, dh), dst=self._display_raw, interpolation=cv2.INTER_LINEAR)
+        return self._display_raw
+    
+    def set_display_size(self, width: int, height: int):
+        """
+        Tamaño del widget de video; el stream de display se reduce a ese tamaño.
+        
+        Args:
+            width, height: Tamaño en píxeles (0 o negativo = resolución completa)
+        """
+        self.display_size = (int(width), int(height)) if width > 0 and height > 0 else None
+    
+    def _display_shape(self, frame_shape):
+        """(alto, ancho) del display: el frame ajustado al widget con su aspecto, sin ampliar.
+        
+        Misma aritmética entera que QSize.scaled(..., Qt.KeepAspectRatio).
+        """
+        h, w = frame_shape
+        size = self.display_size
+        if size is None:
+            return h, w
+        tw, th = size
+        if tw >= w and th >= h:
+            return h, w
+        rw = th * w // h
+        if rw <= tw:
+            return max(1, th), max(1, rw)
+        return max(1, tw * h // w), max(1, tw)
+    
+    def _release_current_slot(self):
+        slot, self._current_slot = self._current_slot, None
+        if slot is not None:
+            slot.release()
     
     def run(self):
         """Metodo run del thread - inicia la vista en vivo."""
@@ -47,7 +174,8 @@ class CameraWorker(QThread):
             self.status_update.emit("Conectando con la camara Thorlabs...")
             logger.info("Intentando conectar con camara Thorlabs")
             
-            self.cam = Thorlabs.ThorlabsTLCamera()
+            factory = self.camera_factory or Thorlabs.ThorlabsTLCamera
+            self.cam = factory()
             info = self.cam.get_device_info()
             
             # Construir info de camara con atributos disponibles
@@ -188,40 +316,30 @@ class CameraWorker(QThread):
                     if frame is not None:
                         self.frame_count += 1
                         
-                        # GESTION DE MEMORIA: Limpiar buffer cada 30 frames
+                        # Cada 30 frames: descartar frames atrasados del buffer de la camara
                         if self.frame_count % 30 == 0:
                             try:
-                                # Limpiar frames sin leer del buffer
                                 status = self.cam.get_frames_status()
                                 if status.unread > 5:
                                     # Leer y descartar frames antiguos
                                     for _ in range(min(status.unread - 1, 10)):
                                         self.cam.read_oldest_image()
-                                
-                                # Forzar garbage collection cada 30 frames
-                                gc.collect()
                             except Exception as e:
                                 pass  # Ignorar errores de limpieza
                         
-                        # GUARDAR frame para captura (una sola copia)
-                        raw_frame = frame.copy()
-                        self.current_frame = raw_frame
-                        
-                        # Normalizar a uint8 para visualizacion
-                        if frame.dtype != np.uint8:
-                            frame = (frame / frame.max() * 255).astype(np.uint8)
-                        
-                        h, w = frame.shape
-                        bytes_per_line = w
+                        # Copiar a una ranura preasignada (sin asignaciones grandes)
+                        slot = self._fill_slot(frame)
+                        del frame
                         
-                        # Crear QImage
-                        q_image = QImage(frame.data, w, h, bytes_per_line, QImage.Format_Grayscale8).copy()
+                        # Ranura retenida como frame actual (captura); se suelta la anterior
+                        previous = self._current_slot
+                        self._current_slot = slot
+                        if previous is not None:
+                            previous.release()
                         
-                        # Emitir AMBOS: q_image para display, raw_frame para detección
-                        self.new_frame_ready.emit(q_image, raw_frame)
-                        
-                        # Liberar referencia al frame original
-                        del frame
+                        # Emitir la ranura: q_image para display, raw para detección.
+                        # CameraService llama release() cuando la UI termina con ella.
+                        self.new_frame_ready.emit(slot.qimage, slot.retain())
                         
                 elif frame_available is False:
                     # Adquisicion detenida
@@ -249,13 +367,11 @@ class CameraWorker(QThread):
                         self.cam.clear_acquisition()
                         logger.info("Buffer de camara limpiado")
                     
-                    # Forzar garbage collection
-                    gc.collect()
-                    logger.info("Garbage collection ejecutado")
             except Exception as e:
                 logger.error(f"Error al limpiar recursos: {e}")
             
             self.frame_count = 0
+            logger.info(f"Pool de frames: {self.frame_pool.stats()}")
             self.status_update.emit("Vista en vivo detenida.")
             logger.info("Vista en vivo detenida")
     
@@ -375,11 +491,10 @@ class CameraWorker(QThread):
                 logger.debug(f"Error al limpiar buffer: {e}")
             
             self.cam.close()
-            self.current_frame = None
+            self._release_current_slot()
+            self.frame_pool.clear()
             self.frame_count = 0
-            
-            # Forzar garbage collection
-            gc.collect()
+            # Sin ciclos de referencias: las ranuras se liberan al soltar el pool
             logger.info("Memoria liberada")
             
             self.status_update.emit("Camara cerrada.")
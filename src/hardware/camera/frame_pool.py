@@ -0,0 +1,168 @@
+"""
+Pool de frames preasignados para la vista en vivo.
+
+Cada frame en vivo generaba varias copias grandes (frame.copy(), la
+normalización a uint8 y QImage(...).copy()) y el worker forzaba
+gc.collect() cada 30 frames para contener la basura. El pool reserva un
+número fijo de ranuras; cada ranura guarda el frame crudo, su versión de
+visualización uint8 y un QImage que envuelve ese buffer sin copiarlo.
+
+Entrega con conteo de referencias:
+    - El worker adquiere una ranura libre (refcount=1), la llena y la
+      retiene como frame actual
+    - Por cada consumidor (display, detección, captura) se hace retain();
+      el consumidor llama release() al terminar
+    - Con refcount=0 la ranura vuelve al final de la cola de libres (FIFO),
+      así un array recién liberado no se sobrescribe hasta que se usen las
+      demás ranuras libres
+
+En régimen estacionario no hay asignaciones grandes. Si todas las
+ranuras están ocupadas (un consumidor que no libera) el pool crece con una
+ranura nueva y lo registra, en lugar de sobrescribir datos en uso.
+"""
+
+import logging
+import threading
+from collections import deque
+from typing import Optional, Tuple
+
+import numpy as np
+from PyQt5.QtGui import QImage
+
+logger = logging.getLogger(__name__)
+
+# Ranuras por defecto: frame actual + display en cola + capturas/detección en curso
+DEFAULT_POOL_SLOTS = 6
+
+
+class FrameSlot:
+    """Ranura del pool: frame crudo + buffer uint8 de visualización + QImage.
+
+    El buffer de visualización puede ser más chico que el frame crudo
+    (stream de display reducido al tamaño del widget).
+    """
+
+    def __init__(self, pool: 'FramePool', index: int, shape: Tuple[int, int], dtype):
+        self._pool = pool
+        self.index = index
+        self.raw = np.empty(shape, dtype=dtype)
+        self.display = None
+        self.qimage = None
+        self.ensure_display(shape[:2])
+        self.frame_number = 0
+        self._refcount = 0
+
+    def ensure_display(self, shape: Tuple[int, int]) -> np.ndarray:
+        """Buffer uint8 de visualización con la forma (alto, ancho) pedida.
+
+        Solo se reasigna cuando cambia el tamaño del display.
+        """
+        if self.display is None or self.display.shape != tuple(shape):
+            self.display = np.empty(shape, dtype=np.uint8)
+            h, w = self.display.shape
+            # QImage envuelve self.display sin copiar (la ranura mantiene vivo el buffer)
+            self.qimage = QImage(self.display.data, w, h, w, QImage.Format_Grayscale8)
+        return self.display
+
+    @property
+    def refcount(self) -> int:
+        return self._refcount
+
+    def retain(self) -> 'FrameSlot':
+        """Agrega un consumidor; retorna la misma ranura."""
+        self._pool._retain(self)
+        return self
+
+    def release(self):
+        """Libera la referencia de un consumidor."""
+        self._pool._release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+
+class FramePool:
+    """Pool de FrameSlot de forma y dtype fijos, seguro entre threads."""
+
+    def __init__(self, n_slots: int = DEFAULT_POOL_SLOTS):
+        """
+        Args:
+            n_slots: Número de ranuras preasignadas
+        """
+        self.n_slots = max(2, int(n_slots))
+        self._lock = threading.Lock()
+        self._slots = []
+        self._free = deque()
+        self._shape = None
+        self._dtype = None
+        self.grow_count = 0  # Ranuras creadas por agotamiento del pool
+
+    @property
+    def shape(self) -> Optional[Tuple[int, ...]]:
+        return self._shape
+
+    def ensure(self, shape: Tuple[int, ...], dtype) -> None:
+        """Reasigna las ranuras si cambia la forma o el dtype del frame."""
+        dtype = np.dtype(dtype)
+        if self._shape == tuple(shape) and self._dtype == dtype:
+            return
+        with self._lock:
+            # Las ranuras en uso quedan huérfanas: sus dueños las liberan sin efecto
+            self._shape = tuple(shape)
+            self._dtype = dtype
+            self._slots = [FrameSlot(self, i, self._shape, dtype) for i in range(self.n_slots)]
+            self._free = deque(self._slots)
+        logger.info(f"[FramePool] {self.n_slots} ranuras de {self._shape} {dtype} "
+                    f"({self.n_slots * self._slots[0].raw.nbytes / 1e6:.1f} MB)")
+
+    def acquire(self) -> FrameSlot:
+        """Ranura libre con refcount=1 (el llamador es su primer dueño)."""
+        with self._lock:
+            if self._free:
+                slot = self._free.popleft()
+            else:
+                slot = FrameSlot(self, len(self._slots), self._shape, self._dtype)
+                self._slots.append(slot)
+                self.grow_count += 1
+                logger.warning(f"[FramePool] Sin ranuras libres: pool ampliado a "
+                               f"{len(self._slots)} (¿consumidor sin release()?)")
+            slot._refcount = 1
+            return slot
+
+    def _retain(self, slot: FrameSlot):
+        with self._lock:
+            if slot._refcount <= 0:
+                raise RuntimeError("retain() sobre una ranura ya liberada")
+            slot._refcount += 1
+
+    def _release(self, slot: FrameSlot):
+        with self._lock:
+            if slot._refcount <= 0:
+                logger.debug(f"[FramePool] release() extra sobre ranura {slot.index}")
+                return
+            slot._refcount -= 1
+            if slot._refcount == 0 and slot.raw.shape == self._shape \
+                    and slot.raw.dtype == self._dtype and slot in self._slots:
+                self._free.append(slot)
+
+    def stats(self) -> dict:
+        """Estado del pool (para diagnóstico)."""
+        with self._lock:
+            return {
+                'slots': len(self._slots),
+                'free': len(self._free),
+                'in_use': len(self._slots) - len(self._free),
+                'grow_count': self.grow_count,
+            }
+
+    def clear(self):
+        """Descarta todas las ranuras (al detener la adquisición)."""
+        with self._lock:
+            self._slots = []
+            self._free.clear()
+            self._shape = None
+            self._dtype = None
@@ -0,0 +1,421 @@
+"""
+Cámara Thorlabs simulada.
+
+Implementa la parte de la API de pylablib ThorlabsTLCamera que usan
+CameraWorker y CameraService (exposición, frame period, buffer,
+wait_for_frame/read_oldest_image, estado de frames), para ejercitar la
+vista en vivo, la captura y la microscopía sin pylablib ni cámara.
+
+Los frames son uint16 sintéticos:
+    - Escena fija de objetos (blobs con textura) generada con una semilla
+    - Desenfoque gaussiano que crece con |Z - focus_z_um|; Z se lee de una
+      fuente simulada (set_z / set_z_source) en el instante de adquisición
+      de cada frame
+    - Señal proporcional a la exposición, ruido de disparo (Poisson
+      aproximado) y ruido de lectura, saturados a bit_depth bits
+
+Un hilo productor genera los frames al ritmo del frame period real (reloj de
+pared) en un buffer circular de nframes: si no se leen a tiempo se pierden
+(skipped), igual que en la cámara. read_oldest_image/read_newest_image solo
+copian el frame ya adquirido, así el coste del simulador no recae en el hilo
+que lee (CameraWorker). Para que el productor siga los 30 fps, el ruido sale
+de un banco precalculado (recortes con desplazamiento aleatorio) y la señal y
+su sigma de ruido se cachean por desenfoque y exposición.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import numpy as np
+import cv2
+
+logger = logging.getLogger(__name__)
+
+# Mismos campos que pylablib (TDeviceInfo / TFramesStatus)
+TDeviceInfo = namedtuple('TDeviceInfo', ['model', 'name', 'serial_number', 'firmware_version'])
+TFramesStatus = namedtuple('TFramesStatus', ['acquired', 'unread', 'skipped', 'buffer_size'])
+
+# Mapas de señal/ruido guardados (por sigma cuantizado y exposición)
+_BLUR_CACHE_SIZE = 8
+# Resolución del sigma de desenfoque cacheado [px]
+_BLUR_SIGMA_STEP = 0.25
+# Desenfoques con sigma mayor se calculan a resolución reducida (potencia de 2)
+# con sigma >= este valor en la imagen reducida
+_BLUR_DOWNSAMPLE_SIGMA = 2.0
+# Banco de ruido normal estándar: nº de imágenes y margen [px] para recortes
+_NOISE_BANK_SIZE = 2
+_NOISE_BANK_PAD = 64
+
+
+class SimulatedCameraTimeoutError(TimeoutError):
+    """Timeout de wait_for_frame (el nombre contiene 'Timeout' como el de pylablib)."""
+
+
+@dataclass
+class SimulatedCameraConfig:
+    """Parámetros de la cámara y de la escena simulada."""
+    width: int = 1440
+    height: int = 1080
+    bit_depth: int = 12
+    # Escena
+    n_objects: int = 60
+    object_radius_px: tuple = (8.0, 40.0)
+    object_contrast: float = 0.8      # Fracción del rango dinámico a exposición de referencia
+    background_level: float = 0.1     # Fondo (fracción del rango)
+    seed: int = 0
+    # Enfoque
+    focus_z_um: float = 50.0          # Z de mejor enfoque (centro del C-Focus simulado de 100 µm)
+    blur_px_per_um: float = 1.5       # Sigma de desenfoque por µm fuera de foco
+    min_blur_px: float = 0.5          # Sigma en foco (PSF del sistema)
+    max_blur_px: float = 40.0
+    # Sensor
+    reference_exposure_s: float = 0.02
+    dark_level_adu: float = 20.0
+    read_noise_adu: float = 3.0
+    gain_e_per_adu: float = 1.0       # Ruido de disparo: σ² = señal / ganancia
+    # Temporización
+    min_frame_period_s: float = 0.005
+
+
+class SimulatedThorlabsCamera:
+    """Cámara simulada con la interfaz de pylablib.devices.Thorlabs.ThorlabsTLCamera."""
+
+    def __init__(self, config: Optional[SimulatedCameraConfig] = None,
+                 z_source: Optional[Callable[[], float]] = None, serial: str = 'SIM-0001'):
+        """
+        Args:
+            config: Parámetros de cámara y escena
+            z_source: Función sin argumentos que retorna Z actual en µm
+            serial: Número de serie reportado
+        """
+        self.config = config or SimulatedCameraConfig()
+        self.serial = serial
+        self._z_source = z_source
+        self._z_um = self.config.focus_z_um
+        self._rng = np.random.default_rng(self.config.seed + 1)
+        self._scene = self._build_scene()
+        self._blur_cache = OrderedDict()
+        self._noise_bank = None
+
+        self._lock = threading.Condition()
+        self._opened = True
+        self._exposure = self.config.reference_exposure_s
+        self._frame_period = 1.0 / 30.0
+        self._trigger_mode = 'int'
+        self._nframes = 0
+        self._setup = False
+        self._running = False
+        self._producer = None
+        self._ring = []      # Buffer circular de frames adquiridos (se reservan al producirlos)
+        self._spare = None   # Frame en el que renderiza el productor (fuera del lock)
+        self._acquired = 0   # Frames producidos (incluye perdidos)
+        self._read = 0       # Índice del siguiente frame a leer
+        self._skipped = 0
+        logger.info(f"[SimulatedCamera] {self.config.width}x{self.config.height}, "
+                    f"{self.config.bit_depth} bits, foco en Z={self.config.focus_z_um} µm")
+
+    # ------------------------------------------------------------------
+    # Escena y Z
+    # ------------------------------------------------------------------
+
+    def _build_scene(self) -> np.ndarray:
+        """Escena nítida en [0, 1] (float32): fondo + objetos con textura."""
+        c = self.config
+        rng = np.random.default_rng(c.seed)
+        scene = np.full((c.height, c.width), c.background_level, dtype=np.float32)
+        yy, xx = np.mgrid[0:c.height, 0:c.width]
+        r_min, r_max = c.object_radius_px
+        for _ in range(c.n_objects):
+            r = rng.uniform(r_min, r_max)
+            cx, cy = rng.uniform(0, c.width), rng.uniform(0, c.height)
+            x0, x1 = int(max(0, cx - 2 * r)), int(min(c.width, cx + 2 * r + 1))
+            y0, y1 = int(max(0, cy - 2 * r)), int(min(c.height, cy + 2 * r + 1))
+            if x0 >= x1 or y0 >= y1:
+                continue
+            d2 = ((xx[y0:y1, x0:x1] - cx) ** 2 + (yy[y0:y1, x0:x1] - cy) ** 2) / r ** 2
+            # Borde nítido (lo que se pierde al desenfocar) y textura interna
+            body = (d2 <= 1.0) * (0.6 + 0.4 * np.cos(3.0 * np.sqrt(d2) * np.pi))
+            scene[y0:y1, x0:x1] += c.object_contrast * rng.uniform(0.4, 1.0) * body.astype(np.float32)
+        # Textura fina de alta frecuencia (da contraste a las métricas de enfoque)
+        scene += 0.03 * rng.standard_normal(scene.shape).astype(np.float32)
+        return np.clip(scene, 0.0, 1.0)
+
+    def set_z(self, z_um: float):
+        """Fija Z (se usa cuando no hay fuente de Z)."""
+        self._z_um = float(z_um)
+
+    def set_z_source(self, z_source: Optional[Callable[[], float]]):
+        """Fuente de Z leída en cada frame (ej: C-Focus simulado)."""
+        self._z_source = z_source
+
+    def get_z(self) -> float:
+        if self._z_source is not None:
+            try:
+                return float(self._z_source())
+            except Exception as e:
+                logger.debug(f"[SimulatedCamera] Fuente de Z falló: {e}")
+        return self._z_um
+
+    def blur_sigma(self, z_um: Optional[float] = None) -> float:
+        """Sigma de desenfoque [px] para Z (por defecto la Z actual)."""
+        c = self.config
+        z = self.get_z() if z_um is None else z_um
+        defocus = c.blur_px_per_um * abs(z - c.focus_z_um)
+        return float(min(c.max_blur_px, np.hypot(c.min_blur_px, defocus)))
+
+    def _render_maps(self, sigma: float, exposure: float):
+        """
+        Señal media (con nivel de oscuridad) y sigma de ruido para un desenfoque.
+
+        Returns:
+            (base, noise_sigma): float32 del tamaño del sensor
+        """
+        key = (round(sigma / _BLUR_SIGMA_STEP), exposure)
+        maps = self._blur_cache.get(key)
+        if maps is not None:
+            self._blur_cache.move_to_end(key)
+            return maps
+        c = self.config
+        s = max(key[0] * _BLUR_SIGMA_STEP, 1e-3)
+        factor = 1
+        while s / (2 * factor) >= _BLUR_DOWNSAMPLE_SIGMA:
+            factor *= 2
+        if factor > 1:
+            # Un desenfoque grande no tiene detalle fino: se reduce, desenfoca y amplía
+            small = cv2.resize(self._scene, (c.width // factor, c.height // factor),
+                               interpolation=cv2.INTER_AREA)
+            small = cv2.GaussianBlur(small, (0, 0), sigmaX=s / factor, sigmaY=s / factor,
+                                     borderType=cv2.BORDER_REFLECT)
+            signal = cv2.resize(small, (c.width, c.height), interpolation=cv2.INTER_LINEAR)
+        else:
+            signal = cv2.GaussianBlur(self._scene, (0, 0), sigmaX=s, sigmaY=s,
+                                      borderType=cv2.BORDER_REFLECT)
+        signal *= float(2 ** c.bit_depth - 1) * exposure / c.reference_exposure_s
+        noise_sigma = np.sqrt(signal / c.gain_e_per_adu + c.read_noise_adu ** 2)
+        signal += c.dark_level_adu
+        maps = (signal, noise_sigma)
+        self._blur_cache[key] = maps
+        if len(self._blur_cache) > _BLUR_CACHE_SIZE:
+            self._blur_cache.popitem(last=False)
+        return maps
+
+    def _noise(self) -> np.ndarray:
+        """Ruido normal estándar: recorte con desplazamiento aleatorio del banco."""
+        c = self.config
+        if self._noise_bank is None:
+            self._noise_bank = self._rng.standard_normal(
+                (_NOISE_BANK_SIZE, c.height + _NOISE_BANK_PAD, c.width + _NOISE_BANK_PAD),
+                dtype=np.float32)
+        i = int(self._rng.integers(_NOISE_BANK_SIZE))
+        dy, dx = self._rng.integers(_NOISE_BANK_PAD + 1, size=2)
+        return self._noise_bank[i, dy:dy + c.height, dx:dx + c.width]
+
+    def render_frame(self, z_um: Optional[float] = None,
+                     out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Genera un frame uint16 para Z (por defecto la Z actual).
+
+        Args:
+            z_um: Z del frame en µm
+            out: Array uint16 (height, width) donde escribir el frame
+        """
+        c = self.config
+        base, noise_sigma = self._render_maps(self.blur_sigma(z_um), self._exposure)
+        frame = np.multiply(noise_sigma, self._noise())
+        frame += base
+        np.clip(frame, 0, float(2 ** c.bit_depth - 1), out=frame)
+        if out is None:
+            return frame.astype(np.uint16)
+        out[...] = frame
+        return out
+
+    # ------------------------------------------------------------------
+    # Dispositivo
+    # ------------------------------------------------------------------
+
+    def get_device_info(self) -> TDeviceInfo:
+        return TDeviceInfo('SIM-TLCAM', 'Cámara simulada', self.serial, 'sim')
+
+    def is_opened(self) -> bool:
+        return self._opened
+
+    def open(self):
+        self._opened = True
+
+    def close(self):
+        self.clear_acquisition()
+        self._opened = False
+
+    def get_detector_size(self):
+        return self.config.width, self.config.height
+
+    # ------------------------------------------------------------------
+    # Parámetros
+    # ------------------------------------------------------------------
+
+    def set_exposure(self, exposure: float) -> float:
+        with self._lock:
+            self._exposure = max(1e-5, float(exposure))
+        return self._exposure
+
+    def get_exposure(self) -> float:
+        return self._exposure
+
+    def set_frame_period(self, frame_period: float) -> float:
+        with self._lock:
+            self._frame_period = max(self.config.min_frame_period_s, float(frame_period))
+        return self.get_frame_period()
+
+    def get_frame_period(self) -> float:
+        # La cámara no puede entregar frames más rápido que la exposición
+        return max(self._frame_period, self._exposure)
+
+    def set_trigger_mode(self, mode: str):
+        self._trigger_mode = mode
+
+    def get_trigger_mode(self) -> str:
+        return self._trigger_mode
+
+    # ------------------------------------------------------------------
+    # Adquisición
+    # ------------------------------------------------------------------
+
+    def setup_acquisition(self, nframes: int = 100):
+        with self._lock:
+            self._nframes = max(1, int(nframes))
+            self._setup = True
+
+    def is_acquisition_setup(self) -> bool:
+        return self._setup
+
+    def start_acquisition(self, *args, **kwargs):
+        if self._running:
+            self.stop_acquisition()
+        with self._lock:
+            if not self._setup:
+                self.setup_acquisition(kwargs.get('nframes', 100))
+            self._acquired = self._read = self._skipped = 0
+            if len(self._ring) != self._nframes:
+                self._ring = [None] * self._nframes
+            self._running = True
+        self._producer = threading.Thread(target=self._produce, name='SimulatedCameraProducer',
+                                          daemon=True)
+        self._producer.start()
+
+    def stop_acquisition(self):
+        with self._lock:
+            self._running = False
+            self._lock.notify_all()
+        producer, self._producer = self._producer, None
+        if producer is not None and producer is not threading.current_thread():
+            producer.join(timeout=2.0)
+
+    def clear_acquisition(self):
+        self.stop_acquisition()
+        with self._lock:
+            self._setup = False
+            self._ring = []
+            self._spare = None
+
+    def acquisition_in_progress(self) -> bool:
+        return self._running
+
+    def _produce(self):
+        """Hilo productor: un frame por frame period, con Z leída al adquirirlo."""
+        c = self.config
+        next_t = time.perf_counter() + self.get_frame_period()
+        while True:
+            with self._lock:
+                while self._running and next_t > time.perf_counter():
+                    self._lock.wait(next_t - time.perf_counter())
+                if not self._running:
+                    return
+                if self._spare is None:
+                    self._spare = np.empty((c.height, c.width), dtype=np.uint16)
+                spare = self._spare
+            try:
+                self.render_frame(self.get_z(), out=spare)
+            except Exception as e:
+                logger.error(f"[SimulatedCamera] Error generando frame: {e}")
+                with self._lock:
+                    self._running = False
+                    self._lock.notify_all()
+                return
+            with self._lock:
+                if not self._running:
+                    return
+                slot = self._acquired % self._nframes
+                self._ring[slot], self._spare = spare, self._ring[slot]
+                self._acquired += 1
+                # Buffer circular: los frames más viejos que nframes se pierden
+                oldest = self._acquired - self._nframes
+                if self._read < oldest:
+                    self._skipped += oldest - self._read
+                    self._read = oldest
+                self._lock.notify_all()
+            # Si el render se retrasa no se acumulan frames atrasados
+            next_t = max(next_t + self.get_frame_period(), time.perf_counter())
+
+    def get_frames_status(self) -> TFramesStatus:
+        with self._lock:
+            return TFramesStatus(self._acquired, self._acquired - self._read,
+                                 self._skipped, self._nframes)
+
+    def get_new_images_range(self):
+        with self._lock:
+            if self._acquired == self._read:
+                return None
+            return self._read, self._acquired - 1
+
+    def wait_for_frame(self, since: str = 'lastread', nframes: int = 1, timeout: float = 20.0):
+        """
+        Espera hasta que haya nframes sin leer.
+
+        Returns:
+            True si hay frames; False si la adquisición está detenida
+
+        Raises:
+            SimulatedCameraTimeoutError: Si no llega a tiempo
+        """
+        deadline = time.perf_counter() + (timeout if timeout is not None else 1e9)
+        with self._lock:
+            while True:
+                if not self._running:
+                    return False
+                if self._acquired - self._read >= nframes:
+                    return True
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    raise SimulatedCameraTimeoutError("Timeout esperando frame simulado")
+                self._lock.wait(remaining)
+
+    def _take(self, newest: bool) -> Optional[np.ndarray]:
+        with self._lock:
+            if self._acquired == self._read:
+                return None
+            if newest:
+                self._read = self._acquired
+            else:
+                self._read += 1
+            return self._ring[(self._read - 1) % self._nframes].copy()
+
+    def read_oldest_image(self, return_info: bool = False) -> Optional[np.ndarray]:
+        """Siguiente frame sin leer (None si no hay)."""
+        return self._take(newest=False)
+
+    def read_newest_image(self, return_info: bool = False) -> Optional[np.ndarray]:
+        """Frame más reciente; descarta los anteriores sin leer."""
+        return self._take(newest=True)
+
+    def snap(self, timeout: float = 5.0) -> np.ndarray:
+        """Frame único (sin adquisición en curso)."""
+        return self.render_frame()
+
+
+def list_simulated_cameras():
+    """Equivalente a Thorlabs.list_cameras_tlcam() para la cámara simulada."""
+    return ['SIM-0001']
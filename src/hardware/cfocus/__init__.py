@@ -3,5 +3,6 @@ Hardware module for Mad City Labs C-Focus piezo stage.
 """
 
 from .cfocus_controller import CFocusController
+from .cfocus_simulator import CFocusModel, SimulatedCFocusController
 
-__all__ = ['CFocusController']
+__all__ = ['CFocusController', 'CFocusModel', 'SimulatedCFocusController']
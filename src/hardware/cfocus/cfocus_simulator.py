@@ -0,0 +1,148 @@
+"""
+Simulador del piezo C-Focus (Mad City Labs)
+===========================================
+
+Misma API que CFocusController (connect, move_z, read_z, calibrate_limits,
+modo BPoF...) sin Madlib.dll: solo se reemplazan las llamadas al DLL.
+
+Modelo:
+    - Rango configurable [0, z_range_um]
+    - Dinámica de primer orden hacia la consigna: z(t) = z_obj + (z0 - z_obj)·e^(-t/τ),
+      evaluada con el reloj real (move_z espera settle_time como el hardware)
+    - Ruido gaussiano en la lectura (read_z); true_z() da la posición real
+
+La posición real se entrega a la cámara simulada (attach_camera), de modo que
+el autofoco completo (mover → esperar → capturar → puntuar) se pueda medir en
+velocidad y exactitud sin hardware.
+
+Autor: Sistema de Control L206
+"""
+
+import math
+import time
+import logging
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .cfocus_controller import CFocusController
+
+logger = logging.getLogger('MotorControl_L206')
+
+
+@dataclass
+class CFocusModel:
+    """Parámetros del piezo simulado."""
+    z_range_um: float = 100.0       # Recorrido calibrado [µm]
+    tau_s: float = 0.005            # Constante de tiempo de asentamiento [s]
+    noise_um: float = 0.02          # Desviación estándar del ruido del sensor [µm]
+    settle_time_s: float = None     # Espera de move_z (por defecto 5τ, ~99% asentado)
+    initial_z_um: float = None      # Posición inicial (por defecto el centro)
+    seed: Optional[int] = None
+
+
+class SimulatedCFocusController(CFocusController):
+    """CFocusController con el piezo simulado en lugar del DLL."""
+
+    def __init__(self, model: Optional[CFocusModel] = None):
+        """
+        Args:
+            model: Parámetros del piezo simulado
+        """
+        super().__init__(dll_path='<simulado>')
+        self.model = model or CFocusModel()
+        self.settle_time = (self.model.settle_time_s if self.model.settle_time_s is not None
+                            else 5.0 * self.model.tau_s)
+        self._rng = np.random.default_rng(self.model.seed)
+        z0 = (self.model.initial_z_um if self.model.initial_z_um is not None
+              else self.model.z_range_um / 2.0)
+        self._z_start = z0
+        self._z_target = z0
+        self._t_cmd = time.perf_counter()
+        self.move_count = 0
+
+    # ------------------------------------------------------------------
+    # Reemplazo de las llamadas al DLL
+    # ------------------------------------------------------------------
+
+    def connect(self) -> Tuple[bool, str]:
+        self.handle = 1
+        self.z_range = float(self.model.z_range_um)
+        self.is_connected = True
+        logger.info(f"C-Focus simulado conectado. Rango Z: {self.z_range:.2f} µm, "
+                    f"τ={self.model.tau_s * 1000:.1f} ms, ruido={self.model.noise_um} µm")
+        return True, f"C-Focus simulado (Rango: 0-{self.z_range:.1f} µm)"
+
+    def disconnect(self):
+        if self.handle != 0:
+            logger.info("C-Focus simulado desconectado")
+        self.handle = 0
+        self.is_connected = False
+
+    def move_z(self, position_um: float) -> bool:
+        """Fija la consigna (mismas validaciones que el hardware) y espera settle_time."""
+        if not self.is_connected:
+            logger.error("C-Focus no conectado")
+            return False
+
+        max_range = self.z_max_calibrated if self.z_max_calibrated > 0 else self.z_range
+        if position_um < 0 or position_um > max_range:
+            logger.error(f"Posición Z fuera de rango: {position_um} µm (rango: 0-{max_range:.2f})")
+            return False
+
+        now = time.perf_counter()
+        self._z_start = self._position_at(now)
+        self._z_target = float(position_um)
+        self._t_cmd = now
+        self.move_count += 1
+        if self.settle_time > 0:
+            time.sleep(self.settle_time)
+        return True
+
+    def read_z(self) -> Optional[float]:
+        """Posición medida por el sensor (real + ruido)."""
+        if not self.is_connected:
+            logger.error("C-Focus no conectado")
+            return None
+        z = self.true_z()
+        if self.model.noise_um > 0:
+            z += float(self._rng.normal(0.0, self.model.noise_um))
+        return z
+
+    def _setup_function_signatures(self):
+        """Sin DLL: nada que configurar."""
+
+    # ------------------------------------------------------------------
+    # Posición real
+    # ------------------------------------------------------------------
+
+    def _position_at(self, t: float) -> float:
+        if self.model.tau_s <= 0:
+            return self._z_target
+        decay = math.exp(-max(0.0, t - self._t_cmd) / self.model.tau_s)
+        return self._z_target + (self._z_start - self._z_target) * decay
+
+    def true_z(self) -> float:
+        """Posición real del piezo en µm (sin ruido de sensor)."""
+        return self._position_at(time.perf_counter())
+
+    @property
+    def target_z(self) -> float:
+        """Última consigna enviada en µm."""
+        return self._z_target
+
+    def attach_camera(self, camera, focus_z_um: Optional[float] = None):
+        """
+        Hace que la cámara simulada lea la Z real de este piezo.
+
+        Args:
+            camera: SimulatedThorlabsCamera (o cualquier objeto con set_z_source)
+            focus_z_um: Z de mejor enfoque en coordenadas del piezo (por
+                defecto se conserva la de la cámara)
+        """
+        camera.set_z_source(self.true_z)
+        if focus_z_um is not None:
+            camera.config.focus_z_um = float(focus_z_um)
+        logger.info(f"[CFocusSim] Cámara simulada enlazada (foco en Z="
+                    f"{camera.config.focus_z_um:.2f} µm)")
@@ -0,0 +1,7 @@
+"""
+Simulación de la platina XY (motores DC + sensores ADC) del sistema L206.
+"""
+
+from .stage_simulator import AxisModel, SimulatedStage
+
+__all__ = ['AxisModel', 'SimulatedStage']
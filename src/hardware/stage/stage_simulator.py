@@ -0,0 +1,267 @@
+"""
+Simulador de la Platina XY L206 (Motores + Sensores)
+====================================================
+
+Planta simulada que entiende el mismo juego de comandos que el firmware
+(ver MotorProtocol: 'A,a,b', 'A', 'M', 'H,s1,s2', 'B', 'S,thr') y entrega
+lecturas de sensores ADC, para ejercitar TestService y el control H∞ sin
+la platina ni el Arduino conectados.
+
+Modelo por eje (el mismo que identifica TransferFunctionAnalyzer):
+
+    G(s) = V(s)/U(s) = K / (τs + 1)      velocidad [µm/s] vs PWM
+    x(t) = ∫ v dt                        posición del husillo [µm]
+
+más zona muerta de PWM (fricción estática), juego mecánico (backlash)
+entre husillo y carro, y ruido gaussiano en el ADC. La conversión
+µm ↔ ADC usa la calibración de calibration.json (intercept/slope).
+
+Mapeo físico: Motor A → eje X → Sensor 2, Motor B → eje Y → Sensor 1.
+
+Usos:
+    - Callbacks directos: TestService.set_hardware_callbacks(stage.send_command,
+      stage.get_sensor_value) con stage.advance(dt) por cada paso simulado.
+    - Loopback serial: PtyLoopback(sensor_model=stage.sensor_model).
+
+Autor: Sistema de Control L206
+"""
+
+import json
+import math
+import logging
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger('MotorControl_L206')
+
+ADC_MAX = 1023
+PWM_MAX = 255
+
+
+@dataclass
+class AxisModel:
+    """Parámetros de un eje simulado."""
+    K: float = 4.0                  # Ganancia de velocidad [µm/s por unidad PWM]
+    tau: float = 0.05               # Constante de tiempo del motor [s]
+    deadzone_pwm: int = 40          # |PWM| por debajo del cual el motor no se mueve
+    backlash_um: float = 5.0        # Juego total entre husillo y carro [µm]
+    noise_adc: float = 0.5          # Desviación estándar del ruido del sensor [ADC]
+    intercept_um: float = 21601.0   # Calibración: µm cuando ADC = 0
+    slope_um_per_adc: float = 12.22 # Calibración: µm por cuenta ADC
+    invert: bool = False            # True: PWM positivo disminuye la lectura ADC
+
+    def um_to_adc(self, um: float) -> float:
+        return (self.intercept_um - um) / self.slope_um_per_adc
+
+    def adc_to_um(self, adc: float) -> float:
+        return self.intercept_um - adc * self.slope_um_per_adc
+
+
+class _AxisState:
+    """Estado dinámico de un eje."""
+
+    def __init__(self, model: AxisModel, position_um: float):
+        self.model = model
+        self.velocity = 0.0            # µm/s del husillo
+        self.screw_um = position_um    # Posición del husillo
+        self.carriage_um = position_um # Posición del carro (la que mide el sensor)
+
+    def advance(self, pwm: int, dt: float):
+        m = self.model
+        u = 0 if abs(pwm) < m.deadzone_pwm else pwm
+        # PWM positivo aumenta el ADC, es decir, reduce la posición en µm
+        sign = 1.0 if m.invert else -1.0
+        v_ss = sign * m.K * u
+        if m.tau > 0:
+            a = math.exp(-dt / m.tau)
+            v_new = v_ss + (self.velocity - v_ss) * a
+            # Integral exacta de la velocidad de primer orden en el intervalo
+            self.screw_um += v_ss * dt + (self.velocity - v_ss) * m.tau * (1.0 - a)
+            self.velocity = v_new
+        else:
+            self.velocity = v_ss
+            self.screw_um += v_ss * dt
+        # Juego mecánico: el carro solo sigue al husillo fuera de la holgura
+        half = m.backlash_um / 2.0
+        if self.screw_um - self.carriage_um > half:
+            self.carriage_um = self.screw_um - half
+        elif self.carriage_um - self.screw_um > half:
+            self.carriage_um = self.screw_um + half
+
+    def brake(self):
+        self.velocity = 0.0
+
+
+class SimulatedStage:
+    """
+    Platina XY simulada controlada por comandos del protocolo L206.
+
+    El tiempo solo avanza con advance(dt), por lo que una simulación puede
+    correr más rápido que el tiempo real.
+    """
+
+    def __init__(self, axis_x: Optional[AxisModel] = None, axis_y: Optional[AxisModel] = None,
+                 start_um: Optional[Tuple[float, float]] = None, seed: Optional[int] = None):
+        """
+        Args:
+            axis_x: Modelo del eje X (Motor A, Sensor 2)
+            axis_y: Modelo del eje Y (Motor B, Sensor 1)
+            start_um: Posición inicial (x, y) en µm (por defecto ADC = 512)
+            seed: Semilla del generador de ruido (reproducibilidad)
+        """
+        axis_x = axis_x or AxisModel()
+        axis_y = axis_y or AxisModel()
+        if start_um is None:
+            start_um = (axis_x.adc_to_um(512), axis_y.adc_to_um(512))
+        self.x = _AxisState(axis_x, start_um[0])
+        self.y = _AxisState(axis_y, start_um[1])
+        self._rng = np.random.default_rng(seed)
+
+        self.time_s = 0.0
+        self.pwm_a = 0
+        self.pwm_b = 0
+        self.state = 'MANUAL'
+        self.hold_target: Optional[Tuple[int, int]] = None
+        self.settling_threshold = 2
+        self.commands_received = 0
+        self._sensors = self._read_adc()
+
+    # ------------------------------------------------------------------
+    # Construcción desde la calibración / funciones identificadas
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_calibration(cls, calibration_file: Optional[str] = None,
+                         transfer_functions: Optional[List[Dict]] = None,
+                         **axis_overrides) -> 'SimulatedStage':
+        """
+        Crea la planta desde calibration.json y, opcionalmente, las funciones
+        de transferencia identificadas (TransferFunctionAnalyzer.identified_functions).
+
+        Args:
+            calibration_file: Ruta de calibration.json (por defecto la de config)
+            transfer_functions: Lista de dicts con 'motor', 'K' [µm/s/PWM] y 'tau' [s]
+            **axis_overrides: Campos de AxisModel aplicados a ambos ejes
+                (ej: deadzone_pwm=60, backlash_um=10, noise_adc=1.0)
+        """
+        if calibration_file is None:
+            from config.constants import get_calibration_info
+            calibration_file = get_calibration_info()['config_file']
+        with open(calibration_file, 'r', encoding='utf-8') as f:
+            cal = json.load(f).get('calibration', {})
+
+        axes = {}
+        for axis, motor in (('x_axis', 'A'), ('y_axis', 'B')):
+            c = cal.get(axis, {})
+            model = AxisModel(intercept_um=c.get('intercept_um', 21601.0),
+                              slope_um_per_adc=c.get('slope_um_per_adc', 12.22))
+            for tf in transfer_functions or []:
+                if tf.get('motor') == motor and tf.get('K'):
+                    model = replace(model, K=abs(tf['K']), tau=max(tf.get('tau', 0.0), 0.0))
+            axes[motor] = replace(model, **axis_overrides)
+            logger.info(f"[SimulatedStage] Motor {motor}: K={axes[motor].K:.3f} µm/s/PWM, "
+                        f"τ={axes[motor].tau:.3f}s, zona muerta={axes[motor].deadzone_pwm} PWM")
+        return cls(axes['A'], axes['B'])
+
+    # ------------------------------------------------------------------
+    # Protocolo
+    # ------------------------------------------------------------------
+
+    def send_command(self, command: str):
+        """Aplica un comando del protocolo (misma firma que ArduinoGUI.send_command)."""
+        command = command.strip()
+        self.commands_received += 1
+        parts = command.split(',')
+        head = parts[0]
+        try:
+            if command == 'M':
+                self.state = 'MANUAL'
+                self.pwm_a = self.pwm_b = 0
+            elif head == 'A' and len(parts) == 3:
+                self.state = 'AUTO'
+                self.pwm_a = max(-PWM_MAX, min(PWM_MAX, int(parts[1])))
+                self.pwm_b = max(-PWM_MAX, min(PWM_MAX, int(parts[2])))
+            elif command == 'A':
+                self.state = 'AUTO'
+            elif head == 'H' and len(parts) == 3:
+                self.state = 'HOLD'
+                self.hold_target = (int(parts[1]), int(parts[2]))
+            elif command == 'B':
+                self.state = 'BRAKE'
+                self.pwm_a = self.pwm_b = 0
+                self.x.brake()
+                self.y.brake()
+            elif head == 'S' and len(parts) == 2:
+                self.settling_threshold = int(parts[1])
+            else:
+                logger.debug(f"[SimulatedStage] Comando ignorado: '{command}'")
+        except ValueError:
+            logger.warning(f"[SimulatedStage] Argumentos inválidos: '{command}'")
+
+    def _hold_pwm(self) -> Tuple[int, int]:
+        """Lazo P simple equivalente al HOLD del firmware (sensor1→B, sensor2→A)."""
+        s1, s2 = self._sensors
+        t1, t2 = self.hold_target
+        pwm_a = 0 if abs(t2 - s2) <= self.settling_threshold else int(max(-PWM_MAX, min(PWM_MAX, 3 * (t2 - s2))))
+        pwm_b = 0 if abs(t1 - s1) <= self.settling_threshold else int(max(-PWM_MAX, min(PWM_MAX, 3 * (t1 - s1))))
+        return pwm_a, pwm_b
+
+    # ------------------------------------------------------------------
+    # Dinámica y sensores
+    # ------------------------------------------------------------------
+
+    def advance(self, dt: float):
+        """Avanza la simulación dt segundos con los PWM actuales."""
+        if self.state == 'HOLD' and self.hold_target is not None:
+            self.pwm_a, self.pwm_b = self._hold_pwm()
+        self.x.advance(self.pwm_a, dt)
+        self.y.advance(self.pwm_b, dt)
+        self.time_s += dt
+        self._sensors = self._read_adc()
+
+    def _read_adc(self) -> Tuple[int, int]:
+        noise = self._rng.normal(0.0, 1.0, 2)
+        s2 = self.x.model.um_to_adc(self.x.carriage_um) + noise[0] * self.x.model.noise_adc
+        s1 = self.y.model.um_to_adc(self.y.carriage_um) + noise[1] * self.y.model.noise_adc
+        return (int(min(ADC_MAX, max(0, round(s1)))), int(min(ADC_MAX, max(0, round(s2)))))
+
+    def get_sensor_value(self, key: str) -> Optional[int]:
+        """Lectura de sensor con las claves de ControlTab.value_labels."""
+        if key == 'sensor_1':
+            return self._sensors[0]
+        if key == 'sensor_2':
+            return self._sensors[1]
+        if key == 'power_a':
+            return self.pwm_a
+        if key == 'power_b':
+            return self.pwm_b
+        return None
+
+    @property
+    def position_um(self) -> Tuple[float, float]:
+        """Posición real (x, y) del carro en µm (sin ruido)."""
+        return (self.x.carriage_um, self.y.carriage_um)
+
+    def is_settled(self) -> bool:
+        if self.state != 'HOLD' or self.hold_target is None:
+            return False
+        s1, s2 = self._sensors
+        return (abs(s1 - self.hold_target[0]) <= self.settling_threshold and
+                abs(s2 - self.hold_target[1]) <= self.settling_threshold)
+
+    def telemetry_line(self) -> str:
+        """Línea de telemetría de 6 campos como la del firmware."""
+        s1, s2 = self._sensors
+        return f"{self.pwm_a},{self.pwm_b},{s1},{s2},{self.state},{int(self.is_settled())}"
+
+    def sensor_model(self, pwm_a: int, pwm_b: int, dt: float) -> Tuple[int, int]:
+        """
+        Adaptador para VirtualArduino(sensor_model=...): el dispositivo virtual
+        interpreta los comandos y entrega los PWM; aquí solo se integra la planta.
+        """
+        self.state = 'AUTO'
+        self.pwm_a, self.pwm_b = pwm_a, pwm_b
+        self.advance(dt)
+        return self._sensors
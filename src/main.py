@@ -64,6 +64,7 @@ from gui.styles.dark_theme import DARK_STYLESHEET
 
 # Fase 3: Comunicación Serial
 from core.communication.serial_handler import SerialHandler
+from core.communication.sample_store import LatestSampleStore
 from core.communication.protocol import MotorProtocol
 
 # Fase 4: Ventanas Auxiliares
@@ -135,7 +136,7 @@ class ArduinoGUI(QMainWindow):
         self.setStyleSheet(DARK_STYLESHEET)
 
         # Inicializar grabador de datos (Fase 6)
-        self.data_recorder = DataRecorder()
+        self.data_recorder = DataRecorder(threaded=RECORDER_THREADED_WRITER)
         
         # Inicializar analizador de transferencia (Fase 7)
         self.tf_analyzer = TransferFunctionAnalyzer()
@@ -176,7 +177,11 @@ class ArduinoGUI(QMainWindow):
         # Iniciar comunicación serial ANTES de crear tabs (necesario para ControlTab)
         # Detectar puerto automáticamente o usar el configurado
         initial_port = self._detect_arduino_port() or SERIAL_PORT
-        self.serial_thread = SerialHandler(initial_port, BAUD_RATE)
+        # Última muestra compartida con los lazos de control (sobrevive a reconexiones)
+        self.sample_store = LatestSampleStore()
+        self.serial_thread = SerialHandler(initial_port, BAUD_RATE, binary_mode=SERIAL_BINARY_TELEMETRY,
+                                           batch_interval_ms=SERIAL_BATCH_INTERVAL_MS,
+                                           sample_store=self.sample_store)
         
         # Widget central con pestañas
         central_widget = QWidget()
@@ -243,7 +248,7 @@ class ArduinoGUI(QMainWindow):
         # Configurar callbacks de hardware para control en tiempo real
         self.test_tab.set_hardware_callbacks(
             send_command=self.send_command,
-            get_sensor_value=lambda key: int(self.control_tab.value_labels[key].text()) if key in self.control_tab.value_labels else None,
+            get_sensor_value=self.get_sensor_value,
             get_mode_label=lambda: self.control_tab.value_labels.get('mode', None)
         )
         # TestTab maneja sus operaciones internamente
@@ -255,7 +260,7 @@ class ArduinoGUI(QMainWindow):
         # Configurar callbacks de hardware para control en tiempo real
         self.hinf_tab.set_hardware_callbacks(
             send_command=self.send_command,
-            get_sensor_value=lambda key: int(self.control_tab.value_labels[key].text()) if key in self.control_tab.value_labels else None,
+            get_sensor_value=self.get_sensor_value,
             get_mode_label=lambda: self.control_tab.value_labels.get('mode', None)
         )
         # Configurar referencia a TestTab para transferencias
@@ -287,7 +292,7 @@ class ArduinoGUI(QMainWindow):
         
         # Pestaña 6: Cámara (CameraTab modular - auto-contenida)
         self.camera_tab = CameraTab(
-            thorlabs_available=THORLABS_AVAILABLE,
+            thorlabs_available=THORLABS_AVAILABLE or CAMERA_SIMULATED,
             parent=self,
             camera_service=self.camera_service,
             camera_orchestrator=self.camera_orchestrator,
@@ -323,7 +328,7 @@ class ArduinoGUI(QMainWindow):
             capture_microscopy_image=self.camera_tab.capture_microscopy_image,
             autofocus_service=self.autofocus_service,
             cfocus_enabled_getter=lambda: self.cfocus_enabled,
-            get_current_frame=lambda: self.camera_tab.camera_worker.current_frame
+            get_current_frame=lambda: self.camera_tab.camera_worker.copy_current_frame()
             if self.camera_tab.camera_worker is not None
             else None,
             smart_focus_scorer=self.smart_focus_scorer,
@@ -373,6 +378,8 @@ class ArduinoGUI(QMainWindow):
 
         # Conectar señal de datos seriales y arrancar thread
         self.serial_thread.data_received.connect(self.update_data)
+        self.serial_thread.sample_received.connect(self.update_sample)
+        self.serial_thread.batch_received.connect(self.update_batch)
         self.serial_thread.start()
         
         # Actualizar estado inicial de conexión en ControlTab
@@ -474,10 +481,15 @@ class ArduinoGUI(QMainWindow):
             
             # Crear nuevo thread con los nuevos parámetros
             logger.debug(f"Creando nuevo SerialHandler: {port} @ {baudrate}")
-            self.serial_thread = SerialHandler(port, baudrate)
+            self.sample_store.clear()
+            self.serial_thread = SerialHandler(port, baudrate, binary_mode=SERIAL_BINARY_TELEMETRY,
+                                               batch_interval_ms=SERIAL_BATCH_INTERVAL_MS,
+                                               sample_store=self.sample_store)
             
             # Reconectar señal de datos
             self.serial_thread.data_received.connect(self.update_data)
+            self.serial_thread.sample_received.connect(self.update_sample)
+            self.serial_thread.batch_received.connect(self.update_batch)
             
             # Actualizar referencia en ControlTab
             self.control_tab.serial_handler = self.serial_thread
@@ -504,78 +516,68 @@ class ArduinoGUI(QMainWindow):
             self.control_tab.set_connection_status(False)
             logger.info("Estado conexión actualizado: Desconectado")
     
+    def get_sensor_value(self, key):
+        """
+        Lee un valor de la última muestra de telemetría para los lazos de control.
+        
+        Lee directamente del LatestSampleStore que actualiza el thread serial
+        (no de los QLabel de la GUI). Retorna None si no hay datos o si la
+        muestra tiene más de SENSOR_STALE_TIMEOUT_S segundos.
+        """
+        return self.sample_store.get(key, max_age_s=SENSOR_STALE_TIMEOUT_S)
+    
     def update_data(self, line):
         """
-        PROCESAMIENTO de datos del Arduino con VALIDACIÓN.
-        Formato viejo: pot_a,pot_b,sens_1,sens_2 (4 enteros CSV)
-        Formato nuevo: pot_a,pot_b,sens_1,sens_2,estado,settled (6 campos)
-        Filtra datos inválidos y actualiza estado de ControlTab.
+        Líneas del Arduino que no son telemetría (mensajes de sistema o
+        cabecera). La telemetría llega ya parseada por sample_received /
+        batch_received, con el tiempo del dispositivo desenvuelto en el
+        thread serial.
         """
-        # Mensajes de sistema o cabecera
         if line.startswith(("ERROR:", "INFO:", "Potencia")):
             logger.info(line)
             return
-
-        try:
-            # Parseo con validación - manejar ambos formatos
-            parts = line.split(',')
-            
-            if len(parts) == 6:
-                # Formato nuevo con estado y settled
-                parsed_data = MotorProtocol.parse_sensor_data_with_status(line)
-                if parsed_data:
-                    pot_a = parsed_data['pot_a']
-                    pot_b = parsed_data['pot_b']
-                    sens_1 = parsed_data['sens_1']
-                    sens_2 = parsed_data['sens_2']
-                    
-                    # Actualizar valores en ControlTab
-                    self.control_tab.update_motor_values(pot_a, pot_b)
-                    self.control_tab.update_sensor_values(sens_1, sens_2)
-                    
-                    # Actualizar estado del Arduino en ControlTab
-                    self.control_tab.update_arduino_status(parsed_data['state'], parsed_data['settled'])
-                    
-                    # Actualizar SignalWindow (si está visible)
-                    if self.signal_window and self.signal_window.isVisible():
-                        self.signal_window.update_data(pot_a, pot_b, sens_1, sens_2)
-                    
-                    # Grabar datos (si está grabando)
-                    if self.data_recorder.is_recording:
-                        self.data_recorder.write_data_point(pot_a, pot_b, sens_1, sens_2)
-                    
-            elif len(parts) == 4:
-                # Formato viejo - firmware sin Position Hold
-                pot_a, pot_b, sens_1, sens_2 = map(int, parts)
-                
-                # Validar rangos
-                if not (-255 <= pot_a <= 255 and -255 <= pot_b <= 255 and 
-                       0 <= sens_1 <= 1023 and 0 <= sens_2 <= 1023):
-                    logger.warning(f"Datos fuera de rango: {line}")
-                    return
-                
-                # Actualizar valores en ControlTab
-                self.control_tab.update_motor_values(pot_a, pot_b)
-                self.control_tab.update_sensor_values(sens_1, sens_2)
-                
-                # Mostrar estado LEGACY para indicar firmware viejo
-                self.control_tab.update_arduino_status("LEGACY", False)
-                
-                # Actualizar SignalWindow (si está visible)
-                if self.signal_window and self.signal_window.isVisible():
-                    self.signal_window.update_data(pot_a, pot_b, sens_1, sens_2)
-                
-                # Grabar datos (si está grabando)
-                if self.data_recorder.is_recording:
-                    self.data_recorder.write_data_point(pot_a, pot_b, sens_1, sens_2)
-                    
-            else:
-                logger.warning(f"Formato de datos inválido ({len(parts)} campos): {line}")
-                return
-                
-        except (ValueError, IndexError) as e:
-            logger.warning(f"Error parseando datos: '{line}' - {e}")
-            return
+        logger.warning(f"Formato de datos inválido ({len(line.split(','))} campos): {line}")
+    
+    def update_sample(self, pot_a, pot_b, sens_1, sens_2, state, settled, device_time_us=None):
+        """
+        Distribuye una muestra ya parseada (línea ASCII o trama binaria)
+        a ControlTab, SignalWindow y DataRecorder.
+        
+        device_time_us (timestamp desenvuelto del firmware) tiene prioridad
+        sobre el reloj del host al grabar.
+        """
+        # Actualizar valores en ControlTab
+        self.control_tab.update_motor_values(pot_a, pot_b)
+        self.control_tab.update_sensor_values(sens_1, sens_2)
+        
+        # Actualizar estado del Arduino en ControlTab
+        self.control_tab.update_arduino_status(state, settled)
+        
+        # Actualizar SignalWindow (si está visible)
+        if self.signal_window and self.signal_window.isVisible():
+            self.signal_window.update_data(pot_a, pot_b, sens_1, sens_2)
+        
+        # Grabar datos (si está grabando)
+        if self.data_recorder.is_recording:
+            self.data_recorder.write_data_point(pot_a, pot_b, sens_1, sens_2,
+                                                device_time_us=device_time_us)
+    
+    def update_batch(self, samples, state, settled):
+        """
+        Procesa un lote de muestras ya parseadas en el thread serial
+        (SerialHandler en modo batch). La GUI solo refleja la última muestra;
+        SignalWindow y DataRecorder reciben el lote completo.
+        """
+        last = samples[-1]
+        self.control_tab.update_motor_values(int(last['pot_a']), int(last['pot_b']))
+        self.control_tab.update_sensor_values(int(last['sens_1']), int(last['sens_2']))
+        self.control_tab.update_arduino_status(state, settled)
+        
+        if self.signal_window and self.signal_window.isVisible():
+            self.signal_window.update_data_batch(samples)
+        
+        if self.data_recorder.is_recording:
+            self.data_recorder.write_data_batch(samples)
     
     # --- Lógica de Control y Comandos ---
     # Toda la lógica de grabación está ahora en RecordingTab
@@ -782,15 +784,19 @@ class ArduinoGUI(QMainWindow):
     
     def connect_cfocus(self):
         """Conecta con el piezo C-Focus."""
-        from hardware.cfocus.cfocus_controller import CFocusController
+        from hardware.cfocus import CFocusController, SimulatedCFocusController
         
         if self.cfocus_controller is None:
-            self.cfocus_controller = CFocusController()
+            self.cfocus_controller = (SimulatedCFocusController() if CFOCUS_SIMULATED
+                                      else CFocusController())
         
         success, message = self.cfocus_controller.connect()
         
         if success:
             self.cfocus_enabled = True
+            # La cámara simulada ve la Z real del piezo simulado
+            if isinstance(self.cfocus_controller, SimulatedCFocusController):
+                self.camera_service.set_simulated_z_source(self.cfocus_controller.true_z)
             self.camera_tab.log_message(f"✅ C-Focus: {message}")
             logger.info(f"C-Focus conectado: {message}")
             
@@ -808,6 +814,7 @@ class ArduinoGUI(QMainWindow):
         """Desconecta el piezo C-Focus."""
         if self.cfocus_controller:
             self.cfocus_controller.disconnect()
+            self.camera_service.set_simulated_z_source(None)
             self.cfocus_enabled = False
             self.cfocus_controller = None
             logger.info("C-Focus desconectado")
@@ -862,7 +869,7 @@ class ArduinoGUI(QMainWindow):
         # Configurar AutofocusService con hardware
         self.autofocus_service.configure(
             cfocus_controller=self.cfocus_controller,
-            get_frame_callback=lambda: worker.current_frame
+            get_frame_callback=worker.copy_current_frame
         )
         
         self.camera_tab.log_message("✅ Autofoco configurado (U2-Net + C-Focus)")
@@ -16,6 +16,8 @@ class SensorData:
     power_a: int  # Potencia motor A
     power_b: int  # Potencia motor B
     timestamp: Optional[datetime] = None
+    device_time_us: Optional[int] = None  # micros() del Arduino (si lo envía)
+    seq: Optional[int] = None  # Contador de secuencia del Arduino
     
     def __post_init__(self):
         """Valida y completa los datos."""
@@ -37,27 +39,39 @@ class SensorData:
         """
         Crea SensorData desde línea serial.
         
-        Formato esperado: "power_a,power_b,sensor_1,sensor_2"
+        Formatos aceptados:
+            "power_a,power_b,sensor_1,sensor_2"
+            "power_a,power_b,sensor_1,sensor_2,estado,settled"
+            "power_a,power_b,sensor_1,sensor_2,estado,settled,t_us,seq"
         """
         try:
             parts = line.strip().split(',')
-            if len(parts) != 4:
-                raise ValueError(f"Formato inválido, esperado 4 valores: {line}")
+            if len(parts) not in (4, 6, 8):
+                raise ValueError(f"Formato inválido, esperado 4, 6 u 8 valores: {line}")
             
-            power_a, power_b, sensor_1, sensor_2 = map(int, parts)
+            power_a, power_b, sensor_1, sensor_2 = map(int, parts[:4])
             
             return cls(
                 sensor_1=sensor_1,
                 sensor_2=sensor_2,
                 power_a=power_a,
-                power_b=power_b
+                power_b=power_b,
+                device_time_us=int(parts[6]) if len(parts) == 8 else None,
+                seq=int(parts[7]) if len(parts) == 8 else None
             )
         except (ValueError, IndexError) as e:
             raise ValueError(f"Error parseando línea serial: {e}")
     
-    def to_csv_row(self, start_time: datetime) -> list:
-        """Convierte a fila CSV con timestamp relativo."""
-        if self.timestamp and start_time:
+    def to_csv_row(self, start_time: datetime, device_t0_us: Optional[int] = None) -> list:
+        """
+        Convierte a fila CSV con timestamp relativo.
+        
+        Si se indica device_t0_us y la muestra trae device_time_us, el tiempo
+        se toma del reloj del Arduino en lugar de la hora del host.
+        """
+        if device_t0_us is not None and self.device_time_us is not None:
+            time_ms = round((self.device_time_us - device_t0_us) / 1000.0, 3)
+        elif self.timestamp and start_time:
             time_ms = int((self.timestamp - start_time).total_seconds() * 1000)
         else:
             time_ms = 0